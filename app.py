@@ -1,14 +1,168 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-import json
 import os
-import pandas as pd
+
+import instrumentation
+from data_store import DatasetStore
+from detail_index import DetailIndex, DetailQuery
+from graph_index import GraphIndex, GraphQuery
+from level_index import LevelIndex, LevelQuery
+from metrics_index import MetricsIndex, MetricsQuery
+from response_cache import NETWORK_BINARY_MIMETYPE, EncodedPayload, wants_binary
+from scripts.network_io import as_json, encode_binary
+from search_index import SearchIndex, SearchQuery, SuggestQuery
+from streaming import frame_chunks, list_chunks, stream_records, wants_ndjson
+from table_index import TableIndex, TableQuery
+from timeline_index import TimelineCube, TimelineIndex, TimelineQuery
 
 app = Flask(__name__)
 CORS(app)
 
-# 数据文件路径
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'scripts', 'data', 'processed')
+# 数据文件路径（SCISCINET_DATA_DIR 可以指向其他数据目录，如压力测试生成的数据）
+DATA_DIR = os.environ.get('SCISCINET_DATA_DIR',
+                          os.path.join(os.path.dirname(__file__), 'scripts', 'data', 'processed'))
+
+# 进程级共享数据集：启动时加载一次，文件更新后自动重新加载
+store = DatasetStore(DATA_DIR)
+
+# 请求指标（/metrics）：SCISCINET_METRICS=0 时完全不注册；
+# SCISCINET_SERVER_TIMING=1 时在响应中加入 Server-Timing 头
+if os.environ.get('SCISCINET_METRICS', '1') != '0':
+    instrumentation.install(app, store, server_timing=os.environ.get('SCISCINET_SERVER_TIMING') == '1')
+
+
+def network_payload(name):
+    """网络数据的预编码响应体，网络 JSON 文件重建后自动失效"""
+    return store.derived(f'{name}:payload', [name], lambda network: EncodedPayload.from_json(as_json(network)))
+
+
+def encode_binary_payload(network):
+    """网络 -> 二进制响应体；有悬空边、无法用二进制格式表示时为 None"""
+    try:
+        return EncodedPayload(encode_binary(network), NETWORK_BINARY_MIMETYPE)
+    except ValueError:
+        return None
+
+
+def network_binary_payload(name):
+    """网络的二进制响应体（节点列 + int32 边数组），有 .bin 文件时直接使用文件内容"""
+    return store.derived(f'{name}:binary', [name], encode_binary_payload)
+
+
+def network_response(name):
+    """整个网络：按 Accept 返回 JSON 或二进制表示，无法用二进制表示时返回 JSON"""
+    payload = network_binary_payload(name) if wants_binary(request) else None
+    if payload is None:
+        payload = network_payload(name)
+    return payload.to_response(request, vary='Accept, Accept-Encoding')
+
+
+def subgraph_response(result):
+    """子图查询结果：按 Accept 返回 JSON 或二进制表示"""
+    if wants_binary(request):
+        response = app.response_class(encode_binary(result), mimetype=NETWORK_BINARY_MIMETYPE)
+    else:
+        response = jsonify(result)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def author_graph():
+    """作者网络的 CSR 邻接索引，用于子图查询"""
+    return store.derived('author_network:graph', ['author_network'], GraphIndex)
+
+
+def author_metrics():
+    """作者网络节点指标的 top-k 索引"""
+    return store.derived('author_network:metrics', ['author_network'], MetricsIndex)
+
+
+def author_levels():
+    """作者网络的多分辨率层级，author_network_levels.json 由 scripts/network_levels.py 生成"""
+    return store.derived('author_network:levels', ['author_network', 'author_network_levels'], LevelIndex)
+
+
+def papers_index():
+    """论文表的排序/筛选索引"""
+    return store.derived('papers:index', ['papers'], lambda df: TableIndex(
+        df,
+        sort_columns=['PaperId', 'Title', 'Year', 'CitationCount'],
+        year_column='Year',
+        field_column='FieldsOfStudy',
+        name_column='Title',
+    ))
+
+
+def authors_index():
+    """作者表的排序/筛选索引"""
+    return store.derived('authors:index', ['authors'], lambda df: TableIndex(
+        df,
+        sort_columns=['AuthorId', 'DisplayName'],
+        name_column='DisplayName',
+    ))
+
+
+def timeline_index():
+    """论文按年份的预计算聚合：每年论文数、专利引用分布和年份 -> 行区间"""
+    return store.derived('papers:timeline', ['papers'], TimelineIndex)
+
+
+def timeline_cube():
+    """论文的 (年份 × 领域) 前缀和立方体，用于任意年份区间的时间线查询"""
+    return store.derived('papers:timeline_cube', ['papers'], TimelineCube)
+
+
+def search_index():
+    """论文标题和作者姓名的倒排索引及作者姓名前缀表"""
+    return store.derived('search', ['papers', 'authors', 'paper_authors'], SearchIndex)
+
+
+def detail_index():
+    """作者/论文详情的反向索引（作者 -> 论文、论文 -> 作者/参考文献/被引）"""
+    return store.derived('details', ['papers', 'authors', 'paper_authors', 'paper_references'], DetailIndex)
+
+
+def table_page(index, query, key):
+    """执行列表查询并组装分页响应
+
+    不限制行数（没有 limit）或请求 NDJSON 时流式输出，否则一次性返回当前页。
+    """
+    total, rows, next_cursor = index.rows(query)
+    meta = {
+        'total': total,
+        'offset': index.decode_cursor(query.cursor) if query.cursor else query.offset,
+        'limit': query.limit,
+        'next_cursor': next_cursor,
+    }
+    if query.limit is None or wants_ndjson(request):
+        return stream_records(request, key, frame_chunks(index.df, rows, query.fields), meta)
+    meta[key] = index.records(rows, query.fields)
+    return jsonify(meta)
+
+
+def warm_caches():
+    """启动时预加载数据集并提前构建响应缓存"""
+    store.preload()
+    for build in (lambda: network_payload('author_network'),
+                  lambda: network_payload('citation_network'),
+                  lambda: network_binary_payload('author_network'),
+                  lambda: network_binary_payload('citation_network'),
+                  author_graph,
+                  author_metrics,
+                  author_levels,
+                  papers_index,
+                  authors_index,
+                  timeline_index,
+                  timeline_cube,
+                  search_index,
+                  detail_index):
+        try:
+            build()
+        except FileNotFoundError:
+            continue
+
+
+warm_caches()
 
 @app.route('/')
 def home():
@@ -18,9 +172,15 @@ def home():
         'version': '1.0',
         'endpoints': {
             'author_network': '/api/author-network',
+            'author_network_metrics': '/api/author-network/metrics',
+            'author_network_levels': '/api/author-network/levels',
             'citation_network': '/api/citation-network',
             'papers': '/api/papers',
             'authors': '/api/authors',
+            'paper_detail': '/api/papers/<paper_id>',
+            'author_detail': '/api/authors/<author_id>',
+            'search': '/api/search',
+            'author_suggest': '/api/authors/suggest',
             'stats': '/api/stats',
             'timeline': '/api/timeline',  # NEW
             'patent_distribution': '/api/patent-distribution'  # NEW
@@ -29,23 +189,75 @@ def home():
 
 @app.route('/api/author-network')
 def get_author_network():
-    """获取作者协作网络数据"""
+    """获取作者协作网络数据
+
+    不带参数时返回整个网络；支持子图查询：
+    author + hops (ego 网络)、min_weight、min_papers、top (按度数取前 N 个作者)。
+    Accept: application/vnd.sciscinet.network（或 application/octet-stream）时返回二进制表示。
+    """
     try:
-        with open(os.path.join(DATA_DIR, 'author_network.json'), 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
+        query = GraphQuery.from_args(request.args)
+        if query.is_empty():
+            return network_response('author_network')
+        return subgraph_response(author_graph().query(query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': f"Author {request.args.get('author')} not found"}), 404
     except FileNotFoundError:
         return jsonify({'error': 'Author network data not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/author-network/metrics')
+def get_author_network_metrics():
+    """获取作者网络的节点指标
+
+    按 sort (pagerank/betweenness/degree/strength) 降序返回前 top 个作者，
+    community 只返回该社区的作者。
+    """
+    try:
+        query = MetricsQuery.from_args(request.args)
+        return jsonify(author_metrics().query(query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': f"Community {request.args.get('community')} not found"}), 404
+    except FileNotFoundError:
+        return jsonify({'error': 'Author network data not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/author-network/levels')
+def get_author_network_levels():
+    """获取作者网络的粗化层级
+
+    level 指定层（缺省为最粗的一层），expand 把该层的一个超级节点展开成下一层的节点。
+    """
+    try:
+        query = LevelQuery.from_args(request.args)
+        index = author_levels()
+        level = index.resolve_level(query.level)
+        if query.expand is None:
+            return index.payload(level).to_response(request)
+        return jsonify(index.expand(level, query.expand))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': f"Supernode {request.args.get('expand')} not found"}), 404
+    except FileNotFoundError:
+        return jsonify({'error': 'Author network levels not found, run scripts/network_levels.py'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/citation-network')
 def get_citation_network():
-    """获取论文引用网络数据"""
+    """获取论文引用网络数据
+
+    Accept: application/vnd.sciscinet.network（或 application/octet-stream）时返回二进制表示。
+    """
     try:
-        with open(os.path.join(DATA_DIR, 'citation_network.json'), 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
+        return network_response('citation_network')
     except FileNotFoundError:
         return jsonify({'error': 'Citation network data not found'}), 404
     except Exception as e:
@@ -53,15 +265,21 @@ def get_citation_network():
 
 @app.route('/api/papers')
 def get_papers():
-    """获取论文列表"""
+    """获取论文列表
+
+    支持分页 (limit/offset/cursor)、字段投影 (fields)、排序 (sort/order)
+    以及按年份区间 (year_from/year_to)、领域 (field)、标题前缀 (prefix) 筛选。
+    不带参数时流式返回全部论文，Accept: application/x-ndjson 时每行一条记录。
+    """
     try:
-        papers_df = pd.read_csv(os.path.join(DATA_DIR, 'papers.csv'))
-        papers = papers_df.to_dict('records')
-        
-        return jsonify({
-            'total': len(papers),
-            'papers': papers
-        })
+        query = TableQuery.from_args(request.args)
+        if not query.is_empty():
+            return table_page(papers_index(), query, 'papers')
+
+        papers = store.papers()
+        return stream_records(request, 'papers', frame_chunks(papers), {'total': len(papers)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except FileNotFoundError:
         return jsonify({'error': 'Papers data not found'}), 404
     except Exception as e:
@@ -69,29 +287,92 @@ def get_papers():
 
 @app.route('/api/authors')
 def get_authors():
-    """获取作者列表"""
+    """获取作者列表
+
+    支持分页 (limit/offset/cursor)、字段投影 (fields)、排序 (sort/order)
+    以及按姓名前缀 (prefix) 筛选。不带参数时流式返回全部作者，
+    Accept: application/x-ndjson 时每行一条记录。
+    """
     try:
-        authors_df = pd.read_csv(os.path.join(DATA_DIR, 'authors.csv'))
-        authors = authors_df.to_dict('records')
-        
-        return jsonify({
-            'total': len(authors),
-            'authors': authors
-        })
+        query = TableQuery.from_args(request.args)
+        if not query.is_empty():
+            return table_page(authors_index(), query, 'authors')
+
+        authors = store.authors()
+        return stream_records(request, 'authors', frame_chunks(authors), {'total': len(authors)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': 'Authors data not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/papers/<paper_id>')
+def get_paper(paper_id):
+    """论文详情：作者、参考文献和被引论文，limit 限制每个列表的条数"""
+    try:
+        query = DetailQuery.from_args(request.args)
+        return jsonify(detail_index().paper(paper_id, query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': f'Paper not found: {paper_id}'}), 404
+    except FileNotFoundError:
+        return jsonify({'error': 'Papers data not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/authors/<author_id>')
+def get_author(author_id):
+    """作者详情：论文和合作者，limit 限制每个列表的条数"""
+    try:
+        query = DetailQuery.from_args(request.args)
+        return jsonify(detail_index().author(author_id, query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except KeyError:
+        return jsonify({'error': f'Author not found: {author_id}'}), 404
     except FileNotFoundError:
         return jsonify({'error': 'Authors data not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/search')
+def search():
+    """按标题检索论文、按姓名检索作者
+
+    q 中的多个词需全部匹配，最后一个词按前缀匹配；不区分大小写和重音符号。
+    type=all/papers/authors 选择检索范围，limit 为每类返回的条数。
+    """
+    try:
+        query = SearchQuery.from_args(request.args)
+        return jsonify(search_index().search(query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': 'Search data not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/authors/suggest')
+def suggest_authors():
+    """作者姓名自动补全：prefix 可以是名或姓的开头，按论文数排序"""
+    try:
+        query = SuggestQuery.from_args(request.args)
+        return jsonify(search_index().suggest(query))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': 'Search data not found'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stats')
 def get_stats():
     """获取数据统计信息"""
     try:
-        with open(os.path.join(DATA_DIR, 'author_network.json'), 'r') as f:
-            author_network = json.load(f)
-        
-        with open(os.path.join(DATA_DIR, 'citation_network.json'), 'r') as f:
-            citation_network = json.load(f)
+        author_network = store.author_network()
+        citation_network = store.citation_network()
         
         stats = {
             'author_network': {
@@ -112,76 +393,49 @@ def get_stats():
 
 @app.route('/api/timeline')
 def get_timeline():
-    """NEW: 获取时间线数据 - 过去10年的论文数量"""
+    """NEW: 获取时间线数据 - 过去10年的论文数量
+
+    支持 from/to (年份闭区间)、field (FieldsOfStudy) 和 group_by (year/field/none)，
+    返回论文数、引用数之和与平均引用数。不带参数时返回过去10年每年的论文数。
+    """
     try:
-        papers_df = pd.read_csv(os.path.join(DATA_DIR, 'papers.csv'))
+        query = TimelineQuery.from_args(request.args)
+        if not query.is_empty():
+            return jsonify(timeline_cube().query(query))
+
+        index = timeline_index()
         
-        # 筛选过去10年 (2015-2024)
+        # 过去10年 (2015-2024)，没有论文的年份为0
         current_year = 2024
-        papers_df = papers_df[
-            (papers_df['Year'] >= current_year - 9) & 
-            (papers_df['Year'] <= current_year)
-        ]
-        
-        # 按年份分组计数
-        timeline = papers_df.groupby('Year').size().reset_index(name='count')
-        
-        # 确保所有年份都有数据（填充0）
-        all_years = list(range(current_year - 9, current_year + 1))
-        timeline_dict = dict(zip(timeline['Year'], timeline['count']))
-        
         result = [
-            {'year': year, 'count': timeline_dict.get(year, 0)}
-            for year in all_years
+            {'year': year, 'count': index.count(year)}
+            for year in range(current_year - 9, current_year + 1)
         ]
         
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/timeline/<int:year>')
 def get_timeline_year(year):
-    """NEW: 获取特定年份的论文数据"""
+    """NEW: 获取特定年份的论文数据（流式输出）"""
     try:
-        papers_df = pd.read_csv(os.path.join(DATA_DIR, 'papers.csv'))
-        year_papers = papers_df[papers_df['Year'] == year]
-        
-        return jsonify({
-            'year': year,
-            'count': len(year_papers),
-            'papers': year_papers.to_dict('records')
-        })
+        index = timeline_index()
+        meta = {'year': year, 'count': index.count(year)}
+        return stream_records(request, 'papers', list_chunks(index.papers(year)), meta)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/patent-distribution')
 def get_patent_distribution():
-    """NEW: 获取专利引用分布（所有论文）"""
+    """NEW: 获取专利引用分布（所有论文）
+
+    数据中没有 Patent_Count 列时使用模拟数据，直方图按数据集版本预先计算。
+    """
     try:
-        papers_df = pd.read_csv(os.path.join(DATA_DIR, 'papers.csv'))
-        
-        # 生成模拟的专利引用数据（因为OpenAlex数据中可能没有Patent_Count）
-        # 如果你的数据有Patent_Count列，直接使用即可
-        import numpy as np
-        np.random.seed(42)
-        
-        if 'Patent_Count' not in papers_df.columns:
-            # 模拟专利引用数据：大多数论文0-5个，少数更多
-            papers_df['Patent_Count'] = np.random.choice(
-                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20],
-                size=len(papers_df),
-                p=[0.3, 0.25, 0.15, 0.1, 0.08, 0.05, 0.03, 0.02, 0.01, 0.005, 0.003, 0.001, 0.001]
-            )
-        
-        # 创建直方图数据
-        patent_counts = papers_df['Patent_Count'].value_counts().sort_index()
-        
-        result = [
-            {'patent_count': int(pc), 'frequency': int(freq)}
-            for pc, freq in patent_counts.items()
-        ]
-        
-        return jsonify(result)
+        return jsonify(timeline_index().patent_histogram())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -189,35 +443,7 @@ def get_patent_distribution():
 def get_patent_distribution_year(year):
     """NEW: 获取特定年份的专利引用分布"""
     try:
-        papers_df = pd.read_csv(os.path.join(DATA_DIR, 'papers.csv'))
-        
-        # 筛选特定年份
-        year_papers = papers_df[papers_df['Year'] == year]
-        
-        if len(year_papers) == 0:
-            return jsonify([])
-        
-        # 生成模拟专利引用数据
-        import numpy as np
-        np.random.seed(year)  # 使用年份作为seed，保持一致性
-        
-        if 'Patent_Count' not in year_papers.columns:
-            year_papers = year_papers.copy()
-            year_papers['Patent_Count'] = np.random.choice(
-                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20],
-                size=len(year_papers),
-                p=[0.3, 0.25, 0.15, 0.1, 0.08, 0.05, 0.03, 0.02, 0.01, 0.005, 0.003, 0.001, 0.001]
-            )
-        
-        # 创建直方图数据
-        patent_counts = year_papers['Patent_Count'].value_counts().sort_index()
-        
-        result = [
-            {'patent_count': int(pc), 'frequency': int(freq)}
-            for pc, freq in patent_counts.items()
-        ]
-        
-        return jsonify(result)
+        return jsonify(timeline_index().patent_histogram(year))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -233,11 +459,17 @@ if __name__ == '__main__':
     print("\nAvailable endpoints:")
     print("  - http://localhost:5001/")
     print("  - http://localhost:5001/api/author-network")
+    print("  - http://localhost:5001/api/author-network/metrics")
+    print("  - http://localhost:5001/api/author-network/levels")
     print("  - http://localhost:5001/api/citation-network")
+    print("  - http://localhost:5001/api/papers/<paper_id>")
+    print("  - http://localhost:5001/api/authors/<author_id>")
+    print("  - http://localhost:5001/api/search?q=")
+    print("  - http://localhost:5001/api/authors/suggest?prefix=")
     print("  - http://localhost:5001/api/timeline")
     print("  - http://localhost:5001/api/patent-distribution")
     print("  - http://localhost:5001/api/patent-distribution/<year>")
-    print("\nStarting server...")
+    print("\nStarting development server (production: gunicorn -c gunicorn.conf.py app:app)...")
     print("=" * 70)
     
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
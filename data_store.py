@@ -0,0 +1,164 @@
+# data_store.py
+import json
+import os
+import threading
+import time
+
+from scripts.network_io import BinaryNetwork, network_path
+from scripts.table_io import read_table, table_path
+
+# 数据集名称 -> 表名（有 .arrow 文件时优先读取，否则读 .csv）
+TABLE_FILES = {
+    'papers': 'papers',
+    'authors': 'authors',
+    'paper_authors': 'paper_author_affiliations',
+    'paper_references': 'paper_references',
+}
+
+# 数据处理流程内部使用的整数论文 id，API 只暴露字符串 id
+INTERNAL_COLUMNS = ['PaperIdx', 'PaperReferenceIdx']
+
+# 网络 JSON 旁边有不比它旧的 .bin 文件时，用内存映射打开二进制文件（BinaryNetwork），
+# 它可以像网络 dict 一样使用；多分辨率层级只有 JSON
+NETWORK_FILES = {
+    'author_network': 'author_network.json',
+    'citation_network': 'citation_network.json',
+    'author_network_levels': 'author_network_levels.json',
+}
+
+
+class DatasetStore:
+    """进程内共享的数据集缓存
+
+    每个数据集只在第一次访问时加载，之后直接返回内存中的对象；
+    只有当文件的 mtime/大小发生变化时才会重新加载。
+    返回的 DataFrame / dict 是共享的，调用方不要原地修改。
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._lock = threading.RLock()
+        # name -> (signature, value)
+        self._entries = {}
+        # key -> (version, value)
+        self._derived = {}
+        # 可选的回调 observer(kind, name, hit, seconds)，kind 为 'dataset' 或 'derived'，
+        # 用于统计缓存命中率和加载/构建耗时；为 None 时没有任何额外开销
+        self.observer = None
+
+    def path(self, name):
+        """数据集对应的文件路径"""
+        if name in TABLE_FILES:
+            return table_path(TABLE_FILES[name], self.data_dir)
+        if name in NETWORK_FILES:
+            return network_path(os.path.join(self.data_dir, NETWORK_FILES[name]))
+        raise KeyError(f"Unknown dataset: {name}")
+
+    def signature(self, name):
+        """文件签名 (mtime_ns, size)，文件不存在时抛出 FileNotFoundError"""
+        st = os.stat(self.path(name))
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, name):
+        """获取数据集，文件有变化时自动重新加载"""
+        sig = self.signature(name)
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == sig:
+            if self.observer is not None:
+                self.observer('dataset', name, True, 0.0)
+            return entry[1]
+
+        with self._lock:
+            # 加锁后再检查一次，避免多个线程重复加载
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == sig:
+                if self.observer is not None:
+                    self.observer('dataset', name, True, 0.0)
+                return entry[1]
+            start = time.perf_counter()
+            value = self._load(name)
+            self._entries[name] = (sig, value)
+            if self.observer is not None:
+                self.observer('dataset', name, False, time.perf_counter() - start)
+            return value
+
+    def version(self, *names):
+        """若干数据集的联合版本号，任一文件变化都会改变"""
+        return tuple(self.signature(name) for name in names)
+
+    def snapshot(self):
+        """所有存在的数据集文件的签名 {name: signature}，不加载数据、不加锁"""
+        signatures = {}
+        for name in list(TABLE_FILES) + list(NETWORK_FILES):
+            try:
+                signatures[name] = self.signature(name)
+            except FileNotFoundError:
+                continue
+        return signatures
+
+    def derived(self, key, names, build):
+        """缓存由数据集计算出的派生结果
+
+        build 以 names 对应的数据集作为参数调用，结果按数据集版本缓存，
+        依赖的文件变化后下一次访问时重新计算。
+        """
+        version = self.version(*names)
+        entry = self._derived.get(key)
+        if entry is not None and entry[0] == version:
+            if self.observer is not None:
+                self.observer('derived', key, True, 0.0)
+            return entry[1]
+
+        with self._lock:
+            entry = self._derived.get(key)
+            if entry is not None and entry[0] == version:
+                if self.observer is not None:
+                    self.observer('derived', key, True, 0.0)
+                return entry[1]
+            # 数据集的加载单独计时，这里只计构建派生结果的时间
+            datasets = [self.get(name) for name in names]
+            start = time.perf_counter()
+            value = build(*datasets)
+            self._derived[key] = (version, value)
+            if self.observer is not None:
+                self.observer('derived', key, False, time.perf_counter() - start)
+            return value
+
+    def _load(self, name):
+        if name in NETWORK_FILES:
+            path = self.path(name)
+            if path.endswith('.bin'):
+                return BinaryNetwork(path)
+            with open(path, 'r') as f:
+                return json.load(f)
+        df = read_table(TABLE_FILES[name], self.data_dir)
+        return df.drop(columns=INTERNAL_COLUMNS, errors='ignore')
+
+    def preload(self):
+        """启动时预加载所有存在的数据集"""
+        loaded = []
+        for name in list(TABLE_FILES) + list(NETWORK_FILES):
+            try:
+                self.get(name)
+                loaded.append(name)
+            except FileNotFoundError:
+                continue
+        return loaded
+
+    def papers(self):
+        return self.get('papers')
+
+    def authors(self):
+        return self.get('authors')
+
+    def paper_authors(self):
+        return self.get('paper_authors')
+
+    def paper_references(self):
+        return self.get('paper_references')
+
+    def author_network(self):
+        return self.get('author_network')
+
+    def citation_network(self):
+        return self.get('citation_network')
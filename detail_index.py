@@ -0,0 +1,193 @@
+# detail_index.py
+import numpy as np
+import pandas as pd
+
+from search_index import column_values
+
+# 详情中每个列表最多返回的条数
+MAX_DETAIL_LIMIT = 10000
+
+# 详情中论文、作者记录包含的字段
+PAPER_FIELDS = ('PaperId', 'Title', 'Year', 'CitationCount')
+AUTHOR_FIELDS = ('AuthorId', 'DisplayName')
+
+
+class DetailQuery:
+    """作者/论文详情的查询参数
+
+    limit: 每个列表（论文、合作者、参考文献、被引）最多返回的条数，
+    不指定时返回全部；各列表的总数始终返回
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+        limit = args.get('limit')
+        if limit is None or limit == '':
+            return cls()
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("'limit' must be an integer")
+        if limit < 1:
+            raise ValueError("'limit' must be positive")
+        return cls(limit=min(limit, MAX_DETAIL_LIMIT))
+
+
+def csr(keys, values, n):
+    """按 keys 分组的 CSR：indptr[k]:indptr[k+1] 为 key k 的 values，组内保持原顺序"""
+    order = np.argsort(keys, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+    return indptr, values[order]
+
+
+class DetailIndex:
+    """作者 -> 论文、论文 -> 作者、论文 -> 参考文献、论文 -> 被引的反向索引
+
+    构建时把论文和作者 id 映射为行号，每种关系保存为 CSR 的 indptr/values 数组，
+    作者的论文和论文的被引按年份倒序排列，论文的作者和参考文献保持数据中的顺序。
+    查询一个作者或论文只需一次哈希查找和若干切片，耗时与它的关系数成正比。
+    """
+
+    def __init__(self, papers, authors, paper_authors, paper_references):
+        papers = papers.reset_index(drop=True)
+        authors = authors.reset_index(drop=True)
+        self.paper_ids = pd.Index(papers['PaperId'].astype(str))
+        self.author_ids = pd.Index(authors['AuthorId'].astype(str))
+        n_papers, n_authors = len(papers), len(authors)
+
+        self.paper_columns = {c: column_values(papers[c]) for c in PAPER_FIELDS if c in papers.columns}
+        self.author_columns = {c: column_values(authors[c]) for c in AUTHOR_FIELDS if c in authors.columns}
+        self.author_extra = {
+            c: column_values(authors[c]) for c in authors.columns if c not in AUTHOR_FIELDS
+        }
+
+        # 作者-论文关系：一位作者在一篇论文有多个机构时只保留第一行
+        links = paper_authors.drop_duplicates(['PaperId', 'AuthorId'])
+        paper_rows = self.paper_ids.get_indexer(links['PaperId'].astype(str))
+        author_rows = self.author_ids.get_indexer(links['AuthorId'].astype(str))
+        known = (paper_rows >= 0) & (author_rows >= 0)
+        paper_rows, author_rows = paper_rows[known], author_rows[known]
+        if 'AuthorSequenceNumber' in links.columns:
+            sequence = links['AuthorSequenceNumber'].astype(object).to_numpy()[known]
+        else:
+            sequence = np.full(len(paper_rows), None, dtype=object)
+
+        years = pd.to_numeric(papers.get('Year', pd.Series(np.nan, index=papers.index)), errors='coerce')
+        # 年份倒序的论文排名，没有年份的排在最后
+        recency = np.empty(n_papers, dtype=np.int64)
+        recency[np.lexsort((np.arange(n_papers), -years.fillna(-np.inf).to_numpy()))] = np.arange(n_papers)
+
+        link_ids = np.arange(len(paper_rows))
+        self.paper_author_ptr, self.paper_author_links = csr(paper_rows, link_ids, n_papers)
+        by_recency = np.argsort(recency[paper_rows], kind='stable')
+        indptr, ordered = csr(author_rows[by_recency], link_ids[by_recency], n_authors)
+        self.author_paper_ptr, self.author_paper_links = indptr, ordered
+        self.link_papers = paper_rows
+        self.link_authors = author_rows
+        self.link_sequence = sequence.tolist()
+
+        # 引用关系：参考文献可能不在论文表中，值为参考文献 id 表中的下标
+        citing = self.paper_ids.get_indexer(paper_references['PaperId'].astype(str))
+        reference_values = paper_references['PaperReferenceId'].astype(str).to_numpy()[citing >= 0]
+        citing = citing[citing >= 0]
+        codes, self.reference_ids = pd.factorize(reference_values)
+        self.reference_rows = self.paper_ids.get_indexer(self.reference_ids)
+        self.reference_ids = self.reference_ids.tolist()
+        self.reference_ptr, self.references = csr(citing, codes.astype(np.int64), n_papers)
+
+        cited = self.reference_rows[codes]
+        internal = cited >= 0
+        by_recency = np.argsort(recency[citing[internal]], kind='stable')
+        self.cited_by_ptr, self.cited_by = csr(cited[internal][by_recency], citing[internal][by_recency], n_papers)
+
+    def paper_row(self, paper_id):
+        """论文 id -> 行号，不存在时抛出 KeyError"""
+        row = self.paper_ids.get_indexer([str(paper_id)])[0]
+        if row < 0:
+            raise KeyError(paper_id)
+        return row
+
+    def author_row(self, author_id):
+        """作者 id -> 行号，不存在时抛出 KeyError"""
+        row = self.author_ids.get_indexer([str(author_id)])[0]
+        if row < 0:
+            raise KeyError(author_id)
+        return row
+
+    def paper_record(self, row):
+        return {column: values[row] for column, values in self.paper_columns.items()}
+
+    def author_record(self, row):
+        return {column: values[row] for column, values in self.author_columns.items()}
+
+    def author(self, author_id, q):
+        """作者详情：基本信息、论文（按年份倒序）和合作者（按合作论文数倒序）"""
+        row = self.author_row(author_id)
+        links = self.author_paper_links[self.author_paper_ptr[row]:self.author_paper_ptr[row + 1]]
+        papers = []
+        for link in links[:q.limit].tolist():
+            record = self.paper_record(self.link_papers[link])
+            record['AuthorSequenceNumber'] = self.link_sequence[link]
+            papers.append(record)
+
+        # 合作者：该作者每篇论文的作者列表拼接后计数
+        paper_rows = self.link_papers[links]
+        starts = self.paper_author_ptr[paper_rows]
+        counts = self.paper_author_ptr[paper_rows + 1] - starts
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        others = self.link_authors[self.paper_author_links[slots]]
+        coauthors, shared = np.unique(others[others != row], return_counts=True)
+        order = np.lexsort((coauthors, -shared))[:q.limit]
+        coauthor_records = []
+        for author, count in zip(coauthors[order].tolist(), shared[order].tolist()):
+            record = self.author_record(author)
+            record['sharedPapers'] = count
+            coauthor_records.append(record)
+
+        author = self.author_record(row)
+        author.update({column: values[row] for column, values in self.author_extra.items()})
+        return {
+            'author': author,
+            'paperCount': len(links),
+            'papers': papers,
+            'coauthorCount': len(coauthors),
+            'coauthors': coauthor_records,
+        }
+
+    def paper(self, paper_id, q):
+        """论文详情：基本信息、作者（按作者顺序）、参考文献和被引论文（按年份倒序）
+
+        不在论文表中的参考文献只返回 PaperId。
+        """
+        row = self.paper_row(paper_id)
+        links = self.paper_author_links[self.paper_author_ptr[row]:self.paper_author_ptr[row + 1]]
+        authors = []
+        for link in links[:q.limit].tolist():
+            record = self.author_record(self.link_authors[link])
+            record['AuthorSequenceNumber'] = self.link_sequence[link]
+            authors.append(record)
+
+        codes = self.references[self.reference_ptr[row]:self.reference_ptr[row + 1]]
+        references = []
+        for code in codes[:q.limit].tolist():
+            reference_row = self.reference_rows[code]
+            if reference_row >= 0:
+                references.append(self.paper_record(reference_row))
+            else:
+                references.append({'PaperId': self.reference_ids[code]})
+
+        cited_by = self.cited_by[self.cited_by_ptr[row]:self.cited_by_ptr[row + 1]]
+        return {
+            'paper': self.paper_record(row),
+            'authorCount': len(links),
+            'authors': authors,
+            'referenceCount': len(codes),
+            'references': references,
+            'citedByCount': len(cited_by),
+            'citedBy': [self.paper_record(r) for r in cited_by[:q.limit].tolist()],
+        }
@@ -0,0 +1,211 @@
+# graph_index.py
+import numpy as np
+
+from scripts.network_io import BinaryNetwork
+
+# ego 网络最多扩展的跳数
+MAX_HOPS = 3
+
+
+def take(records, rows):
+    """按下标取记录：二进制网络的 RecordList 一次转换所需的行"""
+    if hasattr(records, 'take'):
+        return records.take(rows)
+    return [records[i] for i in rows]
+
+
+class GraphQuery:
+    """作者网络的子图查询参数
+
+    author: 以该作者为中心取 hops 跳以内的 ego 网络
+    min_weight: 只保留权重 >= min_weight 的边
+    min_papers: 只保留 paperCount >= min_papers 的作者（中心作者除外）
+    top: 只保留（筛选后子图中）度数最高的 top 个作者
+    """
+
+    def __init__(self, author=None, hops=1, min_weight=None, min_papers=None, top=None):
+        self.author = author
+        self.hops = hops
+        self.min_weight = min_weight
+        self.min_papers = min_papers
+        self.top = top
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+
+        def parse(key, convert, name):
+            value = args.get(key)
+            if value is None or value == '':
+                return None
+            try:
+                return convert(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be {name}")
+
+        hops = parse('hops', int, 'an integer')
+        if hops is None:
+            hops = 1
+        if not 1 <= hops <= MAX_HOPS:
+            raise ValueError(f"'hops' must be between 1 and {MAX_HOPS}")
+
+        top = parse('top', int, 'an integer')
+        if top is not None and top < 1:
+            raise ValueError("'top' must be positive")
+
+        return cls(
+            author=args.get('author') or None,
+            hops=hops,
+            min_weight=parse('min_weight', float, 'a number'),
+            min_papers=parse('min_papers', int, 'an integer'),
+            top=top,
+        )
+
+    def is_empty(self):
+        """没有任何参数时接口保持原来的行为（返回整个网络）"""
+        return (self.author is None and self.min_weight is None
+                and self.min_papers is None and self.top is None)
+
+    def to_dict(self):
+        return {
+            'author': self.author,
+            'hops': self.hops if self.author is not None else None,
+            'min_weight': self.min_weight,
+            'min_papers': self.min_papers,
+            'top': self.top,
+        }
+
+
+class GraphIndex:
+    """网络的邻接索引（CSR）
+
+    构建时把节点 id 映射为 0..n-1，边保存为 src/dst/weight 数组，
+    并按节点建立 CSR 邻接表（无向图，每条边在两个端点下各出现一次）。
+    查询时只在数组上做筛选和 BFS，返回原始的节点/边对象。
+    """
+
+    def __init__(self, network, weight_key='weight'):
+        self.network = network
+        self.nodes = network['nodes']
+        self.links = network['links']
+        if isinstance(network, BinaryNetwork):
+            self._edges_from_binary(network, weight_key)
+        else:
+            self._edges_from_json(weight_key)
+        n = len(self.ids)
+
+        # CSR：indptr[v]:indptr[v+1] 为节点 v 的邻居及对应的边号
+        rows = np.concatenate([self.src, self.dst])
+        cols = np.concatenate([self.dst, self.src])
+        edges = np.concatenate([np.arange(len(self.src)), np.arange(len(self.src))])
+        order = np.argsort(rows, kind='stable')
+        self.neighbors = cols[order]
+        self.neighbor_edges = edges[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+        self.degree = np.diff(self.indptr)
+
+    def _edges_from_json(self, weight_key):
+        self.ids = [str(node['id']) for node in self.nodes]
+        self.position = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        # 只保留两个端点都是已知节点的边
+        edge_ids, src, dst = [], [], []
+        for i, link in enumerate(self.links):
+            source = self.position.get(str(link['source']))
+            target = self.position.get(str(link['target']))
+            if source is not None and target is not None:
+                edge_ids.append(i)
+                src.append(source)
+                dst.append(target)
+        self.edge_ids = np.asarray(edge_ids, dtype=np.int64)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.weights = np.asarray(
+            [float(self.links[i].get(weight_key, 1)) for i in edge_ids], dtype=float
+        )
+        self.paper_counts = np.asarray(
+            [node.get('paperCount', 0) or 0 for node in self.nodes], dtype=np.int64
+        )
+
+    def _edges_from_binary(self, network, weight_key):
+        """二进制网络的边已经是节点下标，直接使用文件中的数组，不解析任何记录"""
+        self.ids = [str(node_id) for node_id in network.node_ids]
+        self.position = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.edge_ids = np.arange(len(self.links), dtype=np.int64)
+        self.src = network.source.astype(np.int64)
+        self.dst = network.target.astype(np.int64)
+        self.weights = network.numbers('links', weight_key, default=1)
+        self.paper_counts = network.numbers('nodes', 'paperCount').astype(np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def node_index(self, node_id):
+        """节点 id -> 下标，不存在时抛出 KeyError"""
+        return self.position[str(node_id)]
+
+    def expand(self, frontier, node_mask, edge_mask):
+        """frontier 中节点通过 edge_mask 允许的边能到达、且满足 node_mask 的邻居"""
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        if counts.sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        slots = offsets + np.arange(counts.sum())
+        neighbors = self.neighbors[slots]
+        allowed = edge_mask[self.neighbor_edges[slots]] & node_mask[neighbors]
+        return np.unique(neighbors[allowed])
+
+    def ego(self, center, hops, node_mask, edge_mask):
+        """center 在 hops 跳以内的节点（布尔掩码）"""
+        selected = np.zeros(len(self), dtype=bool)
+        selected[center] = True
+        frontier = np.array([center], dtype=np.int64)
+        for _ in range(hops):
+            reached = self.expand(frontier, node_mask, edge_mask)
+            frontier = reached[~selected[reached]]
+            if len(frontier) == 0:
+                break
+            selected[frontier] = True
+        return selected
+
+    def query(self, q):
+        """执行子图查询，返回与原网络结构相同的 {'nodes', 'links', 'metadata'}"""
+        node_mask = np.ones(len(self), dtype=bool)
+        if q.min_papers is not None:
+            node_mask &= self.paper_counts >= q.min_papers
+        edge_mask = np.ones(len(self.src), dtype=bool)
+        if q.min_weight is not None:
+            edge_mask &= self.weights >= q.min_weight
+
+        if q.author is not None:
+            center = self.node_index(q.author)
+            node_mask[center] = True
+            node_mask = self.ego(center, q.hops, node_mask, edge_mask)
+
+        if q.top is not None and node_mask.sum() > q.top:
+            # 度数按当前筛选后的子图计算，相同度数时按原始顺序
+            induced = edge_mask & node_mask[self.src] & node_mask[self.dst]
+            degree = (np.bincount(self.src[induced], minlength=len(self))
+                      + np.bincount(self.dst[induced], minlength=len(self)))
+            candidates = np.flatnonzero(node_mask)
+            ranked = candidates[np.argsort(-degree[candidates], kind='stable')]
+            keep = ranked[:q.top]
+            if q.author is not None and center not in keep:
+                keep = np.append(keep[:-1], center)
+            node_mask = np.zeros(len(self), dtype=bool)
+            node_mask[keep] = True
+
+        induced = edge_mask & node_mask[self.src] & node_mask[self.dst]
+        nodes = take(self.nodes, np.flatnonzero(node_mask))
+        links = take(self.links, self.edge_ids[induced])
+
+        metadata = dict(self.network.get('metadata', {}))
+        metadata.update({
+            'query': q.to_dict(),
+            'subgraph_nodes': len(nodes),
+            'subgraph_links': len(links),
+        })
+        return {'nodes': nodes, 'links': links, 'metadata': metadata}
@@ -0,0 +1,83 @@
+# gunicorn.conf.py
+# 生产环境的启动配置：
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# 主进程导入 app 时预加载所有数据集和响应缓存（preload_app），再 fork 出 worker，
+# worker 之间以写时复制的方式共享这些只读的内存页。数据文件更新后，主进程
+# 重新加载数据并平滑重启 worker（等价于 kill -HUP <主进程>），新 worker 同样共享新数据。
+#
+# 环境变量：
+#   SCISCINET_BIND            监听地址，默认 0.0.0.0:5001
+#   SCISCINET_WORKERS         worker 进程数，默认 CPU 核数
+#   SCISCINET_THREADS         每个 worker 的线程数，默认 4
+#   SCISCINET_WATCH_INTERVAL  检查数据文件变化的间隔（秒），0 表示不检查，默认 5
+import gc
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+bind = os.environ.get('SCISCINET_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('SCISCINET_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('SCISCINET_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+# 平滑重启时旧 worker 处理完正在进行的请求的时限
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.environ.get('SCISCINET_ACCESS_LOG')
+
+WATCH_INTERVAL = float(os.environ.get('SCISCINET_WATCH_INTERVAL', 5))
+
+
+def freeze_shared_objects():
+    """把预加载的对象移出 GC 的追踪范围
+
+    worker 里的垃圾回收会改写对象头，使共享的内存页被复制；
+    gc.freeze() 之后这些对象不再被扫描，内存页保持共享。
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def watch_data_files(server, interval):
+    """主进程中的后台线程：数据文件变化且稳定一个周期后，向主进程发送 SIGHUP
+
+    线程只读取文件签名，不加载数据也不持有数据集的锁，
+    真正的重新加载在 on_reload 中由主进程完成。
+    """
+    from app import store
+
+    loaded = store.snapshot()
+    pending = None
+    while True:
+        time.sleep(interval)
+        current = store.snapshot()
+        if current == loaded:
+            pending = None
+        elif current == pending:
+            # 连续两次检查结果相同，说明重建脚本已经写完
+            server.log.info("Data files changed, reloading workers")
+            loaded = current
+            pending = None
+            os.kill(os.getpid(), signal.SIGHUP)
+        else:
+            pending = current
+
+
+def when_ready(server):
+    freeze_shared_objects()
+    if WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_data_files, args=(server, WATCH_INTERVAL),
+                         name='data-watcher', daemon=True).start()
+
+
+def on_reload(server):
+    """SIGHUP：在主进程中重新加载有变化的数据集，之后 fork 的新 worker 共享新数据"""
+    from app import warm_caches
+
+    gc.unfreeze()
+    warm_caches()
+    freeze_shared_objects()
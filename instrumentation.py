@@ -0,0 +1,234 @@
+# instrumentation.py
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+# 延迟直方图的桶上界（秒），与 Prometheus 客户端的默认桶一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """累计直方图：每个桶的计数、总和与总数"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def label_text(labels):
+    return ','.join(f'{key}="{escape(value)}"' for key, value in labels)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """进程内的请求指标
+
+    每个请求分为三个阶段：load（加载数据集、构建派生缓存）、serialize（jsonify
+    以及流式响应的编码输出），其余时间计为 compute（筛选、查询等）。
+    按路由记录请求延迟和各阶段耗时的直方图、状态码计数、响应字节数，
+    以及数据集/派生缓存的命中、未命中次数和加载耗时。所有更新在一把锁内完成，
+    每次只是几次字典查找和加法。gunicorn 的每个 worker 各有一份。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.phases = {}
+        self.requests = {}
+        self.bytes = {}
+        self.cache = {}
+        self.cache_seconds = {}
+
+    def observe_request(self, route, status, seconds, phases, size):
+        with self._lock:
+            histogram = self.latency.get(route)
+            if histogram is None:
+                histogram = self.latency[route] = Histogram()
+            histogram.observe(seconds)
+            for phase, value in phases.items():
+                histogram = self.phases.get((route, phase))
+                if histogram is None:
+                    histogram = self.phases[(route, phase)] = Histogram()
+                histogram.observe(value)
+            key = (route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes[route] = self.bytes.get(route, 0) + size
+
+    def observe_cache(self, kind, name, hit, seconds):
+        key = (kind, name, 'hit' if hit else 'miss')
+        with self._lock:
+            self.cache[key] = self.cache.get(key, 0) + 1
+            if not hit:
+                self.cache_seconds[(kind, name)] = self.cache_seconds.get((kind, name), 0.0) + seconds
+
+    def render(self):
+        """Prometheus 文本格式"""
+        with self._lock:
+            lines = []
+
+            def histogram(name, help_text, series):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for labels, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (float('inf'),), h.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{{{label_text(labels + (("le", le),))}}} {cumulative}')
+                    lines.append(f'{name}_sum{{{label_text(labels)}}} {h.sum!r}')
+                    lines.append(f'{name}_count{{{label_text(labels)}}} {h.count}')
+
+            def simple(name, kind, help_text, series):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{{{label_text(labels)}}} {value!r}')
+
+            histogram('sciscinet_request_duration_seconds', 'Request latency by route.',
+                      {(('route', route),): h for route, h in self.latency.items()})
+            histogram('sciscinet_request_phase_seconds', 'Time spent per request phase (load, compute, serialize).',
+                      {(('route', route), ('phase', phase)): h for (route, phase), h in self.phases.items()})
+            simple('sciscinet_requests_total', 'counter', 'Requests by route and status.',
+                   {(('route', route), ('status', status)): n for (route, status), n in self.requests.items()})
+            simple('sciscinet_response_bytes_total', 'counter', 'Response body bytes sent by route.',
+                   {(('route', route),): n for route, n in self.bytes.items()})
+            simple('sciscinet_cache_requests_total', 'counter', 'Dataset and derived cache lookups.',
+                   {(('cache', kind), ('name', name), ('result', result)): n
+                    for (kind, name, result), n in self.cache.items()})
+            simple('sciscinet_cache_load_seconds_total', 'counter', 'Time spent loading datasets and building derived caches.',
+                   {(('cache', kind), ('name', name)): s for (kind, name), s in self.cache_seconds.items()})
+
+            ratios = {}
+            for kind, name, _ in self.cache:
+                hits = self.cache.get((kind, name, 'hit'), 0)
+                misses = self.cache.get((kind, name, 'miss'), 0)
+                ratios[(('cache', kind), ('name', name))] = hits / (hits + misses)
+            simple('sciscinet_cache_hit_ratio', 'gauge', 'Cache hit ratio since the process started.', ratios)
+            return '\n'.join(lines) + '\n'
+
+
+def add_phase(phase, seconds):
+    """把耗时计入当前请求的某个阶段（不在请求中时忽略）"""
+    if has_request_context():
+        timings = g.get('_phase_timings')
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify 的序列化时间计入 serialize 阶段"""
+
+    def response(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().response(*args, **kwargs)
+        finally:
+            add_phase('serialize', time.perf_counter() - start)
+
+
+class TimedBody:
+    """包装流式响应体：统计编码输出的时间和字节数，响应结束时记录请求"""
+
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+        self.seconds = 0.0
+        self.size = 0
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start
+                return
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            self.seconds += time.perf_counter() - start
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        close = getattr(self.body, 'close', None)
+        if close is not None:
+            close()
+        self.finish(self.seconds, self.size)
+
+
+def install(app, store, server_timing=False):
+    """为 app 打开请求指标：注册请求钩子、缓存回调、计时的 JSON provider 和 /metrics
+
+    不调用时没有任何钩子，也就没有任何开销。server_timing 为 True 时
+    在响应中加入 Server-Timing 头（流式响应只包含发送响应头之前的阶段）。
+    """
+    registry = MetricsRegistry()
+
+    def observe_cache(kind, name, hit, seconds):
+        registry.observe_cache(kind, name, hit, seconds)
+        if not hit:
+            add_phase('load', seconds)
+
+    store.observer = observe_cache
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_timer():
+        g._request_start = time.perf_counter()
+        g._phase_timings = {}
+
+    @app.after_request
+    def record_request(response):
+        start = g.get('_request_start')
+        if start is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = response.status_code
+        elapsed = time.perf_counter() - start
+        timings = g._phase_timings
+        load = timings.get('load', 0.0)
+        serialize = timings.get('serialize', 0.0)
+        phases = {
+            'load': load,
+            'compute': max(elapsed - load - serialize, 0.0),
+            'serialize': serialize,
+        }
+
+        if server_timing:
+            response.headers['Server-Timing'] = ', '.join(
+                f'{phase};dur={value * 1e3:.2f}' for phase, value in phases.items()
+            ) + f', total;dur={elapsed * 1e3:.2f}'
+
+        if response.is_streamed:
+            # 流式响应的编码发生在视图返回之后，响应体发送完时再记录
+            def finish(seconds, size):
+                phases['serialize'] += seconds
+                registry.observe_request(route, status, elapsed + seconds, phases, size)
+
+            response.response = TimedBody(response.response, finish)
+        else:
+            registry.observe_request(route, status, elapsed, phases, response.content_length or 0)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus 格式的请求指标"""
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return registry
@@ -0,0 +1,172 @@
+# level_index.py
+import numpy as np
+import pandas as pd
+
+from response_cache import EncodedPayload
+
+
+class LevelQuery:
+    """多分辨率作者网络的查询参数
+
+    level: 层号，1 为最细的社区层，缺省为最粗的一层
+    expand: 该层的一个超级节点 id，返回时把它展开成下一层的子节点
+    """
+
+    def __init__(self, level=None, expand=None):
+        self.level = level
+        self.expand = expand
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+        level = args.get('level')
+        if level is not None and level != '':
+            try:
+                level = int(level)
+            except ValueError:
+                raise ValueError("'level' must be an integer")
+        else:
+            level = None
+        return cls(level=level, expand=args.get('expand') or None)
+
+
+class LevelGraph:
+    """一层的图：节点下标、CSR 邻接表以及每个节点在上一层的父节点"""
+
+    def __init__(self, nodes, links):
+        self.nodes = nodes
+        self.ids = pd.Index([str(node['id']) for node in nodes])
+        src = self.ids.get_indexer([str(link['source']) for link in links])
+        dst = self.ids.get_indexer([str(link['target']) for link in links])
+        weights = np.asarray([float(link.get('weight', 1)) for link in links], dtype=float)
+        known = (src >= 0) & (dst >= 0)
+        self.links = links
+        self.link_src, self.link_dst = src, dst
+
+        # 无向 CSR：每条边在两个端点下各出现一次，自环只出现一次
+        src, dst, weights = src[known], dst[known], weights[known]
+        loops = src == dst
+        rows = np.concatenate([src, dst[~loops]])
+        cols = np.concatenate([dst, src[~loops]])
+        data = np.concatenate([weights, weights[~loops]])
+        order = np.argsort(rows, kind='stable')
+        self.neighbors, self.weights = cols[order], data[order]
+        self.indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(nodes)), out=self.indptr[1:])
+
+        self.parent = np.full(len(nodes), -1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def edges_of(self, rows):
+        """rows 中各节点的 (节点, 邻居, 权重)"""
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return np.repeat(rows, counts), self.neighbors[slots], self.weights[slots]
+
+
+def link_weight(weight):
+    return int(weight) if weight == round(weight) else round(float(weight), 4)
+
+
+class LevelIndex:
+    """作者网络的多分辨率索引
+
+    第 0 层是原始网络，第 1..K 层来自 scripts/network_levels.py 生成的
+    author_network_levels.json。整层的响应体预先编码；展开一个超级节点时
+    只读取它的子节点在下一层的边，并把指向其他超级节点的边按父节点合并。
+    """
+
+    def __init__(self, network, levels):
+        self.graphs = [LevelGraph(network['nodes'], network['links'])]
+        self.children = [None]
+        for level in levels['levels']:
+            below = self.graphs[-1]
+            graph = LevelGraph(level['nodes'], level['links'])
+            children = []
+            for i, ids in enumerate(level['children']):
+                rows = below.ids.get_indexer([str(child) for child in ids])
+                rows = rows[rows >= 0]
+                below.parent[rows] = i
+                children.append(rows)
+            self.graphs.append(graph)
+            self.children.append(children)
+
+        metadata = dict(levels.get('metadata', {}))
+        # 层级文件由旧版本的网络生成时仍然可用，但标记为过期
+        metadata['stale'] = (metadata.get('source_nodes') != len(network['nodes'])
+                             or metadata.get('source_links') != len(network['links']))
+        self.metadata = metadata
+        self._payloads = {}
+
+    @property
+    def depth(self):
+        return len(self.graphs) - 1
+
+    def resolve_level(self, level):
+        if self.depth == 0:
+            raise ValueError('The author network has no coarsened levels')
+        if level is None:
+            return self.depth
+        if not 1 <= level <= self.depth:
+            raise ValueError(f"'level' must be between 1 and {self.depth}")
+        return level
+
+    def level(self, level):
+        """整层的图"""
+        graph = self.graphs[level]
+        return {
+            'level': level,
+            'levels': self.depth,
+            'expanded': None,
+            'nodes': graph.nodes,
+            'links': graph.links,
+            'metadata': self.metadata,
+        }
+
+    def payload(self, level):
+        """整层的预编码响应体"""
+        payload = self._payloads.get(level)
+        if payload is None:
+            payload = EncodedPayload.from_json(self.level(level))
+            self._payloads[level] = payload
+        return payload
+
+    def expand(self, level, supernode):
+        """把第 level 层的一个超级节点展开成第 level-1 层的子节点，不存在时抛出 KeyError"""
+        graph, below = self.graphs[level], self.graphs[level - 1]
+        position = graph.ids.get_indexer([str(supernode)])[0]
+        if position < 0:
+            raise KeyError(supernode)
+        rows = self.children[level][position]
+
+        # 其他超级节点以及与被展开节点无关的边保持不变
+        nodes = [node for i, node in enumerate(graph.nodes) if i != position]
+        keep = (graph.link_src != position) & (graph.link_dst != position)
+        links = [graph.links[i] for i in np.flatnonzero(keep)]
+        nodes += [dict(below.nodes[i], parent=str(supernode)) for i in rows]
+
+        # 子节点之间的边（包括自环）保留原样，指向其他超级节点的边按父节点合并
+        source, neighbor, weight = below.edges_of(rows)
+        inside = below.parent[neighbor] == position
+        internal = inside & (source <= neighbor)
+        links += [
+            {'source': below.ids[s], 'target': below.ids[t], 'weight': link_weight(w)}
+            for s, t, w in zip(source[internal], neighbor[internal], weight[internal])
+        ]
+        outside = ~inside & (below.parent[neighbor] >= 0)
+        merged = pd.DataFrame({
+            'source': source[outside],
+            'target': below.parent[neighbor[outside]],
+            'weight': weight[outside],
+        }).groupby(['source', 'target'], sort=True)['weight'].sum()
+        links += [
+            {'source': below.ids[s], 'target': graph.ids[t], 'weight': link_weight(w)}
+            for (s, t), w in merged.items()
+        ]
+
+        result = self.level(level)
+        result.update({'expanded': str(supernode), 'nodes': nodes, 'links': links})
+        return result
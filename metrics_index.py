@@ -0,0 +1,108 @@
+# metrics_index.py
+import numpy as np
+
+from scripts.network_metrics import attach_metrics
+
+# 可以排序的节点指标
+SORT_METRICS = ('pagerank', 'betweenness', 'degree', 'strength')
+
+DEFAULT_TOP = 20
+MAX_TOP = 1000
+
+
+class MetricsQuery:
+    """节点指标的 top-k 查询参数
+
+    sort: 排序指标（降序），缺省为 pagerank
+    top: 返回的节点数
+    community: 只返回该社区的节点
+    """
+
+    def __init__(self, sort='pagerank', top=DEFAULT_TOP, community=None):
+        self.sort = sort
+        self.top = top
+        self.community = community
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+
+        def parse_int(key):
+            value = args.get(key)
+            if value is None or value == '':
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be an integer")
+
+        sort = args.get('sort') or 'pagerank'
+        if sort not in SORT_METRICS:
+            raise ValueError(f"'sort' must be one of: {', '.join(SORT_METRICS)}")
+
+        top = parse_int('top')
+        if top is None:
+            top = DEFAULT_TOP
+        if top < 1:
+            raise ValueError("'top' must be positive")
+
+        return cls(sort=sort, top=min(top, MAX_TOP), community=parse_int('community'))
+
+    def to_dict(self):
+        return {'sort': self.sort, 'top': self.top, 'community': self.community}
+
+
+class MetricsIndex:
+    """按各指标预排序的节点索引
+
+    节点指标由 scripts/network_metrics.py 离线写入网络 JSON；
+    旧的网络文件没有指标时，在这里计算一次（不修改共享的网络对象）。
+    每个指标保存降序的节点下标，以及按 (社区, 排名) 排序的下标，
+    top-k 查询只需切片。
+    """
+
+    def __init__(self, network, directed=False):
+        if network['nodes'] and 'pagerank' not in network['nodes'][0]:
+            # attach_metrics 会写节点属性和 metadata['metrics']，两者都复制一份
+            network = dict(network, nodes=[dict(node) for node in network['nodes']],
+                           metadata=dict(network.get('metadata') or {}))
+            attach_metrics(network, directed)
+        self.nodes = network['nodes']
+        self.summary = network.get('metadata', {}).get('metrics', {})
+
+        self.community = np.asarray([node['community'] for node in self.nodes], dtype=np.int64)
+        self.orders = {}
+        self.community_orders = {}
+        for metric in SORT_METRICS:
+            values = np.asarray([node[metric] for node in self.nodes], dtype=float)
+            order = np.argsort(-values, kind='stable')
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self.orders[metric] = order
+            self.community_orders[metric] = np.lexsort((rank, self.community))
+
+        # 社区 c 的节点在 community_orders[metric] 中的区间
+        sorted_communities = np.sort(self.community)
+        self.community_ids = np.unique(sorted_communities)
+        self.community_starts = np.searchsorted(sorted_communities, self.community_ids, 'left')
+        self.community_ends = np.searchsorted(sorted_communities, self.community_ids, 'right')
+
+    def query(self, q):
+        """执行 top-k 查询，返回 {'nodes', 'total', 'query', 'metrics'}"""
+        if q.community is None:
+            rows = self.orders[q.sort][:q.top]
+            total = len(self.nodes)
+        else:
+            i = np.searchsorted(self.community_ids, q.community)
+            if i == len(self.community_ids) or self.community_ids[i] != q.community:
+                raise KeyError(q.community)
+            start, end = self.community_starts[i], self.community_ends[i]
+            rows = self.community_orders[q.sort][start:min(end, start + q.top)]
+            total = int(end - start)
+
+        return {
+            'query': q.to_dict(),
+            'total': total,
+            'nodes': [self.nodes[i] for i in rows],
+            'metrics': self.summary,
+        }
@@ -0,0 +1,92 @@
+# response_cache.py
+import gzip
+import hashlib
+import json
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli 是可选依赖，没有时只提供 gzip
+    brotli = None
+
+# 按优先级排列的压缩编码
+ENCODINGS = ('br', 'gzip')
+
+# 网络的紧凑二进制表示（格式见 scripts/network_io.py），用 Accept 头协商；
+# 请求 application/octet-stream 时也返回这种格式
+NETWORK_BINARY_MIMETYPE = 'application/vnd.sciscinet.network'
+BINARY_MIMETYPES = (NETWORK_BINARY_MIMETYPE, 'application/octet-stream')
+
+# brotli 11 级比 9 级只小约 10%，但慢 40 倍左右，数据重建后第一次请求会明显卡顿
+BROTLI_QUALITY = 9
+
+
+def wants_binary(request):
+    """Accept 中二进制网络格式（或 application/octet-stream）的优先级高于 application/json 时返回二进制"""
+    accept = request.accept_mimetypes
+    return max(accept[mimetype] for mimetype in BINARY_MIMETYPES) > accept['application/json']
+
+
+class EncodedPayload:
+    """预先序列化并压缩好的响应体
+
+    同一份数据只做一次 JSON 序列化和压缩，之后每个请求直接返回字节。
+    每种编码各自带一个强 ETag。
+    """
+
+    def __init__(self, body, mimetype='application/json'):
+        self.mimetype = mimetype
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body}
+        self.etags = {'identity': f'"{digest}"'}
+
+        # mtime=0 保证同样的数据压缩结果一致
+        self.bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etags['gzip'] = f'"{digest}-gzip"'
+
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+            self.etags['br'] = f'"{digest}-br"'
+
+    @classmethod
+    def from_json(cls, data):
+        """把 JSON 数据编码成紧凑格式（无缩进、无多余空格）"""
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return cls(body)
+
+    def choose_encoding(self, request):
+        """根据 Accept-Encoding 选择压缩格式"""
+        best, best_quality = 'identity', 0
+        for encoding in ENCODINGS:
+            if encoding not in self.bodies:
+                continue
+            quality = request.accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def not_modified(self, request):
+        """If-None-Match 命中任意一种编码的 ETag 即可返回 304"""
+        if_none_match = request.if_none_match
+        if not if_none_match:
+            return False
+        if if_none_match.star_tag:
+            return True
+        return any(if_none_match.contains_weak(etag.strip('"')) for etag in self.etags.values())
+
+    def to_response(self, request, vary='Accept-Encoding'):
+        """vary：同一 URL 还按其他请求头（如 Accept）返回不同表示时，需要一并列出"""
+        encoding = self.choose_encoding(request)
+        headers = {
+            'ETag': self.etags[encoding],
+            'Vary': vary,
+            'Cache-Control': 'no-cache',
+        }
+
+        if self.not_modified(request):
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(self.bodies[encoding], mimetype=self.mimetype, headers=headers)
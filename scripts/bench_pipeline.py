@@ -0,0 +1,361 @@
+# bench_pipeline.py
+# 整条流水线的性能测试：按给定的论文数生成与 OpenAlex works 结构相同的合成数据，
+# 依次测量 process_papers_data、两个网络构建脚本以及每个 API 接口的耗时和峰值内存，
+# 输出 JSON 报告，便于在不同提交之间对比。
+#
+#   python bench_pipeline.py                                   # 10k、100k 篇论文
+#   python bench_pipeline.py --sizes 10000,100000,1000000 --output report.json
+#   python bench_pipeline.py --compare report.json             # 与之前的报告对比
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+import build_author_network as author_builder
+import build_citation_network as citation_builder
+import download_data
+from openalex_client import iter_ndjson
+from table_io import read_table, write_table
+
+# 仓库根目录（app.py 所在目录）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = '10000,100000'
+
+# 合成数据的分布参数
+FIRST_YEAR, LAST_YEAR = 2015, 2025
+CS_FRACTION = 0.8                 # 带 Computer Science 主题的论文比例
+AUTHORS_PER_PAPER_P = 0.22        # 作者数 ~ 几何分布，均值约 4.5
+HYPER_AUTHOR_FRACTION = 0.001     # 50~500 位作者的大合作论文比例
+AUTHOR_POOL_RATIO = 1.2           # 作者总数 / 论文数
+AUTHOR_PRODUCTIVITY_SIGMA = 1.2   # 作者发文量的对数正态分布参数
+MEAN_REFERENCES = 30              # 参考文献数 ~ 负二项分布
+INTERNAL_REFERENCE_FRACTION = 0.15  # 引用数据集内更早论文的比例
+EXTERNAL_POOL_RATIO = 5           # 外部被引论文池 / 论文数
+
+# 每个接口请求的次数（取中位数和 p95）
+ROUTE_REPEAT = 5
+ROUTES = [
+    '/api/author-network',
+    '/api/author-network?top=100',
+    '/api/author-network/metrics',
+    '/api/citation-network',
+    '/api/papers',
+    '/api/papers?limit=50&sort=CitationCount&order=desc',
+    '/api/papers?year_from=2022&year_to=2023&limit=100',
+    '/api/authors',
+    '/api/authors?prefix=author%201&limit=50',
+    '/api/stats',
+    '/api/timeline',
+    '/api/timeline?from=2015&to=2025&group_by=field',
+    '/api/timeline/2022',
+    '/api/patent-distribution',
+]
+
+
+def generate_works(n_papers, path, seed=0):
+    """生成 n_papers 篇合成论文，写成 NDJSON（每行一篇，字段与 OpenAlex works 相同）"""
+    rng = np.random.default_rng(seed)
+    n_authors = max(1, int(n_papers * AUTHOR_POOL_RATIO))
+    productivity = rng.lognormal(0, AUTHOR_PRODUCTIVITY_SIGMA, n_authors)
+    productivity /= productivity.sum()
+
+    years = rng.integers(FIRST_YEAR, LAST_YEAR + 1, n_papers)
+    citations = rng.negative_binomial(1, 0.08, n_papers)
+    cs = rng.random(n_papers) < CS_FRACTION
+
+    author_counts = rng.geometric(AUTHORS_PER_PAPER_P, n_papers)
+    hyper = rng.random(n_papers) < HYPER_AUTHOR_FRACTION
+    author_counts[hyper] = rng.integers(50, 500, hyper.sum())
+    author_ids = rng.choice(n_authors, size=author_counts.sum(), p=productivity)
+    author_starts = np.r_[0, np.cumsum(author_counts)]
+
+    ref_counts = rng.negative_binomial(2, 2 / (2 + MEAN_REFERENCES), n_papers)
+    ref_starts = np.r_[0, np.cumsum(ref_counts)]
+    internal = rng.random(ref_counts.sum()) < INTERNAL_REFERENCE_FRACTION
+    citing = np.repeat(np.arange(n_papers), ref_counts)
+    # 数据集内的引用只指向编号更小（更早生成）的论文
+    internal &= citing > 0
+    targets = np.where(
+        internal,
+        (rng.random(len(citing)) * np.maximum(citing, 1)).astype(np.int64),
+        n_papers + rng.integers(0, n_papers * EXTERNAL_POOL_RATIO, len(citing)),
+    )
+
+    with open(path, 'w') as f:
+        for i in range(n_papers):
+            authors = np.unique(author_ids[author_starts[i]:author_starts[i + 1]]).tolist()
+            last = len(authors) - 1
+            work = {
+                'id': f'https://openalex.org/W{i}',
+                'title': f'Synthetic paper {i}',
+                'publication_year': int(years[i]),
+                'cited_by_count': int(citations[i]),
+                'authorships': [
+                    {
+                        'author_position': 'first' if k == 0 else 'last' if k == last else 'middle',
+                        'author': {'id': f'https://openalex.org/A{a}', 'display_name': f'Author {a}'},
+                    }
+                    for k, a in enumerate(authors)
+                ],
+                'referenced_works': [
+                    f'https://openalex.org/W{t}' for t in targets[ref_starts[i]:ref_starts[i + 1]].tolist()
+                ],
+                'topics': [{'display_name': 'Computer Science' if cs[i] else 'Biology'}],
+            }
+            f.write(json.dumps(work) + '\n')
+    return {'papers': n_papers, 'authors': n_authors, 'authorships': int(author_counts.sum()),
+            'references': int(ref_counts.sum()), 'internal_references': int(internal.sum()),
+            'ndjson_mb': round(os.path.getsize(path) / 1e6, 1)}
+
+
+def resident_bytes():
+    """当前进程的常驻内存（Linux 读取 /proc/self/statm，其他平台返回 None）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class PeakMemory:
+    """后台线程每隔几毫秒采样常驻内存，记录相对于开始时的峰值增量"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = resident_bytes()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, resident_bytes())
+
+    def __enter__(self):
+        if self.baseline is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.baseline is not None:
+            self._thread.join()
+            self.peak = max(self.peak, resident_bytes())
+
+    @property
+    def megabytes(self):
+        if self.baseline is None:
+            return None
+        return round((self.peak - self.baseline) / 1e6, 1)
+
+
+def _child(conn, func, args):
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = func(*args)
+    except Exception as e:
+        result = {'error': repr(e)}
+    conn.send(result)
+    conn.close()
+
+
+def in_subprocess(func, *args):
+    """在 fork 出的子进程中运行 func，互不影响各阶段的内存峰值和缓存"""
+    ctx = multiprocessing.get_context('fork')
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(sender, func, args))
+    process.start()
+    # 关闭父进程这一端，子进程异常退出（如内存不足被杀）时 recv 才会返回 EOFError
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None:
+        result = {'error': f'process exited with code {process.exitcode}'}
+    return result
+
+
+def stage_process_papers(ndjson_path, data_dir):
+    """process_papers_data（计时部分），之后把四张表写入 data_dir"""
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        frames = download_data.process_papers_data(iter_ndjson(ndjson_path), {}, {})
+        seconds = time.perf_counter() - start
+    for df, name in zip(frames, ['papers', 'authors', 'paper_author_affiliations', 'paper_references']):
+        write_table(df, name, data_dir)
+    return {'seconds': round(seconds, 3), 'peak_rss_mb': memory.megabytes,
+            'rows': {name: len(df) for name, df in zip(['papers', 'authors', 'paper_authors', 'references'], frames)}}
+
+
+def stage_author_network(data_dir):
+    papers = read_table('papers', data_dir)
+    authors = read_table('authors', data_dir)
+    paper_authors = read_table('paper_author_affiliations', data_dir)
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        network = author_builder.build_network(author_builder.filter_papers(papers), authors, paper_authors)
+        seconds = time.perf_counter() - start
+    author_builder.save_network(network, data_dir)
+    return {'seconds': round(seconds, 3), 'peak_rss_mb': memory.megabytes,
+            'nodes': len(network['nodes']), 'links': len(network['links'])}
+
+
+def stage_citation_network(data_dir):
+    papers = read_table('papers', data_dir)
+    references = read_table('paper_references', data_dir)
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        network = citation_builder.build_network(author_builder.filter_papers(papers), references)
+        seconds = time.perf_counter() - start
+    citation_builder.save_network(network, data_dir)
+    return {'seconds': round(seconds, 3), 'peak_rss_mb': memory.megabytes,
+            'nodes': len(network['nodes']), 'links': len(network['links'])}
+
+
+def stage_routes(data_dir, repeat=ROUTE_REPEAT):
+    """启动 API（预加载和构建缓存），再用 Flask 测试客户端请求每个接口"""
+    os.environ['SCISCINET_DATA_DIR'] = data_dir
+    os.environ['SCISCINET_METRICS'] = '0'
+    sys.path.insert(0, ROOT)
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        from app import app
+        startup = {'seconds': round(time.perf_counter() - start, 3)}
+    startup['peak_rss_mb'] = memory.megabytes
+
+    client = app.test_client()
+    routes = {}
+    for path in ROUTES:
+        timings = []
+        with PeakMemory() as memory:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.get(path)
+                body = response.get_data()
+                timings.append(time.perf_counter() - start)
+        routes[path] = {
+            'status': response.status_code,
+            'median_ms': round(float(np.median(timings)) * 1e3, 2),
+            'p95_ms': round(float(np.percentile(timings, 95)) * 1e3, 2),
+            'bytes': len(body),
+            'peak_rss_mb': memory.megabytes,
+        }
+    return {'startup': startup, 'routes': routes}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(n_papers, seed):
+    with tempfile.TemporaryDirectory() as data_dir:
+        ndjson_path = os.path.join(data_dir, 'works.ndjson')
+        start = time.perf_counter()
+        dataset = generate_works(n_papers, ndjson_path, seed)
+        dataset['generate_seconds'] = round(time.perf_counter() - start, 2)
+        print(f"  dataset: {dataset}")
+
+        stages = {}
+        for name, func, args in [
+            ('process_papers_data', stage_process_papers, (ndjson_path, data_dir)),
+            ('build_author_network', stage_author_network, (data_dir,)),
+            ('build_citation_network', stage_citation_network, (data_dir,)),
+        ]:
+            stages[name] = in_subprocess(func, *args)
+            print(f"  {name:<24} {format_stage(stages[name])}")
+
+        api = in_subprocess(stage_routes, data_dir)
+        if 'error' in api:
+            print(f"  API: {api['error']}")
+        else:
+            print(f"  {'api startup':<24} {format_stage(api['startup'])}")
+            for path, result in api['routes'].items():
+                print(f"    {path:<52} {result['status']} {result['median_ms']:>9.2f} ms "
+                      f"{result['bytes'] / 1e6:>8.2f} MB  +{result['peak_rss_mb']} MB rss")
+        return {'dataset': dataset, 'stages': stages, 'api': api}
+
+
+def format_stage(result):
+    if 'error' in result:
+        return f"error: {result['error']}"
+    return f"{result['seconds']:>9.3f} s  +{result['peak_rss_mb']} MB rss"
+
+
+def flatten(report):
+    """报告 -> {(论文数, 指标名): 秒}，用于对比"""
+    values = {}
+    for size, result in report['results'].items():
+        for name, stage in result['stages'].items():
+            if 'seconds' in stage:
+                values[(size, name)] = stage['seconds']
+        api = result.get('api', {})
+        if 'startup' in api:
+            values[(size, 'api startup')] = api['startup']['seconds']
+        for path, route in api.get('routes', {}).items():
+            values[(size, path)] = route['median_ms'] / 1e3
+    return values
+
+
+def compare(previous, current):
+    print(f"\nComparison with {previous.get('git_revision')} (time ratio, < 1 is faster):")
+    old, new = flatten(previous), flatten(current)
+    for key in sorted(set(old) & set(new), key=lambda k: (int(k[0]), k[1])):
+        ratio = new[key] / old[key] if old[key] > 0 else float('nan')
+        print(f"  {key[0]:>8} {key[1]:<52} {old[key]:>9.4f} -> {new[key]:>9.4f} s  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline and API on synthetic datasets')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated paper counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_report.json')
+    parser.add_argument('--compare', default=None, help='previous JSON report to compare against')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    print("=" * 70)
+    print(f"Benchmark: pipeline and API on synthetic data ({', '.join(map(str, sizes))} papers)")
+    print("=" * 70)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'results': {},
+    }
+    for n_papers in sizes:
+        print(f"\n[{n_papers} papers]")
+        report['results'][str(n_papers)] = run_size(n_papers, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
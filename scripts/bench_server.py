@@ -0,0 +1,136 @@
+# bench_server.py
+# API 服务的压力测试：对比 app.py 使用的 Werkzeug 开发服务器和 gunicorn 生产配置
+# 在同一个接口上的吞吐量（请求/秒）和延迟。
+#
+#   python bench_server.py
+#   python bench_server.py --path "/api/papers?limit=50" --concurrency 32 --workers 8
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# 仓库根目录（app.py 和 gunicorn.conf.py 所在目录）
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOST = '127.0.0.1'
+DEV_PORT = 5101
+GUNICORN_PORT = 5102
+
+
+def dev_server_command(port):
+    """与 app.py 相同的开发服务器（debug 模式），关闭自动重载以便测试结束时停止"""
+    return [sys.executable, '-c',
+            f"from app import app; app.run(debug=True, host='{HOST}', port={port}, use_reloader=False)"]
+
+
+def gunicorn_command(port):
+    return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'{HOST}:{port}', 'app:app']
+
+
+def start_server(command, port, env, timeout=120):
+    """在新的进程组中启动服务器，等待 /health 可用"""
+    process = subprocess.Popen(command, cwd=ROOT, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(HOST, port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def client(port, path, headers, duration):
+    """单个客户端：保持连接，在 duration 秒内连续请求，返回每个请求的延迟"""
+    latencies, errors = [], 0
+    conn = http.client.HTTPConnection(HOST, port, timeout=30)
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, port, timeout=30)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, port, timeout=30)
+    conn.close()
+    return latencies, errors
+
+
+def load_test(port, path, headers, concurrency, duration):
+    """concurrency 个客户端进程同时请求，返回 (请求/秒, p50 ms, p99 ms, 错误数)"""
+    with multiprocessing.Pool(concurrency) as pool:
+        results = pool.starmap(client, [(port, path, headers, duration)] * concurrency)
+    latencies = np.concatenate([np.asarray(r[0]) for r in results]) if results else np.array([])
+    errors = sum(r[1] for r in results)
+    if len(latencies) == 0:
+        return 0.0, float('nan'), float('nan'), errors
+    return (len(latencies) / duration,
+            np.percentile(latencies, 50) * 1e3,
+            np.percentile(latencies, 99) * 1e3,
+            errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the dev server vs. gunicorn')
+    parser.add_argument('--path', default='/api/author-network')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per server')
+    parser.add_argument('--workers', type=int, default=None, help='gunicorn workers (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=None, help='threads per gunicorn worker')
+    parser.add_argument('--encoding', default='gzip', help="Accept-Encoding sent by the clients ('' for none)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, SCISCINET_WATCH_INTERVAL='0')
+    if args.workers:
+        env['SCISCINET_WORKERS'] = str(args.workers)
+    if args.threads:
+        env['SCISCINET_THREADS'] = str(args.threads)
+    headers = {'Accept-Encoding': args.encoding} if args.encoding else {}
+
+    print("=" * 70)
+    print(f"Benchmark: GET {args.path} ({args.concurrency} clients, {args.duration:.0f}s each)")
+    print("=" * 70)
+    print(f"\n{'server':<24} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    servers = [
+        ('werkzeug (app.py)', dev_server_command(DEV_PORT), DEV_PORT),
+        ('gunicorn', gunicorn_command(GUNICORN_PORT), GUNICORN_PORT),
+    ]
+    for label, command, port in servers:
+        process = start_server(command, port, env)
+        try:
+            # 预热：每个 worker 的第一个请求不计入结果
+            load_test(port, args.path, headers, args.concurrency, 1)
+            rate, p50, p99, errors = load_test(port, args.path, headers, args.concurrency, args.duration)
+        finally:
+            stop_server(process)
+        print(f"{label:<24} {rate:>9.1f} {p50:>8.2f} {p99:>8.2f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
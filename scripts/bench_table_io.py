@@ -0,0 +1,78 @@
+# bench_table_io.py
+# 处理后表格的加载时间：CSV vs Arrow IPC（内存映射），全部列 vs 列投影
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import table_io
+from table_io import TABLE_DTYPES, csv_path, read_table, write_arrow
+
+# 每张表做列投影测试时读取的列（与构建脚本实际用到的列一致）
+PROJECTIONS = {
+    'papers': ['PaperId', 'Year', 'FieldsOfStudy'],
+    'authors': ['AuthorId', 'DisplayName'],
+    'paper_author_affiliations': ['PaperId', 'AuthorId'],
+    'paper_references': ['PaperId', 'PaperReferenceId'],
+}
+
+
+def best_of(func, repeat):
+    """多次运行取最快的一次，减少缓存和调度的干扰"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV vs Arrow IPC table loading')
+    parser.add_argument('--data-dir', default=table_io.DATA_DIR)
+    parser.add_argument('--scale', type=int, default=1,
+                        help='repeat every table this many times to simulate a larger dataset')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if table_io.pa is None:
+        print("❌ pyarrow is not installed: pip install pyarrow")
+        exit(1)
+
+    print("=" * 70)
+    print(f"Benchmark: table loading (scale x{args.scale}, best of {args.repeat})")
+    print("=" * 70)
+    print(f"\n{'table':<28} {'rows':>9} {'csv MB':>7} {'arrow MB':>8} "
+          f"{'csv ms':>8} {'csv proj':>8} {'arrow ms':>8} {'arrow proj':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in TABLE_DTYPES:
+            source = csv_path(name, args.data_dir)
+            if not os.path.exists(source):
+                continue
+
+            df = pd.read_csv(source)
+            if args.scale > 1:
+                df = pd.concat([df] * args.scale, ignore_index=True)
+            df.to_csv(csv_path(name, tmp_dir), index=False)
+            write_arrow(df, name, tmp_dir)
+
+            csv_file = csv_path(name, tmp_dir)
+            arrow_file = table_io.arrow_path(name, tmp_dir)
+            columns = PROJECTIONS[name]
+
+            csv_full = best_of(lambda: pd.read_csv(csv_file), args.repeat)
+            csv_proj = best_of(lambda: pd.read_csv(csv_file, usecols=columns), args.repeat)
+            arrow_full = best_of(lambda: read_table(name, tmp_dir), args.repeat)
+            arrow_proj = best_of(lambda: read_table(name, tmp_dir, columns=columns), args.repeat)
+
+            print(f"{name:<28} {len(df):>9} "
+                  f"{os.path.getsize(csv_file) / 1e6:>7.2f} {os.path.getsize(arrow_file) / 1e6:>8.2f} "
+                  f"{csv_full * 1e3:>8.1f} {csv_proj * 1e3:>8.1f} "
+                  f"{arrow_full * 1e3:>8.1f} {arrow_proj * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,170 +1,346 @@
 # build_author_network.py - Final Fixed Version
+import argparse
 import pandas as pd
-import json
+import numpy as np
 from collections import defaultdict
 import os
 
-print("=" * 70)
-print("Building Author Collaboration Network")
-print("=" * 70)
+import network_io
+from paper_ids import load_paper_id_map, read_indexed_table
+from table_io import read_table
+
+try:
+    from scipy import sparse
+except ImportError:  # 没有 scipy 时只能使用 loop 引擎
+    sparse = None
 
 # 数据路径 - 从 scripts 目录运行时，数据在 ./data/processed/
 DATA_DIR = 'data/processed'
 OUTPUT_DIR = 'data/processed'
 
-print(f"\nCurrent directory: {os.getcwd()}")
-print(f"Looking for data in: {DATA_DIR}")
-
-# 检查文件是否存在
-if not os.path.exists(f"{DATA_DIR}/papers.csv"):
-    print(f"\n❌ Error: Cannot find {DATA_DIR}/papers.csv")
-    print("\nPlease run this script from the scripts directory:")
-    print("  cd scripts")
-    print("  python build_author_network.py")
-    exit(1)
 
-print(f"\n[Step 1] Loading data from {DATA_DIR}...")
+def load_data(data_dir=DATA_DIR):
+    """加载论文、作者和论文-作者关系表（只读取需要的列，论文用整数 PaperIdx）"""
+    paper_id_map = load_paper_id_map(os.path.join(data_dir, 'paper_id_map.csv'))
 
-try:
-    # 加载数据
-    papers_df = pd.read_csv(f"{DATA_DIR}/papers.csv")
+    papers_df = read_indexed_table('papers', data_dir, ['PaperIdx', 'Year', 'FieldsOfStudy'], paper_id_map)
     print(f"  ✓ Loaded {len(papers_df)} papers")
-    
-    authors_df = pd.read_csv(f"{DATA_DIR}/authors.csv")
+
+    authors_df = read_table('authors', data_dir, columns=['AuthorId', 'DisplayName'])
     print(f"  ✓ Loaded {len(authors_df)} authors")
-    
-    paper_authors_df = pd.read_csv(f"{DATA_DIR}/paper_author_affiliations.csv")
+
+    paper_authors_df = read_indexed_table('paper_author_affiliations', data_dir, ['PaperIdx', 'AuthorId'], paper_id_map)
     print(f"  ✓ Loaded {len(paper_authors_df)} paper-author relationships")
-    
-except Exception as e:
-    print(f"❌ Error loading data: {e}")
-    exit(1)
 
-print(f"\n[Step 2] Filtering data...")
+    return papers_df, authors_df, paper_authors_df
 
-# 筛选 2020-2025 年的论文
-papers_df = papers_df[(papers_df['Year'] >= 2020) & (papers_df['Year'] <= 2025)]
-print(f"  Papers 2020-2025: {len(papers_df)}")
 
-# 筛选 Computer Science 论文
-if 'FieldsOfStudy' in papers_df.columns:
-    cs_papers = papers_df[
-        papers_df['FieldsOfStudy'].str.contains('Computer Science', case=False, na=False)
-    ]
-    print(f"  Computer Science papers: {len(cs_papers)}")
-    
-    if len(cs_papers) < 50:
-        print(f"  Warning: Only {len(cs_papers)} CS papers found, using all papers instead")
+def filter_papers(papers_df):
+    """筛选 2020-2025 年的 Computer Science 论文"""
+    papers_df = papers_df[(papers_df['Year'] >= 2020) & (papers_df['Year'] <= 2025)]
+    print(f"  Papers 2020-2025: {len(papers_df)}")
+
+    # 筛选 Computer Science 论文
+    if 'FieldsOfStudy' in papers_df.columns:
+        cs_papers = papers_df[
+            papers_df['FieldsOfStudy'].str.contains('Computer Science', case=False, na=False)
+        ]
+        print(f"  Computer Science papers: {len(cs_papers)}")
+
+        if len(cs_papers) < 50:
+            print(f"  Warning: Only {len(cs_papers)} CS papers found, using all papers instead")
+            cs_papers = papers_df
+    else:
+        print("  No FieldsOfStudy column, using all papers")
         cs_papers = papers_df
-else:
-    print("  No FieldsOfStudy column, using all papers")
-    cs_papers = papers_df
-
-print(f"\n[Step 3] Building author collaboration network...")
-
-# 获取这些论文的所有作者关系
-paper_ids = cs_papers['PaperId'].unique()
-relevant_paper_authors = paper_authors_df[
-    paper_authors_df['PaperId'].isin(paper_ids)
-]
-
-print(f"  Relevant paper-author relationships: {len(relevant_paper_authors)}")
-
-# 按论文分组，找出合作关系
-paper_groups = relevant_paper_authors.groupby('PaperId')['AuthorId'].apply(list)
-
-# 构建边（合作关系）
-edges = defaultdict(int)
-for paper_id, authors in paper_groups.items():
-    if len(authors) < 2:
-        continue
-    
-    # 为每对作者创建一条边
-    for i in range(len(authors)):
-        for j in range(i + 1, len(authors)):
-            edge = tuple(sorted([authors[i], authors[j]]))
-            edges[edge] += 1  # 权重为合作次数
-
-print(f"  Total collaborations: {len(edges)}")
-
-# 构建节点
-print(f"\n[Step 4] Creating network structure...")
-
-author_ids = set()
-for edge in edges:
-    author_ids.update(edge)
-
-nodes = []
-for author_id in author_ids:
-    author_info = authors_df[authors_df['AuthorId'] == author_id]
-    
-    if len(author_info) > 0:
-        # 计算作者的论文数
-        paper_count = len(relevant_paper_authors[
-            relevant_paper_authors['AuthorId'] == author_id
-        ])
-        
-        nodes.append({
-            'id': str(author_id),
-            'name': author_info.iloc[0]['DisplayName'],
-            'paperCount': paper_count
-        })
-
-print(f"  Nodes: {len(nodes)}")
-
-# 构建边
-links = []
-for (source, target), weight in edges.items():
-    links.append({
-        'source': str(source),
-        'target': str(target),
-        'weight': int(weight)
-    })
-
-print(f"  Links: {len(links)}")
-
-# 创建网络对象
-network = {
-    'nodes': nodes,
-    'links': links,
-    'metadata': {
-        'total_papers': len(cs_papers),
-        'total_authors': len(nodes),
-        'total_collaborations': len(links),
-        'year_range': f"{int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}"
-    }
+
+    return cs_papers
+
+
+def paper_pair_weights(author_counts, max_authors=None, hyper_author_mode='skip'):
+    """每篇论文中一对作者的合作权重
+
+    默认每篇论文为每对作者贡献 1。作者数超过 max_authors 的"超多作者"论文
+    （例如几百人的联盟论文）在 skip 模式下被忽略，在 downweight 模式下
+    每对作者只贡献 (max_authors - 1) / (n - 1)。
+    """
+    weights = pd.Series(1.0, index=author_counts.index)
+    if max_authors is None:
+        return weights
+
+    hyper = author_counts > max_authors
+    if hyper_author_mode == 'skip':
+        weights[hyper] = 0.0
+    elif hyper_author_mode == 'downweight':
+        weights[hyper] = (max_authors - 1) / (author_counts[hyper] - 1)
+    else:
+        raise ValueError(f"Unknown hyper_author_mode: {hyper_author_mode}")
+    return weights
+
+
+def edges_frame(sources, targets, weights):
+    """边表：source < target，按 (source, target) 排序"""
+    edges = pd.DataFrame({'source': sources, 'target': targets, 'weight': weights})
+    edges = edges[edges['weight'] > 0]
+    return edges.sort_values(['source', 'target'], kind='stable').reset_index(drop=True)
+
+
+def build_edges_loop(relevant_paper_authors, max_authors=None, hyper_author_mode='skip'):
+    """按论文分组，逐对枚举作者找出合作关系"""
+    paper_groups = relevant_paper_authors.groupby('PaperIdx')['AuthorId'].apply(list)
+    pair_weights = paper_pair_weights(paper_groups.str.len(), max_authors, hyper_author_mode)
+
+    edges = defaultdict(int)
+    for paper_id, authors in paper_groups.items():
+        if len(authors) < 2:
+            continue
+
+        weight = pair_weights[paper_id]
+        if weight == 0:
+            continue
+
+        # 为每对作者创建一条边
+        for i in range(len(authors)):
+            for j in range(i + 1, len(authors)):
+                edge = tuple(sorted([authors[i], authors[j]]))
+                edges[edge] += weight  # 权重为合作次数
+
+    pairs = list(edges.keys())
+    return edges_frame(
+        [source for source, _ in pairs],
+        [target for _, target in pairs],
+        list(edges.values()),
+    )
+
+
+def build_edges_sparse(relevant_paper_authors, max_authors=None, hyper_author_mode='skip'):
+    """用稀疏矩阵计算合作关系
+
+    B 为 论文 × 作者 的 0/1 关联矩阵，B_w 为每行乘上论文权重的同一矩阵，
+    B_w^T B 的非对角元素即为两位作者的加权合作次数 Σ w·1。权重只乘在一侧，
+    论文按 id 排序编码，累加顺序与 loop 引擎相同，结果逐位一致；
+    计算量只与非零元素有关，不再随每篇论文作者数的平方增长。
+    """
+    # 论文按 id 排序编码，与 loop 引擎 groupby 的顺序一致
+    paper_codes, paper_index = pd.factorize(relevant_paper_authors['PaperIdx'], sort=True)
+    # 作者按 id 排序编码，上三角 (i < j) 即对应 source < target
+    author_codes, author_index = pd.factorize(relevant_paper_authors['AuthorId'], sort=True)
+    n_papers, n_authors = len(paper_index), len(author_index)
+
+    author_counts = pd.Series(np.bincount(paper_codes, minlength=n_papers), index=paper_index)
+    pair_weights = paper_pair_weights(author_counts, max_authors, hyper_author_mode).to_numpy()
+    row_weights = pair_weights[paper_codes]
+
+    counts = sparse.csr_matrix(
+        (np.ones(len(paper_codes), dtype=np.int64), (paper_codes, author_codes)),
+        shape=(n_papers, n_authors),
+    )
+    if np.all((pair_weights == 0) | (pair_weights == 1)):
+        # 权重只有 0/1 时用整数矩阵，保证结果精确
+        row_weights = row_weights.astype(np.int64)
+    weighted = sparse.csr_matrix((row_weights, (paper_codes, author_codes)), shape=(n_papers, n_authors))
+    cooccurrence = weighted.T @ counts
+
+    upper = sparse.triu(cooccurrence, k=1).tocoo()
+    sources = author_index[upper.row]
+    targets = author_index[upper.col]
+    weights = upper.data
+
+    # 同一作者在一篇论文中出现 c 次时，loop 引擎会产生 c(c-1)/2 条自环
+    repeated = counts.multiply(counts > 1).tocoo()
+    if repeated.nnz:
+        loop_weights = pair_weights[repeated.row] * repeated.data * (repeated.data - 1) / 2
+        self_loops = pd.Series(loop_weights).groupby(repeated.col).sum()
+        sources = np.concatenate([sources, author_index[self_loops.index]])
+        targets = np.concatenate([targets, author_index[self_loops.index]])
+        weights = np.concatenate([weights, self_loops.to_numpy()])
+
+    return edges_frame(sources, targets, weights)
+
+
+EDGE_ENGINES = {
+    'loop': build_edges_loop,
+    'sparse': build_edges_sparse,
 }
 
-# 保存
-print(f"\n[Step 5] Saving network...")
-
-output_path = f"{OUTPUT_DIR}/author_network.json"
-with open(output_path, 'w') as f:
-    json.dump(network, f, indent=2)
-
-print(f"  ✓ Saved to {output_path}")
-
-print("\n" + "=" * 70)
-print("✅ Author collaboration network created successfully!")
-print("=" * 70)
-print("\nNetwork Statistics:")
-print(f"  Nodes (Authors): {len(nodes)}")
-print(f"  Links (Collaborations): {len(links)}")
-print(f"  Papers: {len(cs_papers)}")
-print(f"  Year Range: {int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}")
-
-# 打印一些额外的统计信息
-if len(links) > 0:
-    weights = [link['weight'] for link in links]
-    print(f"\nCollaboration Statistics:")
-    print(f"  Average collaborations per pair: {sum(weights)/len(weights):.2f}")
-    print(f"  Max collaborations: {max(weights)}")
-    print(f"  Min collaborations: {min(weights)}")
-
-if len(nodes) > 0:
-    paper_counts = [node['paperCount'] for node in nodes]
-    print(f"\nAuthor Statistics:")
-    print(f"  Average papers per author: {sum(paper_counts)/len(paper_counts):.2f}")
-    print(f"  Most prolific author: {max(paper_counts)} papers")
-
-print("\nNext step: Use this network data in your frontend visualization!")
\ No newline at end of file
+DEFAULT_ENGINE = 'sparse' if sparse is not None else 'loop'
+
+
+def build_nodes(authors_df, relevant_paper_authors, author_ids):
+    """一次 groupby + merge 生成节点属性 (name, paperCount)
+
+    每个作者只取 authors_df 中的第一条记录作为名字，
+    paperCount 为该作者在 relevant_paper_authors 中的记录数；
+    不在 authors_df 中的作者不生成节点。节点按 AuthorId 排序。
+    """
+    paper_counts = relevant_paper_authors.groupby('AuthorId').size().rename('paperCount')
+    names = authors_df.drop_duplicates('AuthorId')[['AuthorId', 'DisplayName']]
+
+    nodes_df = (
+        pd.DataFrame({'AuthorId': sorted(author_ids)})
+        .merge(names, on='AuthorId', how='inner')
+        .merge(paper_counts, left_on='AuthorId', right_index=True, how='left')
+    )
+    nodes_df['paperCount'] = nodes_df['paperCount'].fillna(0).astype(int)
+
+    return [
+        {'id': str(author_id), 'name': name, 'paperCount': int(paper_count)}
+        for author_id, name, paper_count in zip(
+            nodes_df['AuthorId'], nodes_df['DisplayName'], nodes_df['paperCount']
+        )
+    ]
+
+
+def build_network(cs_papers, authors_df, paper_authors_df, engine=DEFAULT_ENGINE,
+                  max_authors=None, hyper_author_mode='skip'):
+    """根据筛选后的论文构建作者协作网络"""
+    # 获取这些论文的所有作者关系
+    paper_ids = cs_papers['PaperIdx'].unique()
+    relevant_paper_authors = paper_authors_df[
+        paper_authors_df['PaperIdx'].isin(paper_ids)
+    ]
+
+    print(f"  Relevant paper-author relationships: {len(relevant_paper_authors)}")
+
+    # 构建边（合作关系）
+    print(f"  Edge engine: {engine}")
+    edges = EDGE_ENGINES[engine](relevant_paper_authors, max_authors, hyper_author_mode)
+    print(f"  Total collaborations: {len(edges)}")
+
+    # 构建节点
+    print(f"\n[Step 4] Creating network structure...")
+
+    author_ids = set(edges['source']) | set(edges['target'])
+
+    nodes = build_nodes(authors_df, relevant_paper_authors, author_ids)
+    print(f"  Nodes: {len(nodes)}")
+
+    # 构建边：权重都是整数时输出 int，否则保留 4 位小数
+    weights = edges['weight'].to_numpy(dtype=float)
+    if np.allclose(weights, np.round(weights)):
+        weights = np.round(weights).astype(int).tolist()
+    else:
+        weights = np.round(weights, 4).tolist()
+
+    links = [
+        {'source': str(source), 'target': str(target), 'weight': weight}
+        for source, target, weight in zip(edges['source'].tolist(), edges['target'].tolist(), weights)
+    ]
+
+    print(f"  Links: {len(links)}")
+
+    # 创建网络对象
+    return {
+        'nodes': nodes,
+        'links': links,
+        'metadata': {
+            'total_papers': len(cs_papers),
+            'total_authors': len(nodes),
+            'total_collaborations': len(links),
+            'year_range': f"{int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}"
+        }
+    }
+
+
+def save_network(network, output_dir=OUTPUT_DIR):
+    """保存网络 JSON 和二进制文件"""
+    output_path = f"{output_dir}/author_network.json"
+    network_io.save_network(network, output_path)
+
+    print(f"  ✓ Saved to {output_path} (+ {os.path.basename(network_io.binary_path(output_path))})")
+    return output_path
+
+
+def print_statistics(network, cs_papers):
+    nodes = network['nodes']
+    links = network['links']
+
+    print("\nNetwork Statistics:")
+    print(f"  Nodes (Authors): {len(nodes)}")
+    print(f"  Links (Collaborations): {len(links)}")
+    print(f"  Papers: {len(cs_papers)}")
+    print(f"  Year Range: {int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}")
+
+    # 打印一些额外的统计信息
+    if len(links) > 0:
+        weights = [link['weight'] for link in links]
+        print(f"\nCollaboration Statistics:")
+        print(f"  Average collaborations per pair: {sum(weights)/len(weights):.2f}")
+        print(f"  Max collaborations: {max(weights)}")
+        print(f"  Min collaborations: {min(weights)}")
+
+    if len(nodes) > 0:
+        paper_counts = [node['paperCount'] for node in nodes]
+        print(f"\nAuthor Statistics:")
+        print(f"  Average papers per author: {sum(paper_counts)/len(paper_counts):.2f}")
+        print(f"  Most prolific author: {max(paper_counts)} papers")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build the author collaboration network')
+    parser.add_argument('--engine', choices=sorted(EDGE_ENGINES), default=DEFAULT_ENGINE,
+                        help='co-authorship edge computation (default: %(default)s)')
+    parser.add_argument('--max-authors', type=int, default=None,
+                        help='treat papers with more authors than this as hyper-authored')
+    parser.add_argument('--hyper-author-mode', choices=['skip', 'downweight'], default='skip',
+                        help='drop hyper-authored papers or down-weight their pairs')
+    args = parser.parse_args()
+
+    if args.engine == 'sparse' and sparse is None:
+        parser.error('the sparse engine requires scipy (pip install scipy)')
+    if args.max_authors is not None and args.max_authors < 2:
+        parser.error('--max-authors must be at least 2')
+    return args
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 70)
+    print("Building Author Collaboration Network")
+    print("=" * 70)
+
+    print(f"\nCurrent directory: {os.getcwd()}")
+    print(f"Looking for data in: {DATA_DIR}")
+
+    # 检查文件是否存在
+    if not os.path.exists(f"{DATA_DIR}/papers.csv"):
+        print(f"\n❌ Error: Cannot find {DATA_DIR}/papers.csv")
+        print("\nPlease run this script from the scripts directory:")
+        print("  cd scripts")
+        print("  python build_author_network.py")
+        exit(1)
+
+    print(f"\n[Step 1] Loading data from {DATA_DIR}...")
+
+    try:
+        papers_df, authors_df, paper_authors_df = load_data(DATA_DIR)
+    except Exception as e:
+        print(f"❌ Error loading data: {e}")
+        exit(1)
+
+    print(f"\n[Step 2] Filtering data...")
+    cs_papers = filter_papers(papers_df)
+
+    print(f"\n[Step 3] Building author collaboration network...")
+    network = build_network(
+        cs_papers, authors_df, paper_authors_df,
+        engine=args.engine,
+        max_authors=args.max_authors,
+        hyper_author_mode=args.hyper_author_mode,
+    )
+
+    # 保存
+    print(f"\n[Step 5] Saving network...")
+    save_network(network, OUTPUT_DIR)
+
+    print("\n" + "=" * 70)
+    print("✅ Author collaboration network created successfully!")
+    print("=" * 70)
+    print_statistics(network, cs_papers)
+
+    print("\nNext step: Use this network data in your frontend visualization!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,247 @@
 # build_citation_network.py
+import argparse
 import pandas as pd
-import json
+import numpy as np
 import os
 
-print("=" * 70)
-print("Building Paper Citation Network")
-print("=" * 70)
+import network_io
+from build_author_network import filter_papers
+from paper_ids import INDEX_COLUMNS, add_paper_index, load_paper_id_map, read_indexed_table
+from table_io import iter_table, read_table, table_columns
 
 # 数据路径
 DATA_DIR = 'data/processed'
 OUTPUT_DIR = 'data/processed'
 
-print(f"\nCurrent directory: {os.getcwd()}")
-print(f"Looking for data in: {DATA_DIR}")
 
-# 检查文件是否存在
-if not os.path.exists(f"{DATA_DIR}/papers.csv"):
-    print(f"\n❌ Error: Cannot find {DATA_DIR}/papers.csv")
-    print("\nPlease run this script from the scripts directory:")
-    print("  cd scripts")
-    print("  python build_citation_network.py")
-    exit(1)
+def load_data(data_dir=DATA_DIR, load_citations=True):
+    """加载论文和引用关系表（引用关系只读取整数 id 列）
 
-print(f"\n[Step 1] Loading data from {DATA_DIR}...")
+    load_citations=False 时不加载引用关系表，由 stream_internal_citations 分块筛选。
+    """
+    paper_id_map = load_paper_id_map(os.path.join(data_dir, 'paper_id_map.csv'))
 
-try:
-    # 加载数据
-    papers_df = pd.read_csv(f"{DATA_DIR}/papers.csv")
+    papers_df = add_paper_index(read_table('papers', data_dir), paper_id_map)
     print(f"  ✓ Loaded {len(papers_df)} papers")
-    
-    citations_df = pd.read_csv(f"{DATA_DIR}/paper_references.csv")
+
+    if not load_citations:
+        return papers_df, None
+
+    citations_df = read_indexed_table('paper_references', data_dir, ['PaperIdx', 'PaperReferenceIdx'], paper_id_map)
     print(f"  ✓ Loaded {len(citations_df)} citations")
-    
-except Exception as e:
-    print(f"❌ Error loading data: {e}")
-    exit(1)
 
-print(f"\n[Step 2] Filtering data...")
+    return papers_df, citations_df
+
+
+def filter_internal_citations(citations_df, paper_idx):
+    """筛选引用双方都在 paper_idx（整数 PaperIdx）中的引用关系"""
+    # 引用关系：PaperIdx (citing paper) -> PaperReferenceIdx (cited paper)
+    paper_idx = np.unique(np.asarray(paper_idx, dtype=np.int32))
+    return citations_df[
+        citations_df['PaperIdx'].isin(paper_idx) &
+        citations_df['PaperReferenceIdx'].isin(paper_idx)
+    ]
 
-# 筛选 2020-2025 年的论文
-papers_df = papers_df[(papers_df['Year'] >= 2020) & (papers_df['Year'] <= 2025)]
-print(f"  Papers 2020-2025: {len(papers_df)}")
 
-# 筛选 Computer Science 论文
-if 'FieldsOfStudy' in papers_df.columns:
-    cs_papers = papers_df[
-        papers_df['FieldsOfStudy'].str.contains('Computer Science', case=False, na=False)
+def attach_paper_ids(citations_df, papers_df):
+    """用 papers_df 的 PaperIdx -> PaperId 还原引用两端的字符串 id"""
+    paper_ids = pd.Series(papers_df['PaperId'].astype(str).to_numpy(), index=papers_df['PaperIdx'].to_numpy())
+    paper_ids = paper_ids[~paper_ids.index.duplicated()]
+    return citations_df.assign(
+        PaperId=citations_df['PaperIdx'].map(paper_ids),
+        PaperReferenceId=citations_df['PaperReferenceIdx'].map(paper_ids),
+    )
+
+
+def stream_internal_citations(cs_papers, data_dir=DATA_DIR, chunk_size=1_000_000):
+    """分块读取 paper_references，只保留 UCSD 论文之间的引用
+
+    每次只有一块引用关系在内存中，内存占用与块大小和结果大小有关，
+    与引用表的总行数无关。表中有整数 id 列时按 PaperIdx 筛选，
+    旧版表按字符串 id 筛选（不需要为所有被引论文分配整数 id）。
+    """
+    if 'PaperReferenceIdx' in table_columns('paper_references', data_dir):
+        columns = ['PaperIdx', 'PaperReferenceIdx']
+        paper_ids = np.unique(cs_papers['PaperIdx'].to_numpy(dtype=np.int32))
+    else:
+        columns = ['PaperId', 'PaperReferenceId']
+        paper_ids = pd.unique(cs_papers['PaperId'].astype(str))
+
+    kept, total = [], 0
+    for chunk in iter_table('paper_references', data_dir, columns=columns, chunk_size=chunk_size):
+        total += len(chunk)
+        mask = chunk[columns[0]].isin(paper_ids) & chunk[columns[1]].isin(paper_ids)
+        if mask.any():
+            kept.append(chunk[mask])
+    print(f"  Scanned {total} citations in chunks of {chunk_size}")
+
+    if not kept:
+        return pd.DataFrame({'PaperIdx': [], 'PaperReferenceIdx': []}, dtype=np.int32)
+    internal = pd.concat(kept, ignore_index=True)
+    if columns[0] == 'PaperId':
+        # 只有两端都在 cs_papers 中的引用，补上整数 id 便于和内存路径一致
+        paper_idx = pd.Series(cs_papers['PaperIdx'].to_numpy(), index=cs_papers['PaperId'].astype(str).to_numpy())
+        paper_idx = paper_idx[~paper_idx.index.duplicated()]
+        for column in columns:
+            internal[INDEX_COLUMNS[column]] = internal[column].astype(str).map(paper_idx)
+    return internal[['PaperIdx', 'PaperReferenceIdx']]
+
+
+def column_or(df, column, default):
+    """取一列；列不存在时返回全为 default 的列"""
+    if column in df.columns:
+        return df[column]
+    return pd.Series(default, index=df.index)
+
+
+def int_list(values):
+    """转成 int 列表，缺失值为 0"""
+    return pd.to_numeric(values, errors='coerce').fillna(0).astype(np.int64).tolist()
+
+
+def build_nodes(cs_papers):
+    """按列生成节点：id, title, year, citationCount"""
+    ids = cs_papers['PaperId'].astype(str).tolist()
+    titles = column_or(cs_papers, 'Title', 'Unknown').astype(object).tolist()
+    years = int_list(cs_papers['Year'])
+    citation_counts = int_list(column_or(cs_papers, 'CitationCount', 0))
+    return [
+        {'id': paper_id, 'title': title, 'year': year, 'citationCount': citation_count}
+        for paper_id, title, year, citation_count in zip(ids, titles, years, citation_counts)
     ]
-    print(f"  Computer Science papers: {len(cs_papers)}")
-    
-    if len(cs_papers) < 50:
-        print(f"  Warning: Only {len(cs_papers)} CS papers found, using all papers instead")
-        cs_papers = papers_df
-else:
-    print("  No FieldsOfStudy column, using all papers")
-    cs_papers = papers_df
-
-print(f"\n[Step 3] Building citation network...")
-
-# 获取 UCSD 论文的 ID 集合
-ucsd_paper_ids = set(cs_papers['PaperId'].astype(str))
-print(f"  UCSD paper IDs: {len(ucsd_paper_ids)}")
-
-# 筛选 UCSD 论文之间的引用关系
-# 引用关系：PaperId (citing paper) -> PaperReferenceId (cited paper)
-internal_citations = citations_df[
-    (citations_df['PaperId'].astype(str).isin(ucsd_paper_ids)) &
-    (citations_df['PaperReferenceId'].astype(str).isin(ucsd_paper_ids))
-]
-
-print(f"  Internal citations (UCSD -> UCSD): {len(internal_citations)}")
-
-# 构建节点
-print(f"\n[Step 4] Creating network structure...")
-
-nodes = []
-for _, paper in cs_papers.iterrows():
-    nodes.append({
-        'id': str(paper['PaperId']),
-        'title': paper.get('Title', 'Unknown'),
-        'year': int(paper['Year']) if pd.notna(paper['Year']) else 0,
-        'citationCount': int(paper.get('CitationCount', 0)) if pd.notna(paper.get('CitationCount', 0)) else 0
-    })
-
-print(f"  Nodes: {len(nodes)}")
-
-# 构建边
-links = []
-for _, citation in internal_citations.iterrows():
-    links.append({
-        'source': str(citation['PaperId']),
-        'target': str(citation['PaperReferenceId'])
-    })
-
-print(f"  Links: {len(links)}")
-
-# 创建网络对象
-network = {
-    'nodes': nodes,
-    'links': links,
-    'metadata': {
+
+
+def build_links(internal_citations):
+    """按列生成引用边：source (citing) -> target (cited)"""
+    sources = internal_citations['PaperId'].astype(str).tolist()
+    targets = internal_citations['PaperReferenceId'].astype(str).tolist()
+    return [{'source': source, 'target': target} for source, target in zip(sources, targets)]
+
+
+def build_metadata(cs_papers, links):
+    return {
         'total_papers': len(cs_papers),
         'total_citations': len(links),
         'year_range': f"{int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}"
     }
-}
-
-# 保存
-print(f"\n[Step 5] Saving network...")
-
-output_path = f"{OUTPUT_DIR}/citation_network.json"
-with open(output_path, 'w') as f:
-    json.dump(network, f, indent=2)
-
-print(f"  ✓ Saved to {output_path}")
-
-print("\n" + "=" * 70)
-print("✅ Citation network created successfully!")
-print("=" * 70)
-print("\nNetwork Statistics:")
-print(f"  Nodes (Papers): {len(nodes)}")
-print(f"  Links (Citations): {len(links)}")
-print(f"  Year Range: {int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}")
-
-# 打印一些额外的统计信息
-if len(nodes) > 0:
-    citation_counts = [node['citationCount'] for node in nodes]
-    print(f"\nCitation Statistics:")
-    print(f"  Average citations per paper: {sum(citation_counts)/len(citation_counts):.2f}")
-    print(f"  Most cited paper: {max(citation_counts)} citations")
-    print(f"  Papers with 0 citations: {sum(1 for c in citation_counts if c == 0)}")
-
-print("\nNext step: Use this network data in your frontend visualization!")
\ No newline at end of file
+
+
+def build_network(cs_papers, citations_df):
+    """根据筛选后的论文构建引用网络"""
+    # 获取 UCSD 论文的整数 ID
+    ucsd_paper_idx = cs_papers['PaperIdx'].unique()
+    print(f"  UCSD paper IDs: {len(ucsd_paper_idx)}")
+
+    # 筛选 UCSD 论文之间的引用关系
+    internal_citations = filter_internal_citations(citations_df, ucsd_paper_idx)
+    return network_from_citations(cs_papers, internal_citations)
+
+
+def network_from_citations(cs_papers, internal_citations):
+    """由筛选后的论文和内部引用（整数 id）生成网络，输出时还原成字符串 id"""
+    internal_citations = attach_paper_ids(internal_citations, cs_papers)
+    print(f"  Internal citations (UCSD -> UCSD): {len(internal_citations)}")
+
+    # 构建节点
+    print(f"\n[Step 4] Creating network structure...")
+
+    nodes = build_nodes(cs_papers)
+    print(f"  Nodes: {len(nodes)}")
+
+    # 构建边
+    links = build_links(internal_citations)
+    print(f"  Links: {len(links)}")
+
+    # 创建网络对象
+    return {
+        'nodes': nodes,
+        'links': links,
+        'metadata': build_metadata(cs_papers, links)
+    }
+
+
+def save_network(network, output_dir=OUTPUT_DIR):
+    """保存网络 JSON 和二进制文件"""
+    output_path = f"{output_dir}/citation_network.json"
+    network_io.save_network(network, output_path)
+
+    print(f"  ✓ Saved to {output_path} (+ {os.path.basename(network_io.binary_path(output_path))})")
+    return output_path
+
+
+def print_statistics(network, cs_papers):
+    nodes = network['nodes']
+    links = network['links']
+
+    print("\nNetwork Statistics:")
+    print(f"  Nodes (Papers): {len(nodes)}")
+    print(f"  Links (Citations): {len(links)}")
+    print(f"  Year Range: {int(cs_papers['Year'].min())}-{int(cs_papers['Year'].max())}")
+
+    # 打印一些额外的统计信息
+    if len(nodes) > 0:
+        citation_counts = [node['citationCount'] for node in nodes]
+        print(f"\nCitation Statistics:")
+        print(f"  Average citations per paper: {sum(citation_counts)/len(citation_counts):.2f}")
+        print(f"  Most cited paper: {max(citation_counts)} citations")
+        print(f"  Papers with 0 citations: {sum(1 for c in citation_counts if c == 0)}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build the paper citation network')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='stream paper_references in chunks of this many rows '
+                             'instead of loading the whole table')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 70)
+    print("Building Paper Citation Network")
+    print("=" * 70)
+
+    print(f"\nCurrent directory: {os.getcwd()}")
+    print(f"Looking for data in: {DATA_DIR}")
+
+    # 检查文件是否存在
+    if not os.path.exists(f"{DATA_DIR}/papers.csv"):
+        print(f"\n❌ Error: Cannot find {DATA_DIR}/papers.csv")
+        print("\nPlease run this script from the scripts directory:")
+        print("  cd scripts")
+        print("  python build_citation_network.py")
+        exit(1)
+
+    print(f"\n[Step 1] Loading data from {DATA_DIR}...")
+
+    try:
+        papers_df, citations_df = load_data(DATA_DIR, load_citations=args.chunk_size is None)
+    except Exception as e:
+        print(f"❌ Error loading data: {e}")
+        exit(1)
+
+    print(f"\n[Step 2] Filtering data...")
+    cs_papers = filter_papers(papers_df)
+
+    print(f"\n[Step 3] Building citation network...")
+    if args.chunk_size is None:
+        network = build_network(cs_papers, citations_df)
+    else:
+        internal_citations = stream_internal_citations(cs_papers, DATA_DIR, args.chunk_size)
+        network = network_from_citations(cs_papers, internal_citations)
+
+    # 保存
+    print(f"\n[Step 5] Saving network...")
+    save_network(network, OUTPUT_DIR)
+
+    print("\n" + "=" * 70)
+    print("✅ Citation network created successfully!")
+    print("=" * 70)
+    print_statistics(network, cs_papers)
+
+    print("\nNext step: Use this network data in your frontend visualization!")
+
+
+if __name__ == "__main__":
+    main()
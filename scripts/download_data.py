@@ -1,17 +1,80 @@
 # download_data.py
+import argparse
 import requests
+import numpy as np
 import pandas as pd
 import json
 import time
 from datetime import datetime
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-# 创建数据目录
-os.makedirs('data/raw', exist_ok=True)
-os.makedirs('data/processed', exist_ok=True)
+import openalex_client
+from openalex_client import OpenAlexClient, decode_ndjson, fetch_works
+from paper_ids import load_paper_id_map, save_paper_id_map
+from table_io import write_table
 
-# OpenAlex API base URL
-BASE_URL = "https://api.openalex.org"
+# OpenAlex API base URL（可用 OPENALEX_BASE_URL 或 --base-url 指向本地回放服务器）
+BASE_URL = openalex_client.BASE_URL
+
+# 原始数据：NDJSON 每行一篇论文，state 文件记录每个分片的 cursor，用于断点续传
+RAW_PAPERS_PATH = 'data/raw/ucsd_papers.ndjson'
+RAW_STATE_PATH = 'data/raw/ucsd_papers.state.json'
+
+WORK_FIELDS = 'id,title,publication_year,cited_by_count,authorships,referenced_works,topics'
+
+# OpenAlex 作者 id -> 整数 AuthorId 的持久化映射，保证多次运行之间 id 不变
+AUTHOR_ID_MAP_PATH = 'data/processed/author_id_map.csv'
+
+# 并行解析阶段每个分片的大小（字节），分片边界对齐到行首
+PARSE_SHARD_BYTES = 32 << 20
+
+# 多机构任务：每个机构的原始 works 和下载进度单独存放
+INSTITUTIONS_RAW_DIR = 'data/raw/institutions'
+# 任务文件中的字段
+JOB_FIELDS = ('institutions', 'start_year', 'end_year', 'field', 'max_papers')
+
+# 增量更新的状态（上次同步的时间水位线）
+REFRESH_STATE_PATH = 'data/state/refresh_state.json'
+
+
+def load_author_id_map(path=AUTHOR_ID_MAP_PATH, authors_path='data/processed/authors.csv'):
+    """读取 OpenAlexId -> AuthorId 映射
+
+    映射文件不存在时从已有的 authors.csv 中恢复，都没有时返回空映射。
+    """
+    if os.path.exists(path):
+        map_df = pd.read_csv(path)
+    elif os.path.exists(authors_path):
+        map_df = pd.read_csv(authors_path, usecols=['OpenAlexId', 'AuthorId'])
+    else:
+        return {}
+    return dict(zip(map_df['OpenAlexId'].astype(str), map_df['AuthorId'].astype(int)))
+
+
+def save_author_id_map(author_id_map, path=AUTHOR_ID_MAP_PATH):
+    map_df = pd.DataFrame({
+        'OpenAlexId': list(author_id_map.keys()),
+        'AuthorId': list(author_id_map.values()),
+    }).sort_values('AuthorId')
+    map_df.to_csv(path, index=False)
+    print(f"  ✓ author_id_map.csv: {len(map_df)} rows")
+
+
+def load_refresh_state(path=REFRESH_STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_refresh_state(state, path=REFRESH_STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
 
 def get_ucsd_institution_id():
     """获取 UCSD 的 OpenAlex ID"""
@@ -48,164 +111,428 @@ def get_ucsd_institution_id():
         # 如果 API 失败，返回已知的 UCSD ID
         return "https://openalex.org/I138006243"
 
-def download_ucsd_papers(institution_id, start_year=2020, end_year=2025, max_papers=1000):
-    """下载 UCSD 的 CS 论文"""
-    
-    papers = []
-    page = 1
-    per_page = 200
-    
+def download_ucsd_papers(institution_id, start_year=2020, end_year=2025, max_papers=1000,
+                         output_path=RAW_PAPERS_PATH, state_path=RAW_STATE_PATH,
+                         workers=4, rate=8, resume=True):
+    """下载 UCSD 的 CS 论文
+
+    每个年份是一个独立的 cursor 分片，由线程池并发抓取（共享令牌桶限速），
+    结果边下载边追加到 NDJSON 文件。中断后重新运行会从上次的 cursor 继续。
+    返回已下载的论文数量。
+    """
+
     # 提取 institution ID
     inst_id = institution_id.split('/')[-1] if '/' in institution_id else institution_id
-    
+
     print(f"\nDownloading UCSD papers ({start_year}-{end_year})...")
     print(f"Institution ID: {inst_id}")
-    
+    print(f"Writing to: {output_path}")
+
+    client = OpenAlexClient(BASE_URL, rate=rate)
+    shards = {
+        str(year): f'publication_year:{year}'
+        for year in range(start_year, end_year + 1)
+    }
+
     try:
-        while len(papers) < max_papers:
-            url = f"{BASE_URL}/works"
-            
-            # 简化查询，只按机构和年份过滤
-            params = {
-                'filter': f'institutions.id:{inst_id},publication_year:{start_year}-{end_year}',
-                'per_page': per_page,
-                'page': page,
-                'select': 'id,title,publication_year,cited_by_count,authorships,referenced_works,topics'
-            }
-            
-            print(f"\nFetching page {page}...", end=' ')
-            response = requests.get(url, params=params)
-            
-            if response.status_code != 200:
-                print(f"\nError: {response.status_code}")
-                print(f"Response: {response.text[:200]}")
-                break
-            
-            data = response.json()
-            results = data.get('results', [])
-            
-            if not results:
-                print("No more results")
-                break
-            
-            papers.extend(results)
-            print(f"Got {len(results)} papers (Total: {len(papers)})")
-            
-            page += 1
-            time.sleep(0.2)  # 避免请求过快
-            
-            if len(papers) >= max_papers:
-                print(f"\nReached maximum of {max_papers} papers")
-                break
-                
+        return fetch_works(
+            client,
+            filters=f'institutions.id:{inst_id}',
+            shards=shards,
+            output_path=output_path,
+            state_path=state_path,
+            max_papers=max_papers,
+            workers=workers,
+            select=WORK_FIELDS,
+            resume=resume,
+        )
     except Exception as e:
         print(f"\nError downloading papers: {e}")
-        if papers:
-            print(f"Continuing with {len(papers)} papers already downloaded")
-    
-    return papers
+        print("Progress is saved, run the script again to resume")
+        return openalex_client.CheckpointState(state_path).total()
 
-def process_papers_data(papers):
-    """处理论文数据"""
-    
-    print("\nProcessing papers data...")
-    
-    papers_list = []
-    authors_list = []
-    paper_authors_list = []
-    citations_list = []
-    
-    author_id_map = {}
-    next_author_id = 1
-    
-    for idx, paper in enumerate(papers):
+def openalex_key(value):
+    """OpenAlex 实体 id 或 URL -> 短 id（如 I138006243、17）"""
+    return str(value).rstrip('/').split('/')[-1]
+
+
+def load_job(path):
+    """读取并校验多机构下载任务（JSON），非法内容抛出 ValueError
+
+    {
+      "institutions": ["I138006243", "Stanford University"],
+      "start_year": 2020,
+      "end_year": 2025,
+      "field": 17,
+      "max_papers": 1000
+    }
+
+    institutions 可以是 OpenAlex 机构 id/URL，也可以是机构名称（下载前搜索解析）；
+    field 为 OpenAlex 领域 id（如 17 = Computer Science），可省略；
+    max_papers 是每个机构的上限，可省略。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        job = json.load(f)
+    if not isinstance(job, dict):
+        raise ValueError("job must be a JSON object")
+    unknown = sorted(set(job) - set(JOB_FIELDS))
+    if unknown:
+        raise ValueError(f"unknown job field(s): {', '.join(unknown)}")
+
+    institutions = job.get('institutions')
+    if (not isinstance(institutions, list) or not institutions
+            or not all(isinstance(i, str) and i.strip() for i in institutions)):
+        raise ValueError("'institutions' must be a non-empty list of ids or names")
+    for key in ('start_year', 'end_year'):
+        if not isinstance(job.get(key), int):
+            raise ValueError(f"'{key}' must be an integer")
+    if job['start_year'] > job['end_year']:
+        raise ValueError("'start_year' must not be after 'end_year'")
+    max_papers = job.get('max_papers')
+    if max_papers is not None and (not isinstance(max_papers, int) or max_papers < 1):
+        raise ValueError("'max_papers' must be a positive integer")
+    field = job.get('field')
+    if field is not None and not isinstance(field, (int, str)):
+        raise ValueError("'field' must be an OpenAlex field id")
+
+    return {
+        'institutions': [i.strip() for i in institutions],
+        'start_year': job['start_year'],
+        'end_year': job['end_year'],
+        'field': openalex_key(field) if field is not None else None,
+        'max_papers': max_papers,
+    }
+
+
+def resolve_institution(client, entry):
+    """机构 id/URL 直接使用，机构名称用 /institutions 搜索取第一个结果，返回短 id"""
+    key = openalex_key(entry)
+    if re.fullmatch(r'[Ii]\d+', key):
+        return key.upper()
+    data = client.get('institutions', {'search': entry, 'per_page': 1})
+    if not data.get('results'):
+        raise ValueError(f"institution not found: {entry}")
+    institution = data['results'][0]
+    print(f"  {entry} -> {institution['display_name']}: {institution['id']}")
+    return openalex_key(institution['id'])
+
+
+def works_filter(institution_ids, field=None):
+    """机构（多个时取并集）和领域的 works filter"""
+    filters = f"institutions.id:{'|'.join(institution_ids)}"
+    if field:
+        filters += f',primary_topic.field.id:{field}'
+    return filters
+
+
+def institution_paths(inst_id, raw_dir=INSTITUTIONS_RAW_DIR):
+    """机构的原始 NDJSON 和下载进度文件"""
+    return f'{raw_dir}/{inst_id}.ndjson', f'{raw_dir}/{inst_id}.state.json'
+
+
+def download_institutions(client, job, institution_ids, institution_workers=4, workers=4,
+                          resume=True, raw_dir=INSTITUTIONS_RAW_DIR):
+    """按机构并发下载 works，每个机构写入自己的 NDJSON，支持断点续传
+
+    所有机构共享同一个 client（同一个令牌桶），并发度再高总请求速率也不变；
+    每个机构内部仍按年份分片并发。一个机构失败时打印错误，其他机构继续，
+    重新运行会从失败机构的 cursor 继续。返回 {机构 id: 已下载的论文数}。
+    """
+    os.makedirs(raw_dir, exist_ok=True)
+
+    def download(inst_id):
+        output_path, state_path = institution_paths(inst_id, raw_dir)
+        shards = {
+            str(year): f'publication_year:{year}'
+            for year in range(job['start_year'], job['end_year'] + 1)
+        }
+        return fetch_works(
+            client,
+            filters=works_filter([inst_id], job['field']),
+            shards=shards,
+            output_path=output_path,
+            state_path=state_path,
+            max_papers=job['max_papers'],
+            workers=workers,
+            select=WORK_FIELDS,
+            resume=resume,
+        )
+
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max(1, institution_workers)) as executor:
+        futures = {inst_id: executor.submit(download, inst_id) for inst_id in institution_ids}
+        for inst_id, future in futures.items():
+            try:
+                counts[inst_id] = future.result()
+                print(f"  ✓ {inst_id}: {counts[inst_id]} papers")
+            except Exception as e:
+                print(f"  ❌ {inst_id}: {e} (progress is saved, run again to resume)")
+                counts[inst_id] = openalex_client.CheckpointState(institution_paths(inst_id, raw_dir)[1]).total()
+    return counts
+
+
+def work_field(topics):
+    """论文领域：主题中含有 computer 的算作 Computer Science"""
+    return 'Computer Science' if any('computer' in str(t).lower() for t in topics) else 'General'
+
+
+def parse_works(works):
+    """把 works 转换成列式的行数据，不分配任何 id，可以在子进程中运行
+
+    返回的 dict 中：
+      papers: PaperId / Title / Year / CitationCount / FieldsOfStudy 各一个列表
+      authors: 本批中出现的作者（按首次出现排序）的 OpenAlexId、DisplayName 列表
+      authorship_paper / authorship_author: 每条作者关系的论文序号和作者序号 (int32)
+      authorship_sequence: 每条作者关系的 AuthorSequenceNumber
+      reference_paper / reference_id: 每条引用的论文序号和被引论文 id
+      errors: 格式有误、整篇跳过的论文数
+    论文序号是论文在 papers 中的位置，作者序号是作者在 authors 中的位置。
+    作者表在批内去重，相同的字符串只保留一个对象，子进程返回结果时传输的数据更少。
+    """
+    papers = {column: [] for column in ('PaperId', 'Title', 'Year', 'CitationCount', 'FieldsOfStudy')}
+    author_codes, author_ids, author_names = {}, [], []
+    authorship_paper, authorship_author, authorship_sequence = [], [], []
+    reference_paper, reference_id = [], []
+    sequences = {}
+    errors = 0
+
+    for idx, paper in enumerate(works):
         try:
-            paper_id = paper['id'].split('/')[-1]
-            
-            # 获取主题/领域信息
-            topics = paper.get('topics', [])
-            field = 'Computer Science' if any('computer' in str(t).lower() for t in topics) else 'General'
-            
-            # 论文信息
-            papers_list.append({
-                'PaperId': paper_id,
-                'Title': paper.get('title', 'Unknown'),
-                'Year': paper.get('publication_year', 0),
-                'CitationCount': paper.get('cited_by_count', 0),
-                'FieldsOfStudy': field
-            })
-            
-            # 作者信息
+            position = len(papers['PaperId'])
+            row = (
+                paper['id'].split('/')[-1],
+                paper.get('title', 'Unknown'),
+                paper.get('publication_year', 0),
+                paper.get('cited_by_count', 0),
+                work_field(paper.get('topics', [])),
+            )
+            authorships = []
             for authorship in paper.get('authorships', []):
                 author = authorship.get('author', {})
                 if not author:
                     continue
-                
                 author_openalex_id = author.get('id', '').split('/')[-1]
                 if not author_openalex_id:
                     continue
-                
-                if author_openalex_id not in author_id_map:
-                    author_id_map[author_openalex_id] = next_author_id
-                    
-                    authors_list.append({
-                        'AuthorId': next_author_id,
-                        'DisplayName': author.get('display_name', 'Unknown'),
-                        'OpenAlexId': author_openalex_id
-                    })
-                    
-                    next_author_id += 1
-                
-                author_id = author_id_map[author_openalex_id]
-                
-                # 论文-作者关系
-                paper_authors_list.append({
-                    'PaperId': paper_id,
-                    'AuthorId': author_id,
-                    'AuthorSequenceNumber': authorship.get('author_position', 'unknown')
-                })
-            
-            # 引用关系
-            for ref in paper.get('referenced_works', []):
-                if ref:
-                    ref_id = ref.split('/')[-1]
-                    citations_list.append({
-                        'PaperId': paper_id,
-                        'PaperReferenceId': ref_id
-                    })
-            
-            if (idx + 1) % 100 == 0:
-                print(f"  Processed {idx + 1}/{len(papers)} papers")
-                
+                authorships.append((author_openalex_id, author.get('display_name', 'Unknown'),
+                                    authorship.get('author_position', 'unknown')))
+            references = [ref.split('/')[-1] for ref in paper.get('referenced_works', []) if ref]
         except Exception as e:
             print(f"  Error processing paper {idx}: {e}")
+            errors += 1
             continue
-    
-    # 转换为 DataFrame
-    papers_df = pd.DataFrame(papers_list)
-    authors_df = pd.DataFrame(authors_list)
-    paper_authors_df = pd.DataFrame(paper_authors_list)
-    citations_df = pd.DataFrame(citations_list)
-    
+
+        for column, value in zip(papers, row):
+            papers[column].append(value)
+        for author_openalex_id, name, sequence in authorships:
+            code = author_codes.get(author_openalex_id)
+            if code is None:
+                code = author_codes[author_openalex_id] = len(author_ids)
+                author_ids.append(author_openalex_id)
+                author_names.append(name)
+            authorship_paper.append(position)
+            authorship_author.append(code)
+            authorship_sequence.append(sequences.setdefault(sequence, sequence))
+        reference_paper.extend([position] * len(references))
+        reference_id.extend(references)
+
+    return {
+        'papers': papers,
+        'authors': {'OpenAlexId': author_ids, 'DisplayName': author_names},
+        'authorship_paper': np.asarray(authorship_paper, dtype=np.int32),
+        'authorship_author': np.asarray(authorship_author, dtype=np.int32),
+        'authorship_sequence': authorship_sequence,
+        'reference_paper': np.asarray(reference_paper, dtype=np.int32),
+        'reference_id': reference_id,
+        'errors': errors,
+    }
+
+
+def intern_ids(values, id_map, first_id):
+    """把一列 OpenAlex id 转成整数 id
+
+    映射中没有的 id 按首次出现的顺序从 max(已有 id) + 1（空映射时为 first_id）开始分配，
+    映射会被原地更新。
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    next_id = max(id_map.values(), default=first_id - 1) + 1
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for i, openalex_id in enumerate(uniques):
+        if openalex_id not in id_map:
+            id_map[openalex_id] = next_id
+            next_id += 1
+        lookup[i] = id_map[openalex_id]
+    return lookup[codes]
+
+
+def merge_parsed(parts, author_id_map=None, paper_id_map=None):
+    """按顺序合并 parse_works 的结果并分配 id，返回四张表
+
+    重复的论文只保留第一次出现的（多个机构共有的论文、续传时重复下载的页）；
+    作者按 OpenAlexId 合并，保留第一次出现时的姓名。新作者和新论文 id 按
+    在合并顺序中第一次出现的位置分配，所以结果只取决于 parts 的顺序，
+    与分片方式和并行度无关，也与逐条处理的结果完全相同。
+    """
+    if author_id_map is None:
+        author_id_map = {}
+    if paper_id_map is None:
+        paper_id_map = {}
+
+    # 各批的论文序号加上偏移量，作者序号换成 OpenAlexId，拼接成整体
+    papers_df = pd.DataFrame({
+        column: [value for part in parts for value in part['papers'][column]]
+        for column in ('PaperId', 'Title', 'Year', 'CitationCount', 'FieldsOfStudy')
+    })
+    offsets = np.cumsum([0] + [len(part['papers']['PaperId']) for part in parts])
+    authorship_paper = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+        part['authorship_paper'].astype(np.int64) + offset for part, offset in zip(parts, offsets)])
+    authorship_openalex = np.concatenate([np.zeros(0, dtype=object)] + [
+        np.asarray(part['authors']['OpenAlexId'], dtype=object)[part['authorship_author']] for part in parts])
+    authorship_name = np.concatenate([np.zeros(0, dtype=object)] + [
+        np.asarray(part['authors']['DisplayName'], dtype=object)[part['authorship_author']] for part in parts])
+    authorship_sequence = np.asarray(
+        [value for part in parts for value in part['authorship_sequence']], dtype=object)
+    reference_paper = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+        part['reference_paper'].astype(np.int64) + offset for part, offset in zip(parts, offsets)])
+    reference_id = np.asarray([value for part in parts for value in part['reference_id']], dtype=object)
+
+    # 重复的论文整篇去掉（包括它的作者关系和引用）
+    keep = ~papers_df['PaperId'].duplicated().to_numpy()
+    positions = np.flatnonzero(keep)
+    row_of = np.full(len(keep), -1, dtype=np.int64)
+    row_of[positions] = np.arange(len(positions))
+    kept = keep[authorship_paper]
+    author_rows = row_of[authorship_paper[kept]]
+    authorship_openalex, authorship_name = authorship_openalex[kept], authorship_name[kept]
+    authorship_sequence = authorship_sequence[kept]
+    kept = keep[reference_paper]
+    reference_rows, reference_id = row_of[reference_paper[kept]], reference_id[kept]
+    papers_df = papers_df[keep].reset_index(drop=True)
+    paper_id_values = papers_df['PaperId'].to_numpy(dtype=object)
+
+    # 论文 id 的出现顺序：每篇论文自身，然后是它的参考文献
+    stream = np.concatenate([paper_id_values, reference_id])
+    owner = np.concatenate([np.arange(len(papers_df)), reference_rows])
+    order = np.lexsort((np.arange(len(owner)), owner))
+    stream_idx = np.empty(len(order), dtype=np.int64)
+    stream_idx[order] = intern_ids(stream[order], paper_id_map, first_id=0)
+    papers_df['PaperIdx'] = stream_idx[:len(papers_df)]
+    paper_idx = papers_df['PaperIdx'].to_numpy()
+
+    author_ids = intern_ids(authorship_openalex, author_id_map, first_id=1)
+    authors_df = pd.DataFrame({
+        'AuthorId': author_ids,
+        'DisplayName': authorship_name,
+        'OpenAlexId': authorship_openalex,
+    }).drop_duplicates('OpenAlexId').reset_index(drop=True)
+
+    paper_authors_df = pd.DataFrame({
+        'PaperId': paper_id_values[author_rows],
+        'AuthorId': author_ids,
+        'AuthorSequenceNumber': authorship_sequence,
+        'PaperIdx': paper_idx[author_rows],
+    })
+
+    citations_df = pd.DataFrame({
+        'PaperId': paper_id_values[reference_rows],
+        'PaperReferenceId': reference_id,
+        'PaperIdx': paper_idx[reference_rows],
+        'PaperReferenceIdx': stream_idx[len(papers_df):],
+    })
+
     return papers_df, authors_df, paper_authors_df, citations_df
 
-def save_data(papers_df, authors_df, paper_authors_df, citations_df):
-    """保存处理后的数据"""
+
+def process_papers_data(papers, author_id_map=None, paper_id_map=None):
+    """处理论文数据
+
+    papers 可以是列表，也可以是 iter_ndjson 这样的迭代器（逐条处理，
+    不需要把原始数据全部读进内存）。重复的论文 id 只处理第一次出现的。
+
+    author_id_map 为已有的 OpenAlexId -> AuthorId 映射，已知作者沿用原来的 id，
+    新作者从当前最大 id 之后分配；映射会被原地更新。
+
+    paper_id_map 为 OpenAlex 论文 id -> PaperIdx 的映射（同样原地更新），
+    论文和被引论文都分配整数 id，写入 PaperIdx / PaperReferenceIdx 列。
+    """
+    
+    print("\nProcessing papers data...")
+    parsed = parse_works(papers)
+    print(f"  Parsed {len(parsed['papers']['PaperId'])} papers")
+    return merge_parsed([parsed], author_id_map, paper_id_map)
+
+
+def raw_shards(paths, shard_bytes=PARSE_SHARD_BYTES):
+    """把若干 NDJSON 文件切成 (path, start, end) 字节区间，区间边界对齐到行首"""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            start = 0
+            while start < size:
+                f.seek(min(start + shard_bytes, size))
+                if f.tell() < size:
+                    f.readline()
+                end = f.tell()
+                shards.append((path, start, end))
+                start = end
+    return shards
+
+
+def parse_shard(shard):
+    """解析一个字节区间内的 works（进程池中运行）"""
+    path, start, end = shard
+    with open(path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).splitlines(keepends=True)
+    return parse_works(decode_ndjson(lines, path))
+
+
+def process_raw_files(paths, author_id_map=None, paper_id_map=None, workers=None,
+                      shard_bytes=PARSE_SHARD_BYTES):
+    """用进程池解析若干原始 NDJSON 文件，再按文件和分片的顺序合并
+
+    每个分片在子进程中把 JSON 转换成行数据，父进程只做合并和 id 分配，
+    结果与按同样顺序调用 process_papers_data 完全相同。workers=1 时不启动子进程。
+    """
+    print("\nProcessing papers data...")
+    shards = raw_shards(paths, shard_bytes)
+    workers = workers or os.cpu_count() or 1
+    print(f"  {len(paths)} raw file(s), {len(shards)} shard(s), {min(workers, len(shards))} parse process(es)")
+
+    if workers == 1 or len(shards) <= 1:
+        parts = [parse_shard(shard) for shard in shards]
+    else:
+        # map 按提交顺序返回结果，保证合并顺序与完成顺序无关
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(parse_shard, shards))
+    print(f"  Parsed {sum(len(part['papers']['PaperId']) for part in parts)} papers "
+          f"({sum(part['errors'] for part in parts)} errors)")
+    return merge_parsed(parts, author_id_map, paper_id_map)
+
+def save_data(papers_df, authors_df, paper_authors_df, citations_df, author_id_map=None,
+              paper_id_map=None):
+    """保存处理后的数据（CSV + 带类型的 Arrow IPC 文件）"""
     
     print("\nSaving processed data...")
     
-    papers_df.to_csv('data/processed/papers.csv', index=False)
+    write_table(papers_df, 'papers')
     print(f"  ✓ papers.csv: {len(papers_df)} rows")
     
-    authors_df.to_csv('data/processed/authors.csv', index=False)
+    write_table(authors_df, 'authors')
     print(f"  ✓ authors.csv: {len(authors_df)} rows")
     
-    paper_authors_df.to_csv('data/processed/paper_author_affiliations.csv', index=False)
+    write_table(paper_authors_df, 'paper_author_affiliations')
     print(f"  ✓ paper_author_affiliations.csv: {len(paper_authors_df)} rows")
     
-    citations_df.to_csv('data/processed/paper_references.csv', index=False)
+    write_table(citations_df, 'paper_references')
     print(f"  ✓ paper_references.csv: {len(citations_df)} rows")
     
+    if author_id_map is not None:
+        save_author_id_map(author_id_map)
+    if paper_id_map is not None:
+        save_paper_id_map(paper_id_map)
+    
     # 打印统计信息
     print("\nData Statistics:")
     print(f"  Papers: {len(papers_df)}")
@@ -214,40 +541,125 @@ def save_data(papers_df, authors_df, paper_authors_df, citations_df):
     print(f"  Citations: {len(citations_df)}")
     print(f"  Years: {papers_df['Year'].min()} - {papers_df['Year'].max()}")
 
+def download_ucsd(args):
+    """Step 1-2（默认）：下载 UCSD 的论文，返回 (原始文件列表, 增量更新状态)"""
+    # 1. 获取 UCSD ID
+    print("\n[Step 1] Finding UCSD institution ID...")
+    ucsd_id = get_ucsd_institution_id()
+    print(f"✓ Using UCSD ID: {ucsd_id}")
+    
+    # 2. 下载论文数据（直接写入 NDJSON，支持断点续传）
+    print("\n[Step 2] Downloading papers...")
+    downloaded = download_ucsd_papers(
+        ucsd_id, args.start_year, args.end_year,
+        max_papers=args.max_papers,
+        workers=args.workers,
+        rate=args.rate,
+        resume=not args.fresh,
+    )
+    print(f"✓ Downloaded {downloaded} papers to {RAW_PAPERS_PATH}")
+    
+    state = {
+        'institution_id': ucsd_id,
+        'start_year': args.start_year,
+        'end_year': args.end_year,
+    }
+    return ([RAW_PAPERS_PATH] if downloaded else []), state
+
+
+def download_job(args):
+    """Step 1-2（--job）：解析机构并按机构并发下载，返回 (原始文件列表, 增量更新状态)"""
+    job = load_job(args.job)
+    client = OpenAlexClient(BASE_URL, rate=args.rate)
+
+    # 1. 解析机构 id（同一机构写了多次时只下载一次，保持任务中的顺序）
+    print(f"\n[Step 1] Resolving {len(job['institutions'])} institution(s)...")
+    institution_ids = list(dict.fromkeys(resolve_institution(client, entry) for entry in job['institutions']))
+    print(f"✓ Institutions: {', '.join(institution_ids)}")
+
+    # 2. 按机构并发下载，每个机构一个 NDJSON
+    print(f"\n[Step 2] Downloading papers ({job['start_year']}-{job['end_year']}"
+          f"{', field ' + job['field'] if job['field'] else ''})...")
+    counts = download_institutions(
+        client, job, institution_ids,
+        institution_workers=args.institution_workers,
+        workers=args.workers,
+        resume=not args.fresh,
+    )
+    print(f"✓ Downloaded {sum(counts.values())} papers to {INSTITUTIONS_RAW_DIR}/")
+
+    # 按任务中的机构顺序合并，结果与下载完成的先后无关
+    raw_paths = [institution_paths(inst_id)[0] for inst_id in institution_ids if counts[inst_id]]
+    state = {
+        'institution_id': institution_ids[0],
+        'institution_ids': institution_ids,
+        'field': job['field'],
+        'start_year': job['start_year'],
+        'end_year': job['end_year'],
+    }
+    return raw_paths, state
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Download UCSD (or --job institutions) papers from OpenAlex')
+    parser.add_argument('--base-url', default=None,
+                        help='OpenAlex API base URL (default: $OPENALEX_BASE_URL or the public API)')
+    parser.add_argument('--start-year', type=int, default=2020)
+    parser.add_argument('--end-year', type=int, default=2025)
+    parser.add_argument('--max-papers', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4, help='concurrent fetch threads')
+    parser.add_argument('--rate', type=float, default=8, help='max requests per second')
+    parser.add_argument('--fresh', action='store_true',
+                        help='discard the checkpoint and download from scratch')
+    parser.add_argument('--job', default=None,
+                        help='JSON job spec (institutions, start_year, end_year, field, max_papers); '
+                             'replaces the UCSD-only download')
+    parser.add_argument('--institution-workers', type=int, default=4,
+                        help='institutions fetched concurrently (--job only)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='processes that parse raw works (default: CPU count, 1 = no subprocesses)')
+    return parser.parse_args()
+
+
 def main():
+    global BASE_URL
+    args = parse_args()
+    if args.base_url:
+        BASE_URL = args.base_url.rstrip('/')
+
     print("=" * 70)
     print("SciSciNet Data Downloader for UCSD")
     print("=" * 70)
     
+    # 创建数据目录（只在运行脚本时创建，导入本模块没有副作用）
+    os.makedirs('data/raw', exist_ok=True)
+    os.makedirs('data/processed', exist_ok=True)
+
+    # 本次同步的起始日期，完成后作为增量更新的水位线
+    started_on = datetime.utcnow().date().isoformat()
+    
     try:
-        # 1. 获取 UCSD ID
-        print("\n[Step 1] Finding UCSD institution ID...")
-        ucsd_id = get_ucsd_institution_id()
-        print(f"✓ Using UCSD ID: {ucsd_id}")
-        
-        # 2. 下载论文数据
-        print("\n[Step 2] Downloading papers...")
-        papers = download_ucsd_papers(ucsd_id, 2020, 2025, max_papers=1000)
-        print(f"✓ Downloaded {len(papers)} papers")
-        
-        if len(papers) == 0:
+        if args.job:
+            raw_paths, refresh_state = download_job(args)
+        else:
+            raw_paths, refresh_state = download_ucsd(args)
+        if not raw_paths:
             print("\n❌ No papers downloaded. Please check:")
             print("  1. Internet connection")
             print("  2. OpenAlex API is accessible")
             return
         
-        # 保存原始数据
-        print("\nSaving raw data...")
-        with open('data/raw/ucsd_papers.json', 'w') as f:
-            json.dump(papers, f, indent=2)
-        print(f"✓ Saved raw data to data/raw/ucsd_papers.json")
-        
-        # 3. 处理数据
+        # 3. 处理数据：进程池分片解析原始 NDJSON，按顺序合并，沿用已有的作者 id 和论文整数 id
         print("\n[Step 3] Processing data...")
-        papers_df, authors_df, paper_authors_df, citations_df = process_papers_data(papers)
+        author_id_map = load_author_id_map()
+        paper_id_map = load_paper_id_map()
+        papers_df, authors_df, paper_authors_df, citations_df = process_raw_files(
+            raw_paths, author_id_map, paper_id_map, workers=args.parse_workers
+        )
         
         # 4. 保存数据
-        save_data(papers_df, authors_df, paper_authors_df, citations_df)
+        save_data(papers_df, authors_df, paper_authors_df, citations_df, author_id_map, paper_id_map)
+        save_refresh_state({'watermark': started_on, **refresh_state})
         
         print("\n" + "=" * 70)
         print("✅ Data download and processing complete!")
@@ -263,4 +675,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
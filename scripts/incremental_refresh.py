@@ -0,0 +1,335 @@
+# incremental_refresh.py
+# 增量更新：只下载上次同步之后更新过的论文，合并进处理后的表，
+# 并按差量修补 author_network.json / citation_network.json，而不是全部重建。
+import argparse
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import build_author_network as author_builder
+import build_citation_network as citation_builder
+import download_data
+import network_layout
+import network_levels
+import network_metrics
+from openalex_client import OpenAlexClient, fetch_works, iter_ndjson
+from paper_ids import add_paper_index, load_paper_id_map
+from table_io import read_table
+
+DATA_DIR = 'data/processed'
+UPDATES_DIR = 'data/raw/updates'
+
+TABLE_COLUMNS = {
+    'papers': ['PaperId', 'Title', 'Year', 'CitationCount', 'FieldsOfStudy', 'PaperIdx'],
+    'authors': ['AuthorId', 'DisplayName', 'OpenAlexId'],
+    'paper_authors': ['PaperId', 'AuthorId', 'AuthorSequenceNumber', 'PaperIdx'],
+    'references': ['PaperId', 'PaperReferenceId', 'PaperIdx', 'PaperReferenceIdx'],
+}
+
+
+def with_columns(df, name):
+    """process_papers_data 在没有数据时返回没有列的空表，这里补齐列名"""
+    if df.empty:
+        return pd.DataFrame(columns=TABLE_COLUMNS[name])
+    return df
+
+
+def load_tables(paper_id_map, data_dir=DATA_DIR):
+    """读取处理后的表，旧版 CSV 缺少的整数 id 列用 paper_id_map 补上"""
+    return {
+        'papers': add_paper_index(read_table('papers', data_dir), paper_id_map),
+        'authors': read_table('authors', data_dir),
+        'paper_authors': add_paper_index(read_table('paper_author_affiliations', data_dir), paper_id_map),
+        'references': add_paper_index(read_table('paper_references', data_dir), paper_id_map),
+    }
+
+
+def fetch_updates(client, state, since, output_path, state_path, workers):
+    """下载 since 之后更新过的论文（全量下载时的机构、年份和领域），返回下载数量"""
+    institution_ids = [
+        download_data.openalex_key(inst_id)
+        for inst_id in state.get('institution_ids') or [state['institution_id']]
+    ]
+    shards = {
+        str(year): f'publication_year:{year}'
+        for year in range(state['start_year'], state['end_year'] + 1)
+    }
+    return fetch_works(
+        client,
+        filters=f"{download_data.works_filter(institution_ids, state.get('field'))},from_updated_date:{since}",
+        shards=shards,
+        output_path=output_path,
+        state_path=state_path,
+        workers=workers,
+        select=download_data.WORK_FIELDS + ',updated_date',
+    )
+
+
+def merge_tables(old, delta):
+    """用更新的论文替换旧记录：论文、论文-作者关系和引用关系按 PaperIdx 整篇替换，
+    作者按 AuthorId 更新"""
+    changed = set(delta['papers']['PaperIdx'])
+
+    def replace(name):
+        kept = old[name][~old[name]['PaperIdx'].isin(changed)]
+        return pd.concat([kept, delta[name]], ignore_index=True)
+
+    authors = pd.concat([
+        old['authors'][~old['authors']['AuthorId'].isin(delta['authors']['AuthorId'])],
+        delta['authors'],
+    ], ignore_index=True).sort_values('AuthorId', kind='stable').reset_index(drop=True)
+
+    return {
+        'papers': replace('papers'),
+        'authors': authors,
+        'paper_authors': replace('paper_authors'),
+        'references': replace('references'),
+    }, changed
+
+
+def affected_papers(old_selected, new_selected, changed):
+    """需要重新计算贡献的论文：本次更新的论文 + 筛选结果发生变化的论文"""
+    old_ids = set(old_selected['PaperIdx'])
+    new_ids = set(new_selected['PaperIdx'])
+    return set(changed) | (old_ids ^ new_ids), old_ids, new_ids
+
+
+def patch_author_network(network, old, new, changed, engine, max_authors, hyper_author_mode):
+    """按差量更新作者网络
+
+    受影响论文的旧合作关系从边权中减去，新合作关系加上；
+    未受影响节点上已有的其他属性（如布局坐标）原样保留。
+    """
+    old_selected = author_builder.filter_papers(old['papers'])
+    new_selected = author_builder.filter_papers(new['papers'])
+    affected, old_ids, new_ids = affected_papers(old_selected, new_selected, changed)
+
+    old_rows = old['paper_authors'][old['paper_authors']['PaperIdx'].isin(affected & old_ids)]
+    new_rows = new['paper_authors'][new['paper_authors']['PaperIdx'].isin(affected & new_ids)]
+
+    build_edges = author_builder.EDGE_ENGINES[engine]
+    added = build_edges(new_rows, max_authors, hyper_author_mode)
+    removed = build_edges(old_rows, max_authors, hyper_author_mode)
+    removed['weight'] = -removed['weight']
+    print(f"  Affected papers: {len(affected)} (+{len(added)} / -{len(removed)} edge contributions)")
+
+    links_df = pd.DataFrame(network['links'], columns=['source', 'target', 'weight'])
+    links_df['source'] = links_df['source'].astype(int)
+    links_df['target'] = links_df['target'].astype(int)
+
+    edges = (
+        pd.concat([links_df, added, removed], ignore_index=True)
+        .groupby(['source', 'target'], as_index=False)['weight'].sum()
+    )
+    edges = edges[edges['weight'] > 1e-9].sort_values(['source', 'target'])
+
+    weights = edges['weight'].round(4)
+    integral = (weights == weights.round()).all()
+    links = [
+        {'source': str(source), 'target': str(target), 'weight': int(weight) if integral else float(weight)}
+        for source, target, weight in zip(edges['source'].tolist(), edges['target'].tolist(), weights.tolist())
+    ]
+
+    # 受影响作者的名字和论文数重新计算，其余节点保持不变
+    author_ids = set(edges['source']) | set(edges['target'])
+    touched = set(old_rows['AuthorId']) | set(new_rows['AuthorId'])
+    existing = {int(node['id']): node for node in network['nodes']}
+    recompute = {a for a in author_ids if a in touched or a not in existing}
+
+    selected_rows = new['paper_authors'][
+        new['paper_authors']['AuthorId'].isin(recompute) & new['paper_authors']['PaperIdx'].isin(new_ids)
+    ]
+    fresh = {int(node['id']): node for node in author_builder.build_nodes(new['authors'], selected_rows, recompute)}
+
+    nodes = []
+    for author_id in sorted(author_ids):
+        if author_id in fresh:
+            node = dict(existing.get(author_id, {}))
+            node.update(fresh[author_id])
+            nodes.append(node)
+        elif author_id in existing:
+            nodes.append(existing[author_id])
+
+    metadata = dict(network.get('metadata', {}))
+    metadata.update({
+        'total_papers': len(new_selected),
+        'total_authors': len(nodes),
+        'total_collaborations': len(links),
+        'year_range': f"{int(new_selected['Year'].min())}-{int(new_selected['Year'].max())}"
+    })
+    return {'nodes': nodes, 'links': links, 'metadata': metadata}
+
+
+def patch_citation_network(network, old, new, changed):
+    """按差量更新引用网络：只重建受影响论文的节点以及与它们相关的引用边"""
+    old_selected = author_builder.filter_papers(old['papers'])
+    new_selected = author_builder.filter_papers(new['papers'])
+    affected, old_ids, new_ids = affected_papers(old_selected, new_selected, changed)
+    references = new['references']
+
+    # 网络 JSON 中的节点用字符串 id，这里把整数 id 集合换成字符串
+    papers = pd.concat([old['papers'], new['papers']], ignore_index=True)
+    affected_ids = set(papers.loc[papers['PaperIdx'].isin(affected), 'PaperId'].astype(str))
+    selected_ids = set(new_selected['PaperId'].astype(str))
+
+    # 节点：保留未受影响的节点，重建受影响且仍被选中的论文
+    nodes = [node for node in network['nodes']
+             if node['id'] not in affected_ids and node['id'] in selected_ids]
+    nodes += citation_builder.build_nodes(new_selected[new_selected['PaperIdx'].isin(affected)])
+
+    # 边：来源未受影响且目标仍被选中的旧边保持不变
+    links = [link for link in network['links']
+             if link['source'] not in affected_ids and link['target'] in selected_ids]
+
+    # 受影响论文引用出去的边
+    outgoing = references[
+        references['PaperIdx'].isin(affected & new_ids) &
+        references['PaperReferenceIdx'].isin(new_ids)
+    ]
+    # 未受影响论文引用新加入网络的论文的边
+    joined = (affected & new_ids) - old_ids
+    incoming = references[
+        references['PaperReferenceIdx'].isin(joined) &
+        references['PaperIdx'].isin(new_ids - affected)
+    ]
+    links += citation_builder.build_links(outgoing) + citation_builder.build_links(incoming)
+
+    metadata = dict(network.get('metadata', {}))
+    metadata.update(citation_builder.build_metadata(new_selected, links))
+    return {'nodes': nodes, 'links': links, 'metadata': metadata}
+
+
+def refresh_metrics(network, directed):
+    """网络之前计算过节点指标时重新计算，避免新节点缺少指标、旧节点的指标过期"""
+    if 'metrics' in network.get('metadata', {}):
+        network_metrics.attach_metrics(network, directed)
+        print(f"  Recomputed node metrics ({len(network['nodes'])} nodes)")
+    return network
+
+
+def refresh_layout(network, directed):
+    """网络之前计算过布局时，以已有坐标为起点做增量布局，只给新节点找位置并小幅调整"""
+    if 'layout' in network.get('metadata', {}):
+        network_layout.attach_layout(network, directed, incremental=True)
+        info = network['metadata']['layout']
+        print(f"  Re-laid out {len(network['nodes'])} nodes ({info['seeded_nodes']} seeded from previous coordinates)")
+    return network
+
+
+def refresh_levels(author_network, data_dir=DATA_DIR):
+    """已经生成过多分辨率层级时，按更新后的作者网络重建"""
+    if os.path.exists(os.path.join(data_dir, network_levels.OUTPUT_FILE)):
+        network_levels.save_levels(network_levels.build_levels(author_network), data_dir)
+
+
+def load_network(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fetch works updated since the last run and patch the networks')
+    parser.add_argument('--since', default=None,
+                        help='override the stored watermark (YYYY-MM-DD)')
+    parser.add_argument('--base-url', default=None)
+    parser.add_argument('--api-key', default=None,
+                        help='OpenAlex API key (from_updated_date requires one on the public API)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=8)
+    parser.add_argument('--engine', choices=sorted(author_builder.EDGE_ENGINES),
+                        default=author_builder.DEFAULT_ENGINE)
+    parser.add_argument('--max-authors', type=int, default=None)
+    parser.add_argument('--hyper-author-mode', choices=['skip', 'downweight'], default='skip')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print("=" * 70)
+    print("SciSciNet Incremental Refresh")
+    print("=" * 70)
+
+    state = download_data.load_refresh_state()
+    since = args.since or state.get('watermark')
+    if not since or 'institution_id' not in state:
+        print("\n❌ No refresh state found. Run download_data.py once for a full download,")
+        print("   or pass --since YYYY-MM-DD after a full download.")
+        exit(1)
+
+    started_on = datetime.utcnow().date().isoformat()
+    os.makedirs(UPDATES_DIR, exist_ok=True)
+    updates_path = f"{UPDATES_DIR}/works_since_{since}.ndjson"
+    updates_state_path = f"{UPDATES_DIR}/works_since_{since}.state.json"
+
+    print(f"\n[Step 1] Fetching works updated since {since}...")
+    client = OpenAlexClient(args.base_url, rate=args.rate, api_key=args.api_key)
+    fetched = fetch_updates(client, state, since, updates_path, updates_state_path, args.workers)
+    print(f"✓ Fetched {fetched} updated works")
+
+    if fetched:
+        print("\n[Step 2] Processing updated works...")
+        author_id_map = download_data.load_author_id_map()
+        paper_id_map = load_paper_id_map()
+        delta_frames = download_data.process_papers_data(iter_ndjson(updates_path), author_id_map, paper_id_map)
+        delta = {
+            name: with_columns(df, name)
+            for name, df in zip(['papers', 'authors', 'paper_authors', 'references'], delta_frames)
+        }
+
+        print("\n[Step 3] Merging into processed tables...")
+        old = load_tables(paper_id_map, DATA_DIR)
+        new, changed = merge_tables(old, delta)
+        new_papers = len(changed - set(old['papers']['PaperIdx']))
+        print(f"  Updated papers: {len(changed) - new_papers}, new papers: {new_papers}")
+        download_data.save_data(new['papers'], new['authors'], new['paper_authors'],
+                                new['references'], author_id_map, paper_id_map)
+
+        print("\n[Step 4] Patching networks...")
+        author_network = load_network(f"{DATA_DIR}/author_network.json")
+        if author_network is None:
+            print("  No author network yet, building from scratch")
+            author_network = author_builder.build_network(
+                author_builder.filter_papers(new['papers']), new['authors'], new['paper_authors'],
+                engine=args.engine, max_authors=args.max_authors, hyper_author_mode=args.hyper_author_mode,
+            )
+        else:
+            author_network = patch_author_network(
+                author_network, old, new, changed,
+                args.engine, args.max_authors, args.hyper_author_mode,
+            )
+        refresh_metrics(author_network, network_metrics.DIRECTED['author'])
+        refresh_layout(author_network, network_metrics.DIRECTED['author'])
+        author_builder.save_network(author_network, DATA_DIR)
+        refresh_levels(author_network)
+
+        citation_network = load_network(f"{DATA_DIR}/citation_network.json")
+        if citation_network is None:
+            print("  No citation network yet, building from scratch")
+            citation_network = citation_builder.build_network(
+                citation_builder.filter_papers(new['papers']), new['references']
+            )
+        else:
+            citation_network = patch_citation_network(citation_network, old, new, changed)
+        refresh_metrics(citation_network, network_metrics.DIRECTED['citation'])
+        refresh_layout(citation_network, network_metrics.DIRECTED['citation'])
+        citation_builder.save_network(citation_network, DATA_DIR)
+
+    # 全部完成后才推进水位线，失败时下次会重新处理这段时间的更新
+    state['watermark'] = started_on
+    download_data.save_refresh_state(state)
+    for path in (updates_path, updates_state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    print("\n" + "=" * 70)
+    print(f"✅ Incremental refresh complete, next run will fetch updates since {started_on}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
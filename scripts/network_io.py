@@ -0,0 +1,420 @@
+# network_io.py
+# 网络文件的读写：网络 JSON 之外再写一份列式二进制文件 (.bin)，
+# 节点属性和边的 source/target/weight 都是定长数组，API 用 np.memmap 直接打开，
+# 不需要解析 JSON，多个 worker 进程共享同一份页缓存。
+#
+#   python network_io.py            # 把 data/processed 下已有的网络 JSON 转成 .bin
+#   python network_io.py --data-dir DIR
+#
+# 文件结构：
+#   MAGIC (8 字节) | 头部长度 (uint32, 小端) | 头部 JSON (UTF-8) | 按 64 字节对齐的数组
+# 头部记录节点数、边数、metadata，以及每一列的类型和各个数组在文件中的位置。
+import argparse
+import json
+import os
+import struct
+from functools import cached_property
+
+import numpy as np
+
+DATA_DIR = 'data/processed'
+
+NETWORK_FILES = ('author_network.json', 'citation_network.json')
+
+MAGIC = b'SSNET\x00\x00\x01'
+FORMAT_VERSION = 1
+
+# 每个数组的起始位置按 64 字节对齐（缓存行大小），视图可以直接按 dtype 读取
+ALIGNMENT = 64
+
+# 整数列优先用 int32，超出范围时用 int64
+INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+# 分批转换成记录时每批的行数
+RECORD_BATCH = 4096
+
+# 某一行没有该字段
+MISSING = object()
+
+
+def binary_path(json_path):
+    """网络 JSON 对应的二进制文件路径"""
+    return os.path.splitext(json_path)[0] + '.bin'
+
+
+def network_path(json_path):
+    """实际读取的文件：二进制文件存在且不比 JSON 旧时用二进制文件，否则用 JSON"""
+    bin_path = binary_path(json_path)
+    if os.path.exists(bin_path):
+        if not os.path.exists(json_path) or os.path.getmtime(bin_path) >= os.path.getmtime(json_path):
+            return bin_path
+    return json_path
+
+
+def save_network(network, path, indent=2):
+    """写网络 JSON，并在旁边写一份二进制文件（二进制文件后写，mtime 不早于 JSON）
+
+    网络无法用二进制格式表示（有端点不在节点中的边）时只写 JSON，
+    并删除旧的二进制文件，API 改为读取 JSON。
+    """
+    with open(path, 'w') as f:
+        json.dump(network, f, indent=indent)
+    try:
+        write_binary(network, binary_path(path))
+    except ValueError as e:
+        remove_binary(path)
+        print(f"  ⚠ {os.path.basename(binary_path(path))} not written: {e}")
+
+
+def remove_binary(json_path):
+    """删除网络 JSON 旁边的二进制文件（不存在时什么也不做）"""
+    try:
+        os.remove(binary_path(json_path))
+    except FileNotFoundError:
+        pass
+
+
+def column_kind(values):
+    """一列 Python 值 -> (kind, dtype)：number / bool / string / json
+
+    整数和浮点数混在一列时用 json，读回时 2 仍是 2 而不是 2.0，序列化结果与 JSON 相同。
+    """
+    present = [v for v in values if v is not MISSING]
+    if present and all(isinstance(v, bool) for v in present):
+        return 'bool', '|b1'
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        if not present or INT32_RANGE[0] <= min(present) and max(present) <= INT32_RANGE[1]:
+            return 'number', '<i4'
+        if -(1 << 63) <= min(present) and max(present) < (1 << 63):
+            return 'number', '<i8'
+        return 'json', None
+    if all(isinstance(v, float) for v in present):
+        return 'number', '<f8'
+    if all(isinstance(v, str) for v in present):
+        return 'string', None
+    return 'json', None
+
+
+class BinaryWriter:
+    """依次追加对齐的数组，记录每个数组的 (offset, dtype, count)"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def add(self, array):
+        array = np.ascontiguousarray(array)
+        padding = -self.size % ALIGNMENT
+        if padding:
+            self.parts.append(b'\x00' * padding)
+            self.size += padding
+        buffer = {'offset': self.size, 'dtype': array.dtype.str, 'count': int(array.size)}
+        self.parts.append(array.tobytes())
+        self.size += array.nbytes
+        return buffer
+
+    def add_strings(self, strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return {
+            'offsets': self.add(offsets),
+            'data': self.add(np.frombuffer(b''.join(encoded), dtype=np.uint8)),
+        }
+
+
+def encode_columns(writer, records, section, skip=()):
+    """一组记录按字段拆成列，字段顺序为首次出现的顺序"""
+    names = []
+    seen = set(skip)
+    for record in records:
+        for name in record:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    columns = []
+    for name in names:
+        values = [record.get(name, MISSING) for record in records]
+        kind, dtype = column_kind(values)
+        column = {'section': section, 'name': name, 'kind': kind}
+        mask = np.fromiter((v is not MISSING for v in values), dtype=bool, count=len(values))
+        if not mask.all():
+            column['mask'] = writer.add(mask)
+        if kind in ('number', 'bool'):
+            fill = False if kind == 'bool' else 0
+            column['data'] = writer.add(np.asarray([fill if v is MISSING else v for v in values], dtype=dtype))
+        elif kind == 'string':
+            column.update(writer.add_strings(['' if v is MISSING else v for v in values]))
+        else:
+            column.update(writer.add_strings([
+                'null' if v is MISSING else json.dumps(v, ensure_ascii=False, separators=(',', ':'))
+                for v in values
+            ]))
+        columns.append(column)
+    return columns
+
+
+def encode_binary(network):
+    """网络 dict（或 BinaryNetwork）-> 二进制文件的字节
+
+    边的 source/target 保存为节点下标 (int32)。有端点不在节点中的边时抛出 ValueError：
+    这些边无法表示，丢掉它们会让二进制文件与 JSON 的内容不一致。
+    """
+    if isinstance(network, BinaryNetwork):
+        return network.to_bytes()
+    nodes, links = network['nodes'], network['links']
+    writer = BinaryWriter()
+    position = {str(node['id']): i for i, node in enumerate(nodes)}
+
+    sources = np.fromiter((position.get(str(link['source']), -1) for link in links), dtype='<i4', count=len(links))
+    targets = np.fromiter((position.get(str(link['target']), -1) for link in links), dtype='<i4', count=len(links))
+    dangling = int(((sources < 0) | (targets < 0)).sum())
+    if dangling:
+        raise ValueError(f"{dangling} links reference nodes that are not in the network")
+
+    columns = encode_columns(writer, nodes, 'nodes')
+    link_columns = [
+        {'section': 'links', 'name': 'source', 'kind': 'node', 'data': writer.add(sources)},
+        {'section': 'links', 'name': 'target', 'kind': 'node', 'data': writer.add(targets)},
+    ] + encode_columns(writer, links, 'links', skip=('source', 'target'))
+    # 边的字段按原来的顺序排列（source、target 通常在最前）
+    order = {name: i for i, name in enumerate(links[0])} if links else {}
+    columns.extend(sorted(link_columns, key=lambda c: order.get(c['name'], len(order))))
+
+    header = json.dumps({
+        'format': FORMAT_VERSION,
+        'nodes': len(nodes),
+        'links': len(links),
+        'metadata': network.get('metadata', {}),
+        'columns': columns,
+    }, ensure_ascii=False).encode('utf-8')
+
+    # 数组的偏移量从数据区开始计算，数据区起点同样按 ALIGNMENT 对齐
+    prefix = len(MAGIC) + 4 + len(header)
+    padding = -prefix % ALIGNMENT
+    return b''.join([MAGIC, struct.pack('<I', len(header)), header, b'\x00' * padding] + writer.parts)
+
+
+def write_binary(network, path):
+    """写网络的二进制文件"""
+    body = encode_binary(network)
+    # 先写临时文件再替换，正在内存映射旧文件的进程不受影响
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+class Column:
+    """二进制文件中的一列，values(rows) 返回 Python 值列表（缺失为 MISSING）"""
+
+    def __init__(self, network, spec):
+        self.name = spec['name']
+        self.kind = spec['kind']
+        self.mask = network.array(spec['mask']) if 'mask' in spec else None
+        self.data = network.array(spec['data'])
+        self.offsets = network.array(spec['offsets']) if 'offsets' in spec else None
+
+    def raw(self, rows):
+        if self.offsets is None:
+            return self.data[rows].tolist()
+        if len(rows) == 0:
+            return []
+        starts, ends = self.offsets[rows].tolist(), self.offsets[rows + 1].tolist()
+        # 行号集中（如按顺序遍历）时一次复制整段字节，再在内存中切分
+        first, last = int(rows.min()), int(rows.max())
+        if last - first < 4 * len(rows):
+            base = int(self.offsets[first])
+            blob = bytes(self.data[base:int(self.offsets[last + 1])])
+            strings = [blob[s - base:e - base].decode('utf-8') for s, e in zip(starts, ends)]
+        else:
+            strings = [bytes(self.data[s:e]).decode('utf-8') for s, e in zip(starts, ends)]
+        if self.kind == 'json':
+            return [json.loads(s) for s in strings]
+        return strings
+
+    def values(self, rows):
+        values = self.raw(rows)
+        if self.mask is not None:
+            present = self.mask[rows].tolist()
+            values = [v if p else MISSING for v, p in zip(values, present)]
+        return values
+
+
+class RecordList:
+    """节点或边的只读记录序列
+
+    长度直接来自头部；按下标或切片取记录时才从数组转换出对应的 dict，
+    所以只需要计数或只取少量记录时不会转换整个网络。
+    """
+
+    def __init__(self, network, section):
+        self.network = network
+        self.section = section
+        self.count = network.header[section]
+
+    def __len__(self):
+        return self.count
+
+    def take(self, rows):
+        """rows（下标数组）对应的记录列表"""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = self.network.columns[self.section]
+        values = [column.values(rows) for column in columns]
+        if self.section == 'links':
+            ids = self.network.node_ids
+            values = [[ids[i] for i in v] if column.kind == 'node' else v
+                      for column, v in zip(columns, values)]
+        names = [column.name for column in columns]
+        if all(column.mask is None for column in columns):
+            return [dict(zip(names, row)) for row in zip(*values)] if names else [{} for _ in rows]
+        return [{name: v for name, v in zip(names, row) if v is not MISSING} for row in zip(*values)]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(np.arange(self.count)[key])
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError(key)
+        return self.take([key])[0]
+
+    def __iter__(self):
+        for start in range(0, self.count, RECORD_BATCH):
+            yield from self.take(np.arange(start, min(start + RECORD_BATCH, self.count)))
+
+
+class BinaryNetwork:
+    """用 np.memmap 打开的网络二进制文件
+
+    可以像网络 JSON 的 dict 一样使用：network['nodes']、network['links'] 是
+    RecordList，network.get('metadata') 是头部中的 metadata。需要数组时用
+    column(section, name)，边的端点 source/target 是节点下标数组。
+    数组是只读的文件映射视图，不占用进程的私有内存。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a network binary file")
+            (header_size,) = struct.unpack('<I', f.read(4))
+            self.header = json.loads(f.read(header_size).decode('utf-8'))
+        if self.header.get('format') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported format {self.header.get('format')}")
+        prefix = len(MAGIC) + 4 + header_size
+        self.data_start = prefix + (-prefix % ALIGNMENT)
+        size = os.path.getsize(path)
+        self.buffer = (np.memmap(path, dtype=np.uint8, mode='r')
+                       if size > self.data_start else np.zeros(0, dtype=np.uint8))
+
+        self.columns = {'nodes': [], 'links': []}
+        for spec in self.header['columns']:
+            self.columns[spec['section']].append(Column(self, spec))
+        self.metadata = self.header.get('metadata', {})
+
+    def array(self, buffer):
+        dtype = np.dtype(buffer['dtype'])
+        start = self.data_start + buffer['offset']
+        return self.buffer[start:start + dtype.itemsize * buffer['count']].view(dtype)
+
+    def has_column(self, section, name):
+        return any(column.name == name for column in self.columns[section])
+
+    def column(self, section, name):
+        """某一列，不存在时抛出 KeyError"""
+        for column in self.columns[section]:
+            if column.name == name:
+                return column
+        raise KeyError(name)
+
+    def numbers(self, section, name, default=0):
+        """数值列的数组（缺失值为 default），没有这一列时全部为 default"""
+        if not self.has_column(section, name):
+            return np.full(self.header[section], default, dtype=float)
+        column = self.column(section, name)
+        if column.kind not in ('number', 'bool'):
+            values = column.values(np.arange(self.header[section]))
+            return np.asarray([v if isinstance(v, (int, float)) else default for v in values], dtype=float)
+        values = np.asarray(column.data, dtype=float)
+        if column.mask is not None:
+            values = np.where(column.mask, values, default)
+        return values
+
+    @cached_property
+    def node_ids(self):
+        """节点 id 列表（第一次使用时从文件中解码）"""
+        if not self.has_column('nodes', 'id'):
+            return list(range(self.header['nodes']))
+        return self.column('nodes', 'id').raw(np.arange(self.header['nodes']))
+
+    @property
+    def source(self):
+        return self.column('links', 'source').data
+
+    @property
+    def target(self):
+        return self.column('links', 'target').data
+
+    def to_bytes(self):
+        """整个文件的字节（与打开时映射的内容一致）"""
+        return bytes(self.buffer) if len(self.buffer) else encode_binary(self.to_json())
+
+    def keys(self):
+        return ('nodes', 'links', 'metadata')
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __getitem__(self, key):
+        if key == 'metadata':
+            return self.metadata
+        if key in ('nodes', 'links'):
+            return RecordList(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.keys() else default
+
+    def to_json(self):
+        """转换成与网络 JSON 相同结构的 dict"""
+        return {
+            'nodes': list(self['nodes']),
+            'links': list(self['links']),
+            'metadata': self.metadata,
+        }
+
+
+def as_json(network):
+    """网络 dict 或 BinaryNetwork -> 网络 dict"""
+    return network.to_json() if isinstance(network, BinaryNetwork) else network
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert network JSON files to the binary network format')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    print(f"Converting network JSON files in {args.data_dir}...")
+    for name in NETWORK_FILES:
+        path = os.path.join(args.data_dir, name)
+        if not os.path.exists(path):
+            print(f"  - {name} not found, skipped")
+            continue
+        with open(path, 'r') as f:
+            network = json.load(f)
+        try:
+            write_binary(network, binary_path(path))
+        except ValueError as e:
+            remove_binary(path)
+            print(f"  - {name}: {e}, skipped (the API reads the JSON)")
+            continue
+        print(f"  ✓ {os.path.basename(binary_path(path))}: {len(network['nodes'])} nodes, "
+              f"{len(network['links'])} links, {os.path.getsize(binary_path(path)) / 1e6:.2f} MB "
+              f"(json {os.path.getsize(path) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
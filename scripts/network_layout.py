@@ -0,0 +1,288 @@
+# network_layout.py
+# 力导向布局：在服务端预先计算两个网络的二维坐标，写成节点的 x / y 属性，
+# 前端可以直接绘制，不必在浏览器里从头跑力模拟。
+# 使用向量化的 Fruchterman-Reingold：节点数不多时精确计算所有点对的斥力，
+# 节点多时用网格近似（远处的格子按质心计算，近处按相邻格子的质心计算），
+# 并先对社区合并后的粗图布局，再把节点放到所属社区的位置附近细化（多层布局）。
+#
+#   python network_layout.py                       # 两个网络都重新布局
+#   python network_layout.py --incremental         # 以已有坐标为起点，只做少量迭代
+import argparse
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+import network_io
+from network_levels import coarsen
+from network_metrics import DIRECTED, NETWORK_FILES, adjacency
+
+DATA_DIR = 'data/processed'
+
+# 理想边长（与 D3 forceLink 的默认距离相同，单位为像素）
+LINK_DISTANCE = 30.0
+ITERATIONS = 200
+# 节点数不超过该值时精确计算所有点对的斥力
+EXACT_LIMIT = 1500
+# 精确斥力按块计算，每块的点对数上限
+PAIR_BLOCK = 1 << 22
+# 把节点拉向原点的力，防止不连通的分量相互推远
+GRAVITY = 1.0
+# 已有坐标的节点比例达到该值时做增量布局
+INCREMENTAL_FRACTION = 0.5
+# 增量布局的起始温度（理想边长的倍数）：力模拟不会完全静止，
+# 温度为 k 时没有变化的节点也会抖动将近一个边长
+INCREMENTAL_TEMPERATURE = 0.25
+# 多层布局：粗图的节点数至少减少到原来的该比例才使用
+MULTILEVEL_SHRINK = 0.5
+
+
+def exact_repulsion(pos, k):
+    """所有点对的斥力 k^2 / d（分块计算，内存与块大小有关）
+
+    sum_j (p_i - p_j) / d_ij^2 = p_i * sum_j w_ij - W @ p，其中 w_ij = 1 / d_ij^2，
+    这样每块只需要一个 rows × n 的矩阵和一次矩阵乘法。
+    """
+    n = len(pos)
+    force = np.empty_like(pos)
+    x, y = pos[:, 0], pos[:, 1]
+    rows = max(1, PAIR_BLOCK // max(n, 1))
+    for start in range(0, n, rows):
+        end = min(start + rows, n)
+        dist2 = (x[start:end, None] - x[None, :]) ** 2 + (y[start:end, None] - y[None, :]) ** 2
+        np.maximum(dist2, 1e-4, out=dist2)
+        inverse = np.reciprocal(dist2, out=dist2)
+        inverse[np.arange(end - start), np.arange(start, end)] = 0
+        force[start:end] = pos[start:end] * inverse.sum(axis=1)[:, None] - inverse @ pos
+    return k * k * force
+
+
+def grid_repulsion(pos, k):
+    """网格近似的斥力
+
+    节点按坐标分到 g × g 个格子里，每个格子用质量（节点数）和质心表示。
+    不相邻的格子之间按质心计算斥力，再作用到格子里的每个节点；
+    相邻格子和本格子（去掉节点自己）的斥力按节点的实际坐标到质心计算，
+    距离加上格子大小的平方作软化：格子里的节点实际分散在整个格子中，
+    离质心很近时真实的斥力大部分相互抵消。
+    """
+    n = len(pos)
+    g = int(np.clip(np.sqrt(n / 8), 1, 32))
+    lo, hi = pos.min(axis=0), pos.max(axis=0)
+    size = np.maximum(hi - lo, 1e-9) / g
+    cell_xy = np.minimum(((pos - lo) / size).astype(np.int64), g - 1)
+    cell = cell_xy[:, 0] * g + cell_xy[:, 1]
+    soften = (size ** 2).sum() / 4
+
+    mass = np.bincount(cell, minlength=g * g).astype(float)
+    centroid = np.stack([
+        np.bincount(cell, weights=pos[:, 0], minlength=g * g),
+        np.bincount(cell, weights=pos[:, 1], minlength=g * g),
+    ], axis=1) / np.maximum(mass, 1)[:, None]
+
+    # 远场：格子对格子，只计算非空且不相邻的格子
+    occupied = np.flatnonzero(mass)
+    cx, cy = occupied // g, occupied % g
+    adjacent = (np.abs(cx[:, None] - cx[None, :]) <= 1) & (np.abs(cy[:, None] - cy[None, :]) <= 1)
+    delta = centroid[occupied][:, None, :] - centroid[occupied][None, :, :]
+    dist2 = np.maximum((delta ** 2).sum(axis=2), 1e-4)
+    weight = np.where(adjacent, 0.0, mass[occupied][None, :] / dist2)
+    far = np.zeros((g * g, 2))
+    far[occupied] = k * k * (delta * weight[:, :, None]).sum(axis=1)
+    force = far[cell]
+
+    # 近场：节点对相邻 8 个格子的质心
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            nx, ny = cell_xy[:, 0] + dx, cell_xy[:, 1] + dy
+            inside = (nx >= 0) & (nx < g) & (ny >= 0) & (ny < g)
+            other = np.where(inside, nx * g + ny, 0)
+            m = np.where(inside, mass[other], 0.0)
+            delta = pos - centroid[other]
+            dist2 = (delta ** 2).sum(axis=1) + soften
+            force += k * k * delta * (m / dist2)[:, None]
+
+    # 本格子：节点对同格子其他节点的质心
+    others = mass[cell] - 1
+    other_centroid = (centroid[cell] * mass[cell][:, None] - pos) / np.maximum(others, 1)[:, None]
+    delta = pos - other_centroid
+    dist2 = (delta ** 2).sum(axis=1) + soften
+    force += k * k * delta * (others / dist2)[:, None]
+    return force
+
+
+def initial_positions(matrix, previous, k, rng):
+    """起始坐标：有旧坐标的节点沿用，新节点放在已定位邻居的平均位置附近，否则随机"""
+    n = matrix.shape[0]
+    radius = k * np.sqrt(max(n, 1))
+    pos = rng.uniform(-radius, radius, size=(n, 2))
+    if previous is None:
+        return pos, 0
+
+    known = ~np.isnan(previous).any(axis=1)
+    pos[known] = previous[known]
+    if known.any() and not known.all():
+        # 新节点：已定位邻居坐标的平均值 + 抖动
+        structure = matrix.copy()
+        structure.data = np.ones_like(structure.data)
+        placed = structure @ sparse.diags(known.astype(float))
+        counts = np.asarray(placed.sum(axis=1)).ravel()
+        sums = placed @ np.where(known[:, None], previous, 0.0)
+        has_neighbors = ~known & (counts > 0)
+        pos[has_neighbors] = (sums[has_neighbors] / counts[has_neighbors, None]
+                              + rng.normal(scale=k, size=(has_neighbors.sum(), 2)))
+    return pos, int(known.sum())
+
+
+def multilevel_positions(matrix, iterations, k, seed):
+    """多层布局的起始坐标：社区合并成粗图后递归布局，节点放在所属社区的位置附近
+
+    粗图的一个节点代表多个节点，边长按平均社区大小的平方根放大。
+    返回 (起始坐标, 粗图的边长)，社区划分没有明显减少节点数时返回 (None, k)。
+    """
+    n = matrix.shape[0]
+    labels, coarse = coarsen(matrix, seed=seed)
+    n_coarse = coarse.shape[0]
+    if n_coarse > n * MULTILEVEL_SHRINK:
+        return None, k
+    coarse = (coarse - sparse.diags(coarse.diagonal())).tocsr()
+    coarse.eliminate_zeros()
+    coarse_k = k * np.sqrt(n / n_coarse)
+    coarse_pos, _ = layout(coarse, iterations=iterations, k=coarse_k, seed=seed)
+    rng = np.random.default_rng(seed)
+    return coarse_pos[labels] + rng.normal(scale=coarse_k / 2, size=(n, 2)), coarse_k
+
+
+def layout(matrix, previous=None, iterations=ITERATIONS, k=LINK_DISTANCE, seed=0):
+    """Fruchterman-Reingold 布局，返回 (n × 2 坐标, 布局信息)
+
+    matrix 为对称的带权邻接矩阵；previous 为 n × 2 的旧坐标（没有旧坐标的行为 NaN）。
+    已有坐标的节点足够多时从较低的温度开始，只做 1/5 的迭代；
+    没有旧坐标的大图先用多层布局得到起始坐标，同样只做细化。
+    """
+    n = matrix.shape[0]
+    multilevel = False
+    if previous is None and n > EXACT_LIMIT:
+        previous, coarse_k = multilevel_positions(matrix, iterations, k, seed)
+        multilevel = previous is not None
+    rng = np.random.default_rng(seed)
+    pos, seeded = initial_positions(matrix, previous, k, rng)
+    incremental = n > 0 and seeded >= n * INCREMENTAL_FRACTION
+    if multilevel:
+        # 节点从社区位置附近出发，温度取粗图的边长
+        iterations = max(20, iterations // 2)
+        temperature = coarse_k
+    elif incremental:
+        iterations = max(20, iterations // 5)
+        temperature = k * INCREMENTAL_TEMPERATURE
+    else:
+        temperature = k * np.sqrt(max(n, 1)) / 4
+
+    coo = sparse.triu(matrix, k=1).tocoo()
+    src, dst = coo.row, coo.col
+    # 合作次数很多的边拉力按对数增长，避免把整个社区压成一个点
+    strength = np.log1p(coo.data) / np.log(2)
+    repulsion = exact_repulsion if n <= EXACT_LIMIT else grid_repulsion
+
+    for step in range(iterations):
+        if n < 2:
+            break
+        force = repulsion(pos, k)
+
+        # 引力 d^2 / k，沿边方向
+        delta = pos[src] - pos[dst]
+        dist = np.sqrt((delta ** 2).sum(axis=1))
+        pull = delta * (dist * strength / k)[:, None]
+        force[:, 0] -= np.bincount(src, weights=pull[:, 0], minlength=n)
+        force[:, 1] -= np.bincount(src, weights=pull[:, 1], minlength=n)
+        force[:, 0] += np.bincount(dst, weights=pull[:, 0], minlength=n)
+        force[:, 1] += np.bincount(dst, weights=pull[:, 1], minlength=n)
+
+        force -= GRAVITY * pos
+
+        # 每步位移不超过当前温度，温度线性下降
+        length = np.maximum(np.sqrt((force ** 2).sum(axis=1)), 1e-9)
+        t = temperature * (1 - step / iterations)
+        pos += force * (np.minimum(length, t) / length)[:, None]
+
+    if n:
+        pos -= pos.mean(axis=0)
+    info = {
+        'algorithm': 'fruchterman_reingold',
+        'repulsion': 'exact' if n <= EXACT_LIMIT else 'grid',
+        'iterations': iterations,
+        'link_distance': k,
+        'multilevel': multilevel,
+        'seeded_nodes': seeded if incremental and not multilevel else 0,
+    }
+    return pos, info
+
+
+def previous_positions(network):
+    """节点上已有的 x / y，没有坐标的节点为 NaN"""
+    return np.asarray([
+        [node.get('x', np.nan), node.get('y', np.nan)] for node in network['nodes']
+    ], dtype=float)
+
+
+def attach_layout(network, directed=False, incremental=False, iterations=ITERATIONS, seed=0):
+    """计算布局并写入节点的 x / y，布局信息写入 metadata['layout']（原地修改并返回 network）"""
+    _, matrix = adjacency(network, directed=directed)
+    if directed:
+        matrix = matrix + matrix.T
+    previous = previous_positions(network) if incremental else None
+    pos, info = layout(matrix, previous, iterations=iterations, seed=seed)
+    for node, (x, y) in zip(network['nodes'], np.round(pos, 2).tolist()):
+        node['x'], node['y'] = x, y
+    network.setdefault('metadata', {})['layout'] = info
+    return network
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compute force-directed layouts for the networks')
+    parser.add_argument('--network', choices=sorted(NETWORK_FILES) + ['all'], default='all')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('--incremental', action='store_true',
+                        help='start from the x/y already stored on the nodes')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = sorted(NETWORK_FILES) if args.network == 'all' else [args.network]
+
+    print("=" * 70)
+    print("Computing Network Layouts")
+    print("=" * 70)
+
+    for name in names:
+        path = os.path.join(args.data_dir, NETWORK_FILES[name])
+        if not os.path.exists(path):
+            print(f"\n  - {path} not found, skipped")
+            continue
+
+        print(f"\n[{name}] Loading {path}...")
+        with open(path, 'r') as f:
+            network = json.load(f)
+        print(f"  Nodes: {len(network['nodes'])}, Links: {len(network['links'])}")
+
+        attach_layout(network, DIRECTED[name], args.incremental, args.iterations, args.seed)
+        info = network['metadata']['layout']
+        print(f"  Layout: {info['iterations']} iterations, {info['repulsion']} repulsion, "
+              f"{info['seeded_nodes']} seeded nodes")
+
+        network_io.save_network(network, path)
+        print(f"  ✓ Saved to {path} (+ {os.path.basename(network_io.binary_path(path))})")
+
+    print("\n" + "=" * 70)
+    print("✅ Network layouts computed successfully!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
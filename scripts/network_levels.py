@@ -0,0 +1,183 @@
+# network_levels.py
+# 作者网络的多分辨率表示：把社区合并成超级节点，再对超级节点组成的图
+# 继续划分社区，得到若干层越来越粗的图，写入 author_network_levels.json。
+# 第 0 层是原始网络，第 k 层的每个节点是第 k-1 层若干节点的合并。
+#
+#   python network_levels.py
+#   python network_levels.py --min-nodes 50 --max-levels 4
+import argparse
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+from network_metrics import adjacency, label_propagation
+
+DATA_DIR = 'data/processed'
+INPUT_FILE = 'author_network.json'
+OUTPUT_FILE = 'author_network_levels.json'
+
+# 节点数不超过 MIN_NODES 或者一层只减少不到 10% 时停止继续合并
+MIN_NODES = 20
+MIN_SHRINK = 0.9
+MAX_LEVELS = 6
+
+
+def supernode_id(level, i):
+    return f"L{level}-{i}"
+
+
+def coarsen(matrix, seed=0):
+    """对一层的图划分社区，返回 (每个节点所属的社区, 合并后的邻接矩阵)
+
+    合并后的矩阵为 P^T A P（P 为 节点 × 社区 的成员矩阵），
+    对角线是社区内部的边权重之和（无向图中每条边计两次）。
+    """
+    n = matrix.shape[0]
+    # 对角线（内部权重）不参与标签传播，否则每个超级节点都倾向保留自己的标签
+    labels = label_propagation(matrix - sparse.diags(matrix.diagonal()), seed=seed)
+    membership = sparse.csr_matrix((np.ones(n), (np.arange(n), labels)), shape=(n, labels.max() + 1))
+    return labels, (membership.T @ matrix @ membership).tocsr()
+
+
+def level_links(matrix, ids):
+    """合并后的图 -> 边列表（source < target，不含对角线）"""
+    upper = sparse.triu(matrix, k=1).tocoo()
+    weights = upper.data
+    integral = np.all(weights == np.round(weights))
+    return [
+        {'source': ids[i], 'target': ids[j], 'weight': int(w) if integral else round(float(w), 4)}
+        for i, j, w in zip(upper.row.tolist(), upper.col.tolist(), weights.tolist())
+    ]
+
+
+def self_loop_weights(network, ids):
+    """每个节点自环的权重之和（同一作者在一篇论文中出现多次时会有自环）"""
+    position = {node_id: i for i, node_id in enumerate(ids)}
+    weights = np.zeros(len(ids))
+    for link in network['links']:
+        source = str(link['source'])
+        if source == str(link['target']) and source in position:
+            weights[position[source]] += float(link.get('weight', 1))
+    return weights
+
+
+def build_levels(network, min_nodes=MIN_NODES, max_levels=MAX_LEVELS, seed=0):
+    """构建层级：每层记录节点（超级节点）、边以及每个节点的子节点 id"""
+    ids, matrix = adjacency(network)
+    # adjacency 忽略自环；这里把自环放回对角线（无向图中每条边计两次），
+    # 计入所在超级节点的内部权重，各层的权重总和与原始网络相同
+    matrix = (matrix + sparse.diags(2 * self_loop_weights(network, ids))).tocsr()
+    paper_counts = np.asarray([node.get('paperCount', 0) or 0 for node in network['nodes']], dtype=np.int64)
+    names = [node.get('name', node['id']) for node in network['nodes']]
+
+    # 当前层的节点在原始网络中的代表作者（paperCount 最大）和包含的作者数、论文数
+    representative = np.arange(len(ids))
+    sizes = np.ones(len(ids), dtype=np.int64)
+    papers = paper_counts
+
+    levels = []
+    while matrix.shape[0] > min_nodes and len(levels) < max_levels:
+        labels, coarse = coarsen(matrix, seed=seed)
+        n_coarse = coarse.shape[0]
+        if n_coarse > matrix.shape[0] * MIN_SHRINK:
+            break
+
+        level = len(levels) + 1
+        coarse_ids = [supernode_id(level, i) for i in range(n_coarse)]
+        coarse_sizes = np.bincount(labels, weights=sizes, minlength=n_coarse).astype(np.int64)
+        coarse_papers = np.bincount(labels, weights=papers, minlength=n_coarse).astype(np.int64)
+
+        # 每个社区的代表作者：子节点中代表作者 paperCount 最大的一个
+        order = np.lexsort((-paper_counts[representative], labels))
+        first = np.r_[True, labels[order][1:] != labels[order][:-1]]
+        coarse_representative = representative[order][first]
+
+        children = [[] for _ in range(n_coarse)]
+        for child, parent in zip(ids, labels.tolist()):
+            children[parent].append(child)
+
+        internal = coarse.diagonal() / 2
+        nodes = [
+            {
+                'id': coarse_ids[i],
+                'name': names[coarse_representative[i]],
+                'level': level,
+                'size': int(coarse_sizes[i]),
+                'paperCount': int(coarse_papers[i]),
+                'childCount': len(children[i]),
+                'internalWeight': int(internal[i]) if internal[i] == round(internal[i]) else round(float(internal[i]), 4),
+            }
+            for i in range(n_coarse)
+        ]
+        levels.append({
+            'level': level,
+            'nodes': nodes,
+            'links': level_links(coarse, coarse_ids),
+            'children': children,
+        })
+        print(f"  Level {level}: {n_coarse} supernodes, {len(levels[-1]['links'])} links")
+
+        ids, matrix = coarse_ids, coarse
+        representative, sizes, papers = coarse_representative, coarse_sizes, coarse_papers
+
+    return {
+        'levels': levels,
+        'metadata': {
+            # 服务端据此判断层级文件是否由当前的 author_network.json 生成
+            'source_nodes': len(network['nodes']),
+            'source_links': len(network['links']),
+            'levels': len(levels),
+            'nodes_per_level': [len(network['nodes'])] + [len(level['nodes']) for level in levels],
+            'community_method': 'label_propagation',
+        },
+    }
+
+
+def save_levels(levels, data_dir=DATA_DIR):
+    """保存层级 JSON（紧凑格式）"""
+    output_path = os.path.join(data_dir, OUTPUT_FILE)
+    with open(output_path, 'w') as f:
+        json.dump(levels, f, separators=(',', ':'))
+    print(f"  ✓ Saved to {output_path}")
+    return output_path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build coarsened levels of the author network')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--min-nodes', type=int, default=MIN_NODES,
+                        help='stop coarsening once a level has at most this many nodes (default: %(default)s)')
+    parser.add_argument('--max-levels', type=int, default=MAX_LEVELS)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    input_path = os.path.join(args.data_dir, INPUT_FILE)
+
+    print("=" * 70)
+    print("Building Author Network Levels")
+    print("=" * 70)
+
+    if not os.path.exists(input_path):
+        print(f"\n❌ Error: Cannot find {input_path}")
+        print("  Run build_author_network.py first")
+        exit(1)
+
+    with open(input_path, 'r') as f:
+        network = json.load(f)
+    print(f"\n  Nodes: {len(network['nodes'])}, Links: {len(network['links'])}")
+
+    levels = build_levels(network, args.min_nodes, args.max_levels, args.seed)
+    save_levels(levels, args.data_dir)
+
+    print("\n" + "=" * 70)
+    print("✅ Network levels built successfully!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
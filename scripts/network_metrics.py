@@ -0,0 +1,309 @@
+# network_metrics.py
+# 网络指标：在 build_author_network.py / build_citation_network.py 之后运行，
+# 为每个节点计算 degree、strength、PageRank、（抽样）betweenness 和社区，
+# 作为节点属性写回网络 JSON。全部用稀疏矩阵 / 数组运算实现。
+#
+#   python network_metrics.py                      # 两个网络都计算
+#   python network_metrics.py --network author --betweenness-samples 128
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+DATA_DIR = 'data/processed'
+
+NETWORK_FILES = {
+    'author': 'author_network.json',
+    'citation': 'citation_network.json',
+}
+
+# 作者网络是带权无向图，引用网络是有向图 (citing -> cited)
+DIRECTED = {
+    'author': False,
+    'citation': True,
+}
+
+PAGERANK_DAMPING = 0.85
+BETWEENNESS_SAMPLES = 32
+# betweenness 每次同时做 BFS 的源点数
+BFS_BATCH = 32
+LABEL_PROPAGATION_MAX_ITER = 100
+
+
+def adjacency(network, weight_key='weight', directed=False):
+    """网络 JSON -> (节点 id 列表, n × n 稀疏邻接矩阵)
+
+    两端不都是已知节点的边和自环被忽略，重复边的权重相加；
+    无向图的矩阵是对称的。
+    """
+    ids = [str(node['id']) for node in network['nodes']]
+    links = network['links']
+    position = pd.Index(ids)
+    src = position.get_indexer([str(link['source']) for link in links])
+    dst = position.get_indexer([str(link['target']) for link in links])
+    weights = np.asarray([float(link.get(weight_key, 1)) for link in links], dtype=float)
+
+    keep = (src >= 0) & (dst >= 0) & (src != dst)
+    src, dst, weights = src[keep], dst[keep], weights[keep]
+    if not directed:
+        src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+        weights = np.concatenate([weights, weights])
+
+    n = len(ids)
+    matrix = sparse.csr_matrix((weights, (src, dst)), shape=(n, n))
+    matrix.sum_duplicates()
+    return ids, matrix
+
+
+def degrees(matrix):
+    """每个节点的 (出度, 入度, 出边权重和, 入边权重和)，权重都是整数时权重和也是整数"""
+    out_degree = np.diff(matrix.indptr)
+    in_degree = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    out_strength = np.asarray(matrix.sum(axis=1)).ravel()
+    in_strength = np.asarray(matrix.sum(axis=0)).ravel()
+    if np.all(matrix.data == np.round(matrix.data)):
+        out_strength, in_strength = out_strength.astype(np.int64), in_strength.astype(np.int64)
+    return out_degree, in_degree, out_strength, in_strength
+
+
+def pagerank(matrix, damping=PAGERANK_DAMPING, tol=1e-10, max_iter=200):
+    """带权 PageRank（幂迭代），没有出边的节点把分数均匀分给所有节点"""
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    out_strength = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_strength == 0
+    inverse = np.divide(1.0, out_strength, out=np.zeros(n), where=~dangling)
+    transition = matrix.T.tocsr()
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = transition @ (rank * inverse)
+        new_rank = damping * (spread + rank[dangling].sum() / n) + (1 - damping) / n
+        converged = np.abs(new_rank - rank).sum() < n * tol
+        rank = new_rank
+        if converged:
+            break
+    return rank / rank.sum()
+
+
+def betweenness(matrix, samples=BETWEENNESS_SAMPLES, seed=0, batch=BFS_BATCH):
+    """按跳数计算的 betweenness（Brandes），从 samples 个随机源点估计
+
+    每批源点同时做分层 BFS：每一层只把该层节点组成 batch × n 的稀疏矩阵 F，
+    前向用 F @ A 传播最短路径数，反向用 F @ A^T 按层累积依赖。
+    稀疏乘法只遍历 F 中节点的边，每个源点的计算量与边数成正比，与图的直径无关。
+    结果按 n / samples 放大并归一化到 [0, 1]，
+    与 networkx.betweenness_centrality(k=samples) 的定义一致。
+    """
+    n = matrix.shape[0]
+    if n < 3:
+        return np.zeros(n)
+    structure = matrix.tocsr(copy=True)
+    structure.data = np.ones_like(structure.data)
+    backward = structure.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    sources = np.arange(n) if samples >= n else rng.choice(n, samples, replace=False)
+
+    total = np.zeros(n)
+    for start in range(0, len(sources), batch):
+        block = sources[start:start + batch]
+        shape = (n, len(block))
+        dist = np.full(shape, -1, dtype=np.int32)
+        sigma = np.zeros(shape)
+        rows, cols = block, np.arange(len(block))
+        dist[rows, cols] = 0
+        sigma[rows, cols] = 1.0
+
+        # 前向：第 d 层节点的路径数沿出边传给未访问的节点
+        levels = [(rows, cols)]
+        while True:
+            frontier = sparse.csr_matrix((sigma[rows, cols], (cols, rows)), shape=shape[::-1])
+            reached = (frontier @ structure).tocoo()
+            new = dist[reached.col, reached.row] < 0
+            if not new.any():
+                break
+            rows, cols = reached.col[new], reached.row[new]
+            dist[rows, cols] = len(levels)
+            sigma[rows, cols] = reached.data[new]
+            levels.append((rows, cols))
+
+        # 反向：delta[v] = sigma[v] * sum_{v->w, dist[w]=dist[v]+1} (1 + delta[w]) / sigma[w]
+        delta = np.zeros(shape)
+        for depth in range(len(levels) - 1, 0, -1):
+            rows, cols = levels[depth]
+            coeff = sparse.csr_matrix(((1 + delta[rows, cols]) / sigma[rows, cols], (cols, rows)), shape=shape[::-1])
+            contrib = (coeff @ backward).tocoo()
+            parents = dist[contrib.col, contrib.row] == depth - 1
+            rows, cols = contrib.col[parents], contrib.row[parents]
+            delta[rows, cols] += sigma[rows, cols] * contrib.data[parents]
+        delta[block, np.arange(len(block))] = 0
+        total += delta.sum(axis=1)
+
+    return total * (n / len(sources)) / ((n - 1) * (n - 2))
+
+
+def label_propagation(matrix, seed=0, max_iter=LABEL_PROPAGATION_MAX_ITER):
+    """带权标签传播社区划分（无向）
+
+    每轮每个节点取邻居中权重和最大的标签，平局时优先保留原标签，否则随机。
+    每轮随机只更新一半节点，避免同步更新在二部结构上来回振荡；
+    想要改变标签的节点不到万分之一时停止。
+    返回按社区大小从大到小编号的标签。
+    """
+    n = matrix.shape[0]
+    symmetric = (matrix + matrix.T).tocoo()
+    src, dst, weights = symmetric.row.astype(np.int64), symmetric.col, symmetric.data
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n)
+
+    for _ in range(max_iter):
+        if len(src) == 0:
+            break
+        # 按 (节点, 邻居标签) 汇总权重
+        key = src * n + labels[dst]
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        node, label = key[starts] // n, key[starts] % n
+        score = np.add.reduceat(weights[order], starts)
+
+        # 每个节点取得分最高的标签（node 已有序，按段求最大值），再用平局键挑一个
+        node_starts = np.flatnonzero(np.r_[True, node[1:] != node[:-1]])
+        segment = np.repeat(np.arange(len(node_starts)), np.diff(np.r_[node_starts, len(node)]))
+        best = score == np.maximum.reduceat(score, node_starts)[segment]
+        tie = np.where(best, (label == labels[node]) * 2.0 + rng.random(len(label)), -1.0)
+        picked = np.flatnonzero(tie == np.maximum.reduceat(tie, node_starts)[segment])
+        picked = picked[np.r_[True, node[picked][1:] != node[picked][:-1]]]
+        winner_nodes, winner_labels = node[picked], label[picked]
+
+        changes = winner_labels != labels[winner_nodes]
+        if changes.sum() <= n * 1e-4:
+            labels[winner_nodes[changes]] = winner_labels[changes]
+            break
+        update = changes & (rng.random(len(winner_nodes)) < 0.5)
+        labels[winner_nodes[update]] = winner_labels[update]
+
+    # 重新编号：0 为最大的社区，大小相同时按最小节点下标
+    _, codes, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    first = np.full(len(sizes), n)
+    np.minimum.at(first, codes, np.arange(n))
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.lexsort((first, -sizes))] = np.arange(len(sizes))
+    return rank[codes]
+
+
+def modularity(matrix, labels):
+    """无向带权模块度"""
+    symmetric = (matrix + matrix.T).tocoo()
+    total = symmetric.data.sum()
+    if total == 0:
+        return 0.0
+    inside = symmetric.data[labels[symmetric.row] == labels[symmetric.col]].sum()
+    strength = np.bincount(labels[symmetric.row], weights=symmetric.data, minlength=labels.max() + 1)
+    return float(inside / total - ((strength / total) ** 2).sum())
+
+
+def compute_metrics(network, directed=False, betweenness_samples=BETWEENNESS_SAMPLES, seed=0):
+    """计算每个节点的指标，返回 (节点 id 列表, {指标名: 数组}, 汇总信息)"""
+    ids, matrix = adjacency(network, directed=directed)
+    out_degree, in_degree, out_strength, in_strength = degrees(matrix)
+    communities = label_propagation(matrix, seed=seed)
+
+    metrics = {
+        'pagerank': pagerank(matrix),
+        'betweenness': betweenness(matrix, samples=betweenness_samples, seed=seed),
+        'community': communities,
+    }
+    if directed:
+        metrics.update({
+            'degree': out_degree + in_degree,
+            'strength': out_strength + in_strength,
+            'inDegree': in_degree,
+            'outDegree': out_degree,
+        })
+    else:
+        # 对称矩阵：行和即度数
+        metrics.update({'degree': out_degree, 'strength': out_strength})
+
+    summary = {
+        'pagerank_damping': PAGERANK_DAMPING,
+        'betweenness_samples': min(betweenness_samples, len(ids)),
+        'community_method': 'label_propagation',
+        'communities': int(communities.max()) + 1 if len(ids) else 0,
+        'modularity': round(modularity(matrix, communities), 6) if len(ids) else 0.0,
+    }
+    return ids, metrics, summary
+
+
+def to_json_values(values):
+    """整数指标输出 int，浮点指标保留 6 位有效数字"""
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64).tolist()
+    return [float(f"{value:.6g}") for value in values]
+
+
+def attach_metrics(network, directed=False, betweenness_samples=BETWEENNESS_SAMPLES, seed=0):
+    """把指标写成节点属性，汇总信息写入 metadata['metrics']（原地修改并返回 network）"""
+    _, metrics, summary = compute_metrics(network, directed, betweenness_samples, seed)
+    columns = {key: to_json_values(np.asarray(values)) for key, values in metrics.items()}
+    for i, node in enumerate(network['nodes']):
+        for key, values in columns.items():
+            node[key] = values[i]
+    network.setdefault('metadata', {})['metrics'] = summary
+    return network
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compute node metrics for the networks')
+    parser.add_argument('--network', choices=sorted(NETWORK_FILES) + ['all'], default='all')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--betweenness-samples', type=int, default=BETWEENNESS_SAMPLES,
+                        help='number of BFS sources used to estimate betweenness (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.betweenness_samples < 1:
+        parser.error('--betweenness-samples must be positive')
+    return args
+
+
+def main():
+    # 只在作为脚本运行时导入：API 以 scripts.network_metrics 导入本模块时不需要写文件
+    import network_io
+
+    args = parse_args()
+    names = sorted(NETWORK_FILES) if args.network == 'all' else [args.network]
+
+    print("=" * 70)
+    print("Computing Network Metrics")
+    print("=" * 70)
+
+    for name in names:
+        path = os.path.join(args.data_dir, NETWORK_FILES[name])
+        if not os.path.exists(path):
+            print(f"\n  - {path} not found, skipped")
+            continue
+
+        print(f"\n[{name}] Loading {path}...")
+        with open(path, 'r') as f:
+            network = json.load(f)
+        print(f"  Nodes: {len(network['nodes'])}, Links: {len(network['links'])}")
+
+        attach_metrics(network, DIRECTED[name], args.betweenness_samples, args.seed)
+        summary = network['metadata']['metrics']
+        print(f"  Communities: {summary['communities']} (modularity {summary['modularity']:.3f})")
+
+        network_io.save_network(network, path)
+        print(f"  ✓ Saved to {path} (+ {os.path.basename(network_io.binary_path(path))})")
+
+    print("\n" + "=" * 70)
+    print("✅ Network metrics computed successfully!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# openalex_client.py
+# OpenAlex 下载工具：限速、重试、cursor 分页、并发抓取和断点续传
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_URL = os.environ.get('OPENALEX_BASE_URL', 'https://api.openalex.org')
+
+# OpenAlex 每个 cursor 最多每页 200 条
+PER_PAGE = 200
+
+# 需要重试的 HTTP 状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """令牌桶限速器，多个线程共享"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，没有令牌时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class OpenAlexClient:
+    """带限速和指数退避重试的 OpenAlex HTTP 客户端"""
+
+    def __init__(self, base_url=None, rate=8, max_retries=5, backoff=0.5, timeout=30,
+                 mailto=None, api_key=None):
+        self.base_url = (base_url or BASE_URL).rstrip('/')
+        self.bucket = TokenBucket(rate)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.mailto = mailto
+        self.api_key = api_key or os.environ.get('OPENALEX_API_KEY')
+        self._local = threading.local()
+
+    def _session(self):
+        # requests.Session 不是线程安全的，每个线程一个
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def get(self, path, params=None):
+        """GET 请求并返回 JSON，遇到 429/5xx/网络错误时退避重试"""
+        params = dict(params or {})
+        if self.mailto:
+            params['mailto'] = self.mailto
+        if self.api_key:
+            params['api_key'] = self.api_key
+        url = f"{self.base_url}/{path.lstrip('/')}"
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            retry_after = None
+            try:
+                response = self._session().get(url, params=params, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                error = requests.HTTPError(f"{response.status_code} for {response.url}")
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+
+            delay = self.backoff * (2 ** attempt) * (1 + random.random())
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            print(f"  Retry {attempt + 1}/{self.max_retries} in {delay:.1f}s ({error})")
+            time.sleep(delay)
+
+
+class CheckpointState:
+    """断点续传状态：每个分片的下一个 cursor、该页已写入的条数 (skip) 和已下载数量"""
+
+    def __init__(self, path):
+        self.path = path
+        self.shards = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.shards = json.load(f).get('shards', {})
+
+    def get(self, shard):
+        return self.shards.get(shard, {'cursor': '*', 'skip': 0, 'count': 0, 'done': False})
+
+    def update(self, shard, cursor, skip, count, done):
+        self.shards[shard] = {'cursor': cursor, 'skip': skip, 'count': count, 'done': done}
+        self.save()
+
+    def total(self):
+        return sum(state['count'] for state in self.shards.values())
+
+    def save(self):
+        # 先写临时文件再替换，避免崩溃时留下半个文件
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'shards': self.shards}, f)
+        os.replace(tmp_path, self.path)
+
+
+def fetch_works(client, filters, shards, output_path, state_path, max_papers=None,
+                workers=4, select=None, resume=True):
+    """按 cursor 分页并发下载 works，边下载边追加写入 NDJSON
+
+    shards: {分片名: 额外的 filter 字符串}，每个分片有独立的 cursor，
+    不同分片由线程池并发抓取，共享同一个限速器。
+    每写完一页就把该分片的下一个 cursor 记入 state_path，
+    崩溃后重新运行会从记录的 cursor 继续。一页写入后、状态保存前崩溃时
+    该页会被重复下载，所以读取时仍需按 id 去重（process_papers_data 会处理）。
+    写入途中崩溃留下的半行在续传前截掉，新的页从完整的行之后追加。
+    """
+    if not resume:
+        for path in (output_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    removed = truncate_partial_line(output_path)
+    if removed:
+        print(f"  Removed {removed} bytes of a partially written line from {output_path}")
+
+    state = CheckpointState(state_path)
+    write_lock = threading.Lock()
+    stop = threading.Event()
+    total = [state.total()]
+
+    if max_papers is not None and total[0] >= max_papers:
+        print(f"  Already have {total[0]} papers (max {max_papers}), nothing to fetch")
+        return total[0]
+
+    if total[0]:
+        print(f"  Resuming with {total[0]} papers already downloaded")
+
+    def fetch_shard(shard, shard_filter):
+        try:
+            _fetch_shard(shard, shard_filter)
+        except Exception:
+            # 一个分片失败时让其他分片尽快停下，已写入的数据和 cursor 都保留
+            stop.set()
+            raise
+
+    def _fetch_shard(shard, shard_filter):
+        shard_state = state.get(shard)
+        cursor, count = shard_state['cursor'], shard_state['count']
+        skip = shard_state.get('skip', 0)
+        if shard_state['done']:
+            return
+
+        while cursor and not stop.is_set():
+            params = {
+                'filter': ','.join(f for f in (filters, shard_filter) if f),
+                'per_page': PER_PAGE,
+                'cursor': cursor,
+            }
+            if select:
+                params['select'] = select
+
+            data = client.get('works', params)
+            results = data.get('results', [])
+            next_cursor = data.get('meta', {}).get('next_cursor')
+            if not results:
+                next_cursor = None
+
+            # 上次在这一页中途停下时，跳过已经写入的部分
+            results = results[skip:]
+            next_skip = 0
+
+            with write_lock:
+                if max_papers is not None and len(results) > max_papers - total[0]:
+                    # 达到上限时只写入一部分，cursor 停在这一页，续传时跳过已写入的条数
+                    results = results[:max(0, max_papers - total[0])]
+                    next_cursor, next_skip = cursor, skip + len(results)
+                with open(output_path, 'a', encoding='utf-8') as f:
+                    for work in results:
+                        f.write(json.dumps(work, ensure_ascii=False) + '\n')
+                total[0] += len(results)
+                count += len(results)
+                state.update(shard, next_cursor, next_skip, count, next_cursor is None)
+                print(f"  [{shard}] Got {len(results)} papers (Total: {total[0]})")
+
+                if max_papers is not None and total[0] >= max_papers:
+                    print(f"\nReached maximum of {max_papers} papers")
+                    stop.set()
+
+            cursor, skip = next_cursor, next_skip
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(fetch_shard, shard, shard_filter)
+                   for shard, shard_filter in shards.items()]
+        for future in futures:
+            future.result()
+
+    return total[0]
+
+
+def truncate_partial_line(path):
+    """截掉文件末尾没有换行符的半行（写入途中崩溃留下的），返回截掉的字节数"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        # 从末尾按块向前查找最后一个换行符
+        end = size
+        while end > 0:
+            step = min(1 << 16, end)
+            f.seek(end - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                end = end - step + newline + 1
+                break
+            end -= step
+        if end < size:
+            f.truncate(end)
+    return size - end
+
+
+def decode_ndjson(lines, path):
+    """解码 NDJSON 行（行尾保留换行符）
+
+    没有换行符的最后一行可能是写入途中崩溃留下的半行，无法解码时跳过；
+    其他位置的坏行照常抛出 json.JSONDecodeError。
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            work = json.loads(line)
+        except json.JSONDecodeError:
+            if line.endswith(b'\n' if isinstance(line, bytes) else '\n'):
+                raise
+            print(f"  Skipped a partially written last line in {path}")
+            continue
+        yield work
+
+
+def iter_ndjson(path):
+    """逐行读取 NDJSON，不会把整个文件读进内存"""
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from decode_ndjson(f, path)
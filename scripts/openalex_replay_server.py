@@ -0,0 +1,153 @@
+# openalex_replay_server.py
+# 本地 OpenAlex 替身：从 NDJSON 回放 works，支持 cursor 分页和故障注入，
+# 用于在不访问公网的情况下测试 download_data.py 的并发、重试和断点续传。
+#
+#   python openalex_replay_server.py --works data/raw/ucsd_papers.ndjson --port 8765
+#   python download_data.py --base-url http://localhost:8765
+import argparse
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from openalex_client import iter_ndjson
+
+INSTITUTION = {
+    'id': 'https://openalex.org/I138006243',
+    'display_name': 'University of California, San Diego',
+}
+
+
+def parse_filter(value):
+    """把 'a:1,b:2' 解析成 {'a': '1', 'b': '2'}"""
+    filters = {}
+    for part in (value or '').split(','):
+        if ':' in part:
+            key, val = part.split(':', 1)
+            filters[key] = val
+    return filters
+
+
+def year_matches(work, spec):
+    year = work.get('publication_year')
+    if year is None:
+        return False
+    if '-' in spec:
+        start, end = spec.split('-', 1)
+        return int(start) <= year <= int(end)
+    return year == int(spec)
+
+
+def short_id(value):
+    return str(value).rstrip('/').split('/')[-1]
+
+
+def institution_matches(work, spec):
+    """institutions.id:I1|I2，没有机构信息的 work 视为匹配任何机构"""
+    institutions = {
+        short_id(inst.get('id', ''))
+        for authorship in work.get('authorships', [])
+        for inst in authorship.get('institutions', [])
+    }
+    return not institutions or bool(institutions & set(spec.split('|')))
+
+
+def field_matches(work, spec):
+    """primary_topic.field.id:17，没有 primary_topic 的 work 视为匹配任何领域"""
+    field = (work.get('primary_topic') or {}).get('field')
+    return not field or short_id(field.get('id', '')) in spec.split('|')
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if cursor in (None, '', '*'):
+        return 0
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    works = []
+    fail_every = 0
+    request_count = 0
+    count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.count_lock:
+            ReplayHandler.request_count += 1
+            count = ReplayHandler.request_count
+
+        # 故障注入：每 N 个请求返回一次 503，检验客户端的重试逻辑
+        if self.fail_every and count % self.fail_every == 0:
+            self.send_json(503, {'error': 'injected failure'}, {'Retry-After': '0'})
+            return
+
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path.rstrip('/') == '/institutions':
+            self.send_json(200, {'results': [INSTITUTION]})
+            return
+
+        if url.path.rstrip('/') != '/works':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        filters = parse_filter(params.get('filter'))
+        works = self.works
+        if 'publication_year' in filters:
+            works = [w for w in works if year_matches(w, filters['publication_year'])]
+        if 'institutions.id' in filters:
+            works = [w for w in works if institution_matches(w, filters['institutions.id'])]
+        if 'primary_topic.field.id' in filters:
+            works = [w for w in works if field_matches(w, filters['primary_topic.field.id'])]
+        if 'from_updated_date' in filters:
+            since = filters['from_updated_date']
+            works = [w for w in works if w.get('updated_date', '') >= since]
+
+        per_page = int(params.get('per_page', 25))
+        offset = decode_cursor(params.get('cursor'))
+        page = works[offset:offset + per_page]
+        next_offset = offset + len(page)
+        next_cursor = encode_cursor(next_offset) if page and next_offset < len(works) else None
+
+        self.send_json(200, {
+            'meta': {'count': len(works), 'per_page': per_page, 'next_cursor': next_cursor},
+            'results': page,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay OpenAlex works from an NDJSON file')
+    parser.add_argument('--works', required=True, help='NDJSON file with one work per line')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-every', type=int, default=0,
+                        help='answer every Nth request with 503 (0 disables)')
+    args = parser.parse_args()
+
+    ReplayHandler.works = list(iter_ndjson(args.works))
+    ReplayHandler.fail_every = args.fail_every
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), ReplayHandler)
+    print(f"Replaying {len(ReplayHandler.works)} works on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
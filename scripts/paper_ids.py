@@ -0,0 +1,76 @@
+# paper_ids.py
+# OpenAlex 论文 id（如 W3113178943）-> 紧凑 int32 PaperIdx 的持久化字典。
+# 处理阶段给论文和被引论文分配整数 id，之后的筛选、连接和边数组都在整数上进行；
+# 对外（网络 JSON、API）仍然使用字符串 id。
+import os
+
+import numpy as np
+import pandas as pd
+
+from table_io import read_table, table_columns
+
+PAPER_ID_MAP_PATH = 'data/processed/paper_id_map.csv'
+
+# 字符串 id 列 -> 对应的整数 id 列
+INDEX_COLUMNS = {
+    'PaperId': 'PaperIdx',
+    'PaperReferenceId': 'PaperReferenceIdx',
+}
+
+
+def load_paper_id_map(path=PAPER_ID_MAP_PATH):
+    """读取 OpenAlexId -> PaperIdx 映射，文件不存在时返回空映射"""
+    if not os.path.exists(path):
+        return {}
+    map_df = pd.read_csv(path)
+    return dict(zip(map_df['OpenAlexId'].astype(str), map_df['PaperIdx'].astype(int)))
+
+
+def save_paper_id_map(paper_id_map, path=PAPER_ID_MAP_PATH):
+    map_df = pd.DataFrame({
+        'OpenAlexId': list(paper_id_map.keys()),
+        'PaperIdx': list(paper_id_map.values()),
+    }).sort_values('PaperIdx')
+    map_df.to_csv(path, index=False)
+    print(f"  ✓ paper_id_map.csv: {len(map_df)} rows")
+
+
+def intern_paper_ids(values, paper_id_map):
+    """把一列字符串 id 转成 int32 数组
+
+    映射中没有的 id 按首次出现的顺序分配新的连续 id，映射会被原地更新。
+    """
+    codes, uniques = pd.factorize(pd.Series(values).astype(str))
+    next_idx = max(paper_id_map.values(), default=-1) + 1
+    lookup = np.empty(len(uniques), dtype=np.int32)
+    for i, paper_id in enumerate(uniques):
+        if paper_id not in paper_id_map:
+            paper_id_map[paper_id] = next_idx
+            next_idx += 1
+        lookup[i] = paper_id_map[paper_id]
+    return lookup[codes]
+
+
+def add_paper_index(df, paper_id_map):
+    """给没有整数 id 列的表（旧版 CSV）补上 PaperIdx / PaperReferenceIdx"""
+    missing = [c for c in INDEX_COLUMNS if c in df.columns and INDEX_COLUMNS[c] not in df.columns]
+    if not missing:
+        return df
+    df = df.copy()
+    for column in missing:
+        df[INDEX_COLUMNS[column]] = intern_paper_ids(df[column], paper_id_map)
+    return df
+
+
+def read_indexed_table(name, data_dir, columns, paper_id_map):
+    """按列读取一张表；文件里缺少整数 id 列时读取字符串列再转换"""
+    available = table_columns(name, data_dir)
+    source_columns = []
+    for column in columns:
+        if column not in available:
+            column = next(c for c, idx in INDEX_COLUMNS.items() if idx == column)
+        if column not in source_columns:
+            source_columns.append(column)
+
+    df = add_paper_index(read_table(name, data_dir, columns=source_columns), paper_id_map)
+    return df[columns]
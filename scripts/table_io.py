@@ -0,0 +1,183 @@
+# table_io.py
+# 处理后表格的读写：CSV 之外再写一份带类型的 Arrow IPC (Feather v2) 文件，
+# 读取时优先用内存映射打开 Arrow 文件，并只转换需要的列。
+#
+#   python table_io.py            # 把 data/processed 下已有的 CSV 转成 .arrow
+#   python table_io.py --data-dir DIR
+import argparse
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow 是可选依赖，没有时只读写 CSV
+    pa = None
+
+DATA_DIR = 'data/processed'
+
+# Arrow 文件中每个 record batch 的最大行数，分块读取时按 batch 顺序读取
+ARROW_BATCH_ROWS = 1 << 20
+
+# 各表的列类型：category 在 Arrow 中是字典编码
+TABLE_DTYPES = {
+    'papers': {
+        'PaperId': 'category',
+        'Title': 'string',
+        'Year': 'int16',
+        'CitationCount': 'int32',
+        'FieldsOfStudy': 'category',
+        'PaperIdx': 'int32',
+    },
+    'authors': {
+        'AuthorId': 'int32',
+        'DisplayName': 'string',
+        'OpenAlexId': 'string',
+    },
+    'paper_author_affiliations': {
+        'PaperId': 'category',
+        'AuthorId': 'int32',
+        'AuthorSequenceNumber': 'category',
+        'PaperIdx': 'int32',
+    },
+    'paper_references': {
+        'PaperId': 'category',
+        'PaperReferenceId': 'category',
+        'PaperIdx': 'int32',
+        'PaperReferenceIdx': 'int32',
+    },
+}
+
+
+def csv_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{name}.csv")
+
+
+def arrow_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{name}.arrow")
+
+
+def table_path(name, data_dir=DATA_DIR):
+    """实际读取的文件：Arrow 文件存在且不比 CSV 旧时用 Arrow，否则用 CSV"""
+    arrow_file, csv_file = arrow_path(name, data_dir), csv_path(name, data_dir)
+    if pa is not None and os.path.exists(arrow_file):
+        if not os.path.exists(csv_file) or os.path.getmtime(arrow_file) >= os.path.getmtime(csv_file):
+            return arrow_file
+    return csv_file
+
+
+def table_columns(name, data_dir=DATA_DIR):
+    """表中的列名（只读取 Arrow schema 或 CSV 表头）"""
+    path = table_path(name, data_dir)
+    if path.endswith('.arrow'):
+        with pa.memory_map(path, 'r') as source:
+            return list(pa.ipc.open_file(source).schema.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def apply_dtypes(df, name):
+    """按 TABLE_DTYPES 转换列类型，数值列的缺失值填 0"""
+    df = df.copy()
+    for column, dtype in TABLE_DTYPES.get(name, {}).items():
+        if column not in df.columns:
+            continue
+        if dtype.startswith('int'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(dtype)
+        elif dtype == 'string':
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def write_table(df, name, data_dir=DATA_DIR):
+    """写 CSV，并在安装了 pyarrow 时写一份 Arrow IPC 文件"""
+    df.to_csv(csv_path(name, data_dir), index=False)
+    if pa is not None:
+        write_arrow(df, name, data_dir)
+
+
+def write_arrow(df, name, data_dir=DATA_DIR):
+    """写不压缩的 Arrow IPC 文件，读取时可以直接内存映射、零拷贝"""
+    table = pa.Table.from_pandas(apply_dtypes(df, name), preserve_index=False)
+    # 先写临时文件再替换，正在内存映射旧文件的进程不受影响
+    tmp_path = f"{arrow_path(name, data_dir)}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=ARROW_BATCH_ROWS)
+    os.replace(tmp_path, arrow_path(name, data_dir))
+
+
+def read_table(name, data_dir=DATA_DIR, columns=None, memory_map=True):
+    """读取一张表，columns 指定只读取的列"""
+    path = table_path(name, data_dir)
+    if path.endswith('.arrow'):
+        # to_pandas 会复制数据，读完即可关闭文件，不会让每次重新加载都留下一个映射
+        with (pa.memory_map(path, 'r') if memory_map else pa.OSFile(path, 'rb')) as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas()
+
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table(name, data_dir=DATA_DIR, columns=None, chunk_size=ARROW_BATCH_ROWS):
+    """分块读取一张表，每次产出不超过 chunk_size 行的 DataFrame
+
+    Arrow 文件按 record batch 内存映射读取，CSV 用 read_csv 的 chunksize，
+    内存占用只与块大小有关，与整张表的行数无关。
+    """
+    path = table_path(name, data_dir)
+    if not path.endswith('.arrow'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            batch = pa.Table.from_batches([reader.get_batch(i)])
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, chunk_size):
+                yield decode_dictionaries(batch.slice(offset, chunk_size)).to_pandas()
+
+
+def decode_dictionaries(table):
+    """字典编码的列解码成普通列
+
+    每个分块都共享整张表的字典，直接 to_pandas 会为每块转换一遍完整字典。
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            column = pa.chunked_array([chunk.dictionary_decode() for chunk in table.column(i).chunks],
+                                      type=field.type.value_type)
+            table = table.set_column(i, field.name, column)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert processed CSV tables to Arrow IPC')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    data_dir = args.data_dir
+
+    if pa is None:
+        print("❌ pyarrow is not installed: pip install pyarrow")
+        exit(1)
+
+    print(f"Converting CSV tables in {data_dir} to Arrow IPC...")
+    for name in TABLE_DTYPES:
+        if not os.path.exists(csv_path(name, data_dir)):
+            print(f"  - {name}.csv not found, skipped")
+            continue
+        df = pd.read_csv(csv_path(name, data_dir))
+        write_arrow(df, name, data_dir)
+        print(f"  ✓ {name}.arrow: {len(df)} rows, "
+              f"{os.path.getsize(arrow_path(name, data_dir)) / 1e6:.2f} MB "
+              f"(csv {os.path.getsize(csv_path(name, data_dir)) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# search_index.py
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+SEARCH_TYPES = ('all', 'papers', 'authors')
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 最后一个词按前缀匹配时最多展开的词项数（按文档频率取最常见的）
+MAX_PREFIX_TERMS = 64
+
+# NFKD 分解不了的字母
+TRANSLITERATION = str.maketrans({
+    'ł': 'l', 'Ł': 'l', 'ø': 'o', 'Ø': 'o', 'đ': 'd', 'Đ': 'd', 'ð': 'd',
+    'æ': 'ae', 'Æ': 'ae', 'œ': 'oe', 'Œ': 'oe', 'ı': 'i', 'þ': 'th',
+})
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# 检索结果中返回的字段
+PAPER_FIELDS = ('PaperId', 'Title', 'Year', 'CitationCount')
+AUTHOR_FIELDS = ('AuthorId', 'DisplayName')
+
+
+def normalize(text):
+    """Unicode 归一化：去掉重音符号、统一大小写，'Noël' 和 'noel' 相同"""
+    text = unicodedata.normalize('NFKD', str(text).translate(TRANSLITERATION))
+    return ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    """归一化后的词列表（连字符、标点和空白都是分隔符）"""
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+def column_values(series):
+    """列 -> Python 值列表，缺失值为 None（可以直接 JSON 序列化）"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def popularity_rank(values):
+    """热度 -> [0, 1) 内的排名分，只用于相同得分时的排序"""
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    ranks = pd.Series(values).rank(method='min').to_numpy()
+    return (ranks - 1) / max(len(values), 1)
+
+
+class SearchQuery:
+    """全文检索的查询参数
+
+    q: 查询词，多个词之间为"与"，最后一个词按前缀匹配
+    type: all / papers / authors
+    limit: 每类结果的条数
+    """
+
+    def __init__(self, q, type='all', limit=DEFAULT_LIMIT):
+        self.q = q
+        self.type = type
+        self.limit = limit
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+        # 只去掉开头的空白：结尾的空白表示最后一个词已经输完，不按前缀匹配
+        q = (args.get('q') or '').lstrip()
+        if not q.strip():
+            raise ValueError("'q' is required")
+
+        search_type = args.get('type') or 'all'
+        if search_type not in SEARCH_TYPES:
+            raise ValueError(f"'type' must be one of: {', '.join(SEARCH_TYPES)}")
+
+        return cls(q=q, type=search_type, limit=parse_limit(args))
+
+
+class SuggestQuery:
+    """作者姓名自动补全的查询参数：prefix 为输入的开头部分（可以是名或姓）"""
+
+    def __init__(self, prefix, limit=DEFAULT_LIMIT):
+        self.prefix = prefix
+        self.limit = limit
+
+    @classmethod
+    def from_args(cls, args):
+        prefix = (args.get('prefix') or '').lstrip()
+        if not prefix.strip():
+            raise ValueError("'prefix' is required")
+        return cls(prefix=prefix, limit=parse_limit(args))
+
+
+def parse_limit(args):
+    limit = args.get('limit')
+    if limit is None or limit == '':
+        return DEFAULT_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("'limit' must be an integer")
+    if limit < 1:
+        raise ValueError("'limit' must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+class TextIndex:
+    """一列文本的倒排索引
+
+    词表排好序（前缀匹配用二分查找），每个词的倒排列表按文档号升序存放，
+    并预先算好 BM25 权重；查询只需切片、求交集和一次 argpartition。
+    """
+
+    def __init__(self, texts, popularity):
+        token_lists = [tokenize(text) for text in texts]
+        n_docs = len(token_lists)
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=n_docs)
+        flat = [token for tokens in token_lists for token in tokens]
+        docs = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+
+        codes, vocab = pd.factorize(pd.Series(flat, dtype=object))
+        order = np.argsort(vocab.to_numpy(dtype=object))
+        self.vocab = vocab.to_numpy(dtype=object)[order]
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        terms = rank[codes] if len(codes) else codes.astype(np.int64)
+
+        # (词, 文档) 去重并统计词频，按词、文档排序
+        keys, tf = np.unique(terms * max(n_docs, 1) + docs, return_counts=True)
+        terms, docs = keys // max(n_docs, 1), keys % max(n_docs, 1)
+        doc_freq = np.bincount(terms, minlength=len(self.vocab))
+        self.starts = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.starts[1:])
+        self.docs = docs
+        self.doc_freq = doc_freq
+
+        idf = np.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        average = lengths.mean() if n_docs else 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / max(average, 1e-9))
+        self.weights = idf[terms] * tf * (BM25_K1 + 1) / (tf + norm)
+        self.popularity = popularity_rank(popularity)
+
+    def _terms(self, token, prefix):
+        """词 -> 词表下标；prefix 时返回以它开头的词（最多 MAX_PREFIX_TERMS 个最常见的）"""
+        lo = np.searchsorted(self.vocab, token, 'left')
+        if not prefix:
+            if lo < len(self.vocab) and self.vocab[lo] == token:
+                return np.array([lo])
+            return np.empty(0, dtype=np.int64)
+        hi = np.searchsorted(self.vocab, token + '\U0010ffff', 'left')
+        terms = np.arange(lo, hi)
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = terms[np.argpartition(-self.doc_freq[terms], MAX_PREFIX_TERMS)[:MAX_PREFIX_TERMS]]
+        return terms
+
+    def _postings(self, terms):
+        """若干词的倒排列表合并：(文档号升序, 每个文档的权重之和)"""
+        if len(terms) == 1:
+            t = terms[0]
+            return self.docs[self.starts[t]:self.starts[t + 1]], self.weights[self.starts[t]:self.starts[t + 1]]
+        slices = [slice(self.starts[t], self.starts[t + 1]) for t in terms]
+        docs = np.concatenate([self.docs[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        docs, inverse = np.unique(docs, return_inverse=True)
+        return docs, np.bincount(inverse, weights=weights)
+
+    def search(self, text, limit):
+        """返回 (文档号数组, 得分数组, 匹配总数)，按得分降序、热度降序排列"""
+        tokens = tokenize(text)
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0), 0
+
+        docs, scores = None, None
+        # 输入以空白结尾说明最后一个词已经输完，不再按前缀匹配
+        complete = text[-1:].isspace()
+        for i, token in enumerate(tokens):
+            terms = self._terms(token, prefix=(i == len(tokens) - 1 and not complete))
+            if len(terms) == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0), 0
+            token_docs, token_scores = self._postings(terms)
+            if docs is None:
+                docs, scores = token_docs, token_scores
+                continue
+            # 两个有序数组求交集
+            position = np.searchsorted(token_docs, docs)
+            position = np.minimum(position, len(token_docs) - 1)
+            keep = token_docs[position] == docs
+            docs, scores = docs[keep], scores[keep] + token_scores[position[keep]]
+            if len(docs) == 0:
+                break
+
+        total = len(docs)
+        ranking = scores + self.popularity[docs] * 1e-6
+        if total > limit:
+            top = np.argpartition(-ranking, limit)[:limit]
+        else:
+            top = np.arange(total)
+        top = top[np.argsort(-ranking[top], kind='stable')]
+        return docs[top], scores[top], total
+
+
+class PrefixIndex:
+    """作者姓名的有序前缀表
+
+    每位作者按归一化后的全名以及从每个词开始的后缀各登记一次
+    （'Noël C. Barengo' -> 'noel c barengo'、'c barengo'、'barengo'），
+    所以输入名或姓的开头都能补全。前缀对应表中连续的一段，按热度取前 k 个。
+    """
+
+    def __init__(self, names, popularity):
+        keys, owners = [], []
+        for i, name in enumerate(names):
+            tokens = tokenize(name)
+            for start in range(len(tokens)):
+                keys.append(' '.join(tokens[start:]))
+                owners.append(i)
+        keys = np.asarray(keys, dtype=object)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.owners = np.asarray(owners, dtype=np.int64)[order]
+        self.popularity = np.asarray(popularity, dtype=float)
+
+    def suggest(self, prefix, limit):
+        """返回 (作者下标数组, 匹配的作者数)，按热度降序"""
+        tokens = tokenize(prefix)
+        if not tokens:
+            return np.empty(0, dtype=np.int64), 0
+        # 输入以空白结尾说明最后一个词已经输完，只匹配后面还有词的姓名
+        prefix = ' '.join(tokens) + (' ' if prefix[-1:].isspace() else '')
+        lo = np.searchsorted(self.keys, prefix, 'left')
+        hi = np.searchsorted(self.keys, prefix + '\U0010ffff', 'left')
+        owners = np.unique(self.owners[lo:hi])
+        total = len(owners)
+        popularity = self.popularity[owners]
+        if total > limit:
+            top = np.argpartition(-popularity, limit)[:limit]
+        else:
+            top = np.arange(total)
+        top = top[np.lexsort((owners[top], -popularity[top]))]
+        return owners[top], total
+
+
+class SearchIndex:
+    """论文标题和作者姓名的检索索引，按数据集版本构建一次
+
+    论文按标题的 BM25 得分排序，得分相同时按引用数；作者按姓名得分排序，
+    得分相同时按论文数。作者补全只按论文数排序。
+    """
+
+    def __init__(self, papers, authors, paper_authors):
+        papers = papers.reset_index(drop=True)
+        authors = authors.reset_index(drop=True)
+        citations = pd.to_numeric(papers.get('CitationCount', 0), errors='coerce')
+        self.paper_counts = (
+            paper_authors['AuthorId'].value_counts()
+            .reindex(authors['AuthorId']).fillna(0).astype(np.int64).to_numpy()
+        )
+
+        self.paper_text = TextIndex(papers['Title'].fillna('').astype(str).tolist(),
+                                    np.broadcast_to(citations, len(papers)))
+        names = authors['DisplayName'].fillna('').astype(str).tolist()
+        self.author_text = TextIndex(names, self.paper_counts)
+        self.author_prefix = PrefixIndex(names, self.paper_counts)
+
+        # 结果字段预先转换成 Python 列表，组装每条结果只需按下标取值，不经过 pandas
+        self.paper_columns = {
+            column: column_values(papers[column])
+            for column in PAPER_FIELDS if column in papers.columns
+        }
+        self.author_columns = {
+            column: column_values(authors[column])
+            for column in AUTHOR_FIELDS if column in authors.columns
+        }
+        self.author_columns['paperCount'] = self.paper_counts.tolist()
+
+    @staticmethod
+    def records(columns, rows, scores=None):
+        rows = rows.tolist()
+        records = [{column: values[i] for column, values in columns.items()} for i in rows]
+        if scores is not None:
+            for record, score in zip(records, scores.tolist()):
+                record['score'] = round(score, 4)
+        return records
+
+    def search(self, q):
+        """执行检索，返回 {'query', 'papers', 'authors'}，每类含 total 和 results"""
+        result = {'query': {'q': q.q, 'type': q.type, 'limit': q.limit}}
+        if q.type in ('all', 'papers'):
+            rows, scores, total = self.paper_text.search(q.q, q.limit)
+            result['papers'] = {'total': total, 'results': self.records(self.paper_columns, rows, scores)}
+        if q.type in ('all', 'authors'):
+            rows, scores, total = self.author_text.search(q.q, q.limit)
+            result['authors'] = {'total': total, 'results': self.records(self.author_columns, rows, scores)}
+        return result
+
+    def suggest(self, q):
+        """作者姓名补全，返回 {'prefix', 'total', 'suggestions'}"""
+        rows, total = self.author_prefix.suggest(q.prefix, q.limit)
+        return {'prefix': q.prefix, 'total': total, 'suggestions': self.records(self.author_columns, rows)}
@@ -0,0 +1,77 @@
+# streaming.py
+import json
+
+from flask import Response
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# 每次转换和编码的行数：单个请求的峰值内存只与它有关，与结果总行数无关
+CHUNK_ROWS = 1000
+
+
+def wants_ndjson(request):
+    """Accept 中 application/x-ndjson 的优先级高于 application/json 时返回 NDJSON"""
+    accept = request.accept_mimetypes
+    return accept[NDJSON_MIMETYPE] > accept['application/json']
+
+
+def frame_chunks(df, rows=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """按块把 DataFrame 的行转换成记录列表，rows 为行号（None 表示按顺序的全部行）"""
+    total = len(df) if rows is None else len(rows)
+    for start in range(0, total, chunk_rows):
+        if rows is None:
+            chunk = df.iloc[start:start + chunk_rows]
+        else:
+            chunk = df.iloc[rows[start:start + chunk_rows]]
+        if columns is not None:
+            chunk = chunk[columns]
+        yield chunk.to_dict('records')
+
+
+def list_chunks(records, chunk_rows=CHUNK_ROWS):
+    """已有的记录列表按块切分（只切片，不复制记录）"""
+    for start in range(0, len(records), chunk_rows):
+        yield records[start:start + chunk_rows]
+
+
+def encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def header_name(key):
+    """元数据字段名 -> NDJSON 响应头，如 next_cursor -> X-Next-Cursor"""
+    return 'X-' + '-'.join(part.capitalize() for part in key.split('_'))
+
+
+def json_body(meta, key, chunks):
+    """{...meta, key: [记录...]}，每块记录编码后立即输出"""
+    head = encode(meta)
+    yield (head[:-1] + ',' if meta else '{') + encode(key) + ':['
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        # 整块一次编码再去掉外层的方括号，比逐条编码快
+        body = encode(chunk)[1:-1]
+        yield body if first else ',' + body
+        first = False
+    yield ']}'
+
+
+def ndjson_body(chunks):
+    for chunk in chunks:
+        if chunk:
+            yield '\n'.join(encode(record) for record in chunk) + '\n'
+
+
+def stream_records(request, key, chunks, meta):
+    """流式返回记录列表（分块传输，不设置 Content-Length）
+
+    默认返回与原接口相同结构的 JSON：meta 中的字段加上 key 对应的记录数组。
+    请求头 Accept: application/x-ndjson 时每行一条记录，meta 放在 X-* 响应头中。
+    """
+    headers = {'Vary': 'Accept'}
+    if wants_ndjson(request):
+        headers.update({header_name(k): str(v) for k, v in meta.items() if v is not None})
+        return Response(ndjson_body(chunks), mimetype=NDJSON_MIMETYPE, headers=headers)
+    return Response(json_body(meta, key, chunks), mimetype='application/json', headers=headers)
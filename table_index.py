@@ -0,0 +1,236 @@
+# table_index.py
+import base64
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# 单页最多返回的行数
+MAX_PAGE_SIZE = 1000
+
+
+class TableQuery:
+    """列表接口的查询参数：分页、排序、字段投影和筛选"""
+
+    def __init__(self, limit=None, offset=0, cursor=None, fields=None, sort=None,
+                 order='asc', year_from=None, year_to=None, field=None, prefix=None):
+        self.limit = limit
+        self.offset = offset
+        self.cursor = cursor
+        self.fields = fields
+        self.sort = sort
+        self.order = order
+        self.year_from = year_from
+        self.year_to = year_to
+        self.field = field
+        self.prefix = prefix
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+
+        def parse_int(key):
+            value = args.get(key)
+            if value is None or value == '':
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be an integer")
+
+        limit = parse_int('limit')
+        if limit is not None:
+            if limit < 1:
+                raise ValueError("'limit' must be positive")
+            limit = min(limit, MAX_PAGE_SIZE)
+
+        offset = parse_int('offset') or 0
+        if offset < 0:
+            raise ValueError("'offset' must not be negative")
+
+        order = args.get('order', 'asc').lower()
+        if order not in ('asc', 'desc'):
+            raise ValueError("'order' must be 'asc' or 'desc'")
+
+        fields = args.get('fields')
+        if fields:
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+
+        return cls(
+            limit=limit,
+            offset=offset,
+            cursor=args.get('cursor') or None,
+            fields=fields or None,
+            sort=args.get('sort') or None,
+            order=order,
+            year_from=parse_int('year_from'),
+            year_to=parse_int('year_to'),
+            field=args.get('field') or None,
+            prefix=args.get('prefix') or None,
+        )
+
+    def is_empty(self):
+        """没有任何参数时接口保持原来的行为（返回全部数据）"""
+        return (self.limit is None and self.offset == 0 and self.cursor is None
+                and self.fields is None and self.sort is None and self.year_from is None
+                and self.year_to is None and self.field is None and self.prefix is None)
+
+
+class TableIndex:
+    """表格的预排序索引
+
+    构建时为每个可排序列计算升序/降序行号，并为年份、领域和名称前缀
+    建立查找结构。查询时只需切片或在匹配的行上排序，
+    不需要扫描整张表。
+    """
+
+    def __init__(self, df, sort_columns, year_column=None, field_column=None, name_column=None):
+        self.df = df
+        self.columns = list(df.columns)
+        self.year_column = year_column
+        self.field_column = field_column
+        self.name_column = name_column
+        self.version = hashlib.sha1(
+            pd.util.hash_pandas_object(df, index=False).values.tobytes()
+        ).hexdigest()[:12]
+
+        # 排序索引：(列名, 顺序) -> 排好序的行号，以及行号 -> 排名
+        self.orders = {}
+        self.ranks = {}
+        for column in sort_columns:
+            if column not in df.columns:
+                continue
+            codes, _ = pd.factorize(df[column], sort=True)
+            missing = codes < 0
+            # 缺失值在两种顺序下都排在最后
+            asc_key = np.where(missing, codes.max() + 1 if len(codes) else 0, codes)
+            desc_key = np.where(missing, 1, -codes)
+            for order, key in (('asc', asc_key), ('desc', desc_key)):
+                rows = np.argsort(key, kind='stable')
+                rank = np.empty(len(rows), dtype=np.int64)
+                rank[rows] = np.arange(len(rows))
+                self.orders[(column, order)] = rows
+                self.ranks[(column, order)] = rank
+
+        # 年份区间：按年份排序的行号 + 排好序的年份值
+        if year_column in df.columns:
+            years = pd.to_numeric(df[year_column], errors='coerce').to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(years))
+            by_year = valid[np.argsort(years[valid], kind='stable')]
+            self._year_rows = by_year
+            self._year_values = years[by_year]
+        else:
+            self.year_column = None
+
+        # 领域：小写领域名 -> 行号
+        if field_column in df.columns:
+            groups = df.groupby(df[field_column].str.lower(), sort=False).indices
+            self._field_rows = {key: np.asarray(rows) for key, rows in groups.items()}
+        else:
+            self.field_column = None
+
+        # 名称前缀：按小写名称排序的行号 + 排好序的小写名称
+        if name_column in df.columns:
+            names = df[name_column].fillna('').astype(str).str.lower().to_numpy(dtype=object)
+            by_name = np.argsort(names, kind='stable')
+            self._name_rows = by_name
+            self._name_values = names[by_name]
+        else:
+            self.name_column = None
+
+    def _candidates(self, query):
+        """各筛选条件对应的行号集合，没有筛选条件时返回 None"""
+        sets = []
+
+        if query.year_from is not None or query.year_to is not None:
+            if self.year_column is None:
+                raise ValueError('Year filters are not supported for this table')
+            lo = 0 if query.year_from is None else np.searchsorted(self._year_values, query.year_from, 'left')
+            hi = len(self._year_values) if query.year_to is None else np.searchsorted(self._year_values, query.year_to, 'right')
+            sets.append(self._year_rows[lo:hi])
+
+        if query.field is not None:
+            if self.field_column is None:
+                raise ValueError("'field' filter is not supported for this table")
+            sets.append(self._field_rows.get(query.field.lower(), np.empty(0, dtype=np.int64)))
+
+        if query.prefix is not None:
+            if self.name_column is None:
+                raise ValueError("'prefix' filter is not supported for this table")
+            prefix = query.prefix.lower()
+            lo = np.searchsorted(self._name_values, prefix, 'left')
+            hi = np.searchsorted(self._name_values, prefix + '\uffff', 'right')
+            sets.append(self._name_rows[lo:hi])
+
+        if not sets:
+            return None
+
+        # 从最小的集合开始求交集
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            rows = rows[np.isin(rows, other, assume_unique=True)]
+        return rows
+
+    def encode_cursor(self, offset):
+        token = json.dumps({'o': offset, 'v': self.version}).encode()
+        return base64.urlsafe_b64encode(token).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            token = json.loads(base64.urlsafe_b64decode(padded))
+            offset, version = int(token['o']), token['v']
+        except Exception:
+            raise ValueError('Invalid cursor')
+        if version != self.version:
+            raise ValueError('Cursor has expired because the data changed, please restart paging')
+        return offset
+
+    def rows(self, query):
+        """执行查询，返回 (匹配总数, 当前页的行号, 下一页 cursor)"""
+        fields = query.fields
+        if fields is not None:
+            unknown = [f for f in fields if f not in self.columns]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        if query.sort is not None and (query.sort, query.order) not in self.orders:
+            raise ValueError(f"Cannot sort by '{query.sort}'")
+
+        offset = self.decode_cursor(query.cursor) if query.cursor else query.offset
+        end = None if query.limit is None else offset + query.limit
+
+        candidates = self._candidates(query)
+        if candidates is None:
+            total = len(self.df)
+            if query.sort is None:
+                page = np.arange(offset, min(end or total, total))
+            else:
+                page = self.orders[(query.sort, query.order)][offset:end]
+        else:
+            total = len(candidates)
+            if query.sort is None:
+                ordered = np.sort(candidates)
+            else:
+                rank = self.ranks[(query.sort, query.order)]
+                ordered = candidates[np.argsort(rank[candidates], kind='stable')]
+            page = ordered[offset:end]
+
+        next_cursor = None
+        if end is not None and end < total:
+            next_cursor = self.encode_cursor(end)
+        return total, page, next_cursor
+
+    def records(self, rows, fields=None):
+        """行号 -> 记录列表（fields 为投影的列）"""
+        frame = self.df.iloc[rows]
+        if fields is not None:
+            frame = frame[fields]
+        return frame.to_dict('records')
+
+    def query(self, query):
+        """执行查询，返回 (匹配总数, 当前页的记录, 下一页 cursor)"""
+        total, page, next_cursor = self.rows(query)
+        return total, self.records(page, query.fields), next_cursor
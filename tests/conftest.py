@@ -0,0 +1,88 @@
+# conftest.py
+# 根目录的模块（app.py、*_index.py）按包名导入 scripts.*，
+# scripts 下的脚本之间用同级导入（import table_io），两个目录都要在 sys.path 上。
+import importlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, 'scripts')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# API 测试数据集的论文数，超过一个流式分块（streaming.CHUNK_ROWS）
+API_PAPERS = 2500
+
+
+def write_api_dataset(data_dir):
+    """API 测试用的数据集：四张表（CSV + Arrow）和两个网络（JSON + .bin）"""
+    from scripts import network_io, table_io
+
+    rng = np.random.RandomState(11)
+    paper_ids = [f'W{1000 + i}' for i in range(API_PAPERS)]
+    papers = pd.DataFrame({
+        'PaperId': paper_ids,
+        'Title': [f'Paper {i} über graphs' if i % 7 == 0 else f'Paper {i}' for i in range(API_PAPERS)],
+        'Year': rng.randint(2012, 2025, size=API_PAPERS),
+        'CitationCount': rng.randint(0, 50, size=API_PAPERS),
+        'FieldsOfStudy': np.where(rng.rand(API_PAPERS) < 0.6, 'Computer Science', 'General'),
+    })
+    authors = pd.DataFrame({
+        'AuthorId': np.arange(1, 301),
+        'DisplayName': [f'Author {i}' for i in range(1, 301)],
+        'OpenAlexId': [f'A{i}' for i in range(1, 301)],
+    })
+    paper_authors = pd.DataFrame(
+        [(paper, int(author), str(position + 1))
+         for paper in paper_ids
+         for position, author in enumerate(rng.choice(authors['AuthorId'], size=rng.randint(1, 4), replace=False))],
+        columns=['PaperId', 'AuthorId', 'AuthorSequenceNumber'],
+    )
+    references = pd.DataFrame(
+        [(paper_ids[i], paper_ids[j]) for i in range(1, API_PAPERS, 3) for j in rng.randint(0, i, size=2)],
+        columns=['PaperId', 'PaperReferenceId'],
+    )
+    for df, name in ((papers, 'papers'), (authors, 'authors'),
+                     (paper_authors, 'paper_author_affiliations'), (references, 'paper_references')):
+        table_io.write_table(df, name, data_dir)
+
+    author_network = {
+        'nodes': [{'id': str(i), 'name': f'Author {i}', 'paperCount': i % 5 + 1} for i in range(1, 21)],
+        'links': [{'source': str(i), 'target': str(i + 1), 'weight': i % 3 + 1} for i in range(1, 20)],
+        'metadata': {'total_authors': 20},
+    }
+    citation_network = {
+        'nodes': [{'id': paper, 'year': 2020} for paper in paper_ids[:10]],
+        'links': [{'source': paper_ids[i], 'target': paper_ids[i - 1]} for i in range(1, 10)],
+        'metadata': {'total_papers': 10},
+    }
+    network_io.save_network(author_network, os.path.join(data_dir, 'author_network.json'))
+    network_io.save_network(citation_network, os.path.join(data_dir, 'citation_network.json'))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / 'processed'
+    path.mkdir()
+    write_api_dataset(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def api(data_dir, monkeypatch):
+    """在 data_dir 上重新导入 app.py（不注册 /metrics），测试结束后移除该模块"""
+    monkeypatch.setenv('SCISCINET_DATA_DIR', data_dir)
+    monkeypatch.setenv('SCISCINET_METRICS', '0')
+    sys.modules.pop('app', None)
+    yield importlib.import_module('app')
+    sys.modules.pop('app', None)
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import bench_pipeline
+
+
+def test_generated_works_are_deterministic_and_consistent(tmp_path):
+    first, second = tmp_path / 'a.ndjson', tmp_path / 'b.ndjson'
+    stats = bench_pipeline.generate_works(200, str(first), seed=3)
+    bench_pipeline.generate_works(200, str(second), seed=3)
+    assert first.read_bytes() == second.read_bytes()
+
+    works = [json.loads(line) for line in first.read_text().splitlines()]
+    assert stats['papers'] == len(works) == 200
+    assert stats['references'] == sum(len(w['referenced_works']) for w in works)
+    for i, work in enumerate(works):
+        assert bench_pipeline.FIRST_YEAR <= work['publication_year'] <= bench_pipeline.LAST_YEAR
+        ids = [a['author']['id'] for a in work['authorships']]
+        assert len(ids) == len(set(ids))
+        # 数据集内的引用只指向更早生成的论文
+        internal = [int(ref.rsplit('W', 1)[1]) for ref in work['referenced_works']]
+        assert all(ref < i or ref >= 200 for ref in internal)
+
+
+@pytest.mark.skipif(not hasattr(__import__('os'), 'fork'), reason='stages run in forked processes')
+def test_small_run_exercises_every_stage_and_route():
+    result = bench_pipeline.run_size(300, seed=1)
+    for name, stage in result['stages'].items():
+        assert 'error' not in stage, (name, stage)
+    assert 'error' not in result['api'], result['api']
+    statuses = {path: route['status'] for path, route in result['api']['routes'].items()}
+    assert set(statuses) == set(bench_pipeline.ROUTES)
+    assert set(statuses.values()) == {200}, statuses
+
+
+def test_compare_reports_time_ratios(capsys):
+    def report(revision, seconds, median_ms):
+        return {'git_revision': revision, 'results': {'1000': {
+            'stages': {'process_papers_data': {'seconds': seconds}, 'broken': {'error': 'x'}},
+            'api': {'startup': {'seconds': 1.0}, 'routes': {'/api/papers': {'median_ms': median_ms}}},
+        }}}
+
+    old, new = report('abc', 2.0, 10.0), report('def', 1.0, 20.0)
+    assert bench_pipeline.flatten(new) == {
+        ('1000', 'process_papers_data'): 1.0, ('1000', 'api startup'): 1.0, ('1000', '/api/papers'): 0.02,
+    }
+    bench_pipeline.compare(old, new)
+    out = capsys.readouterr().out
+    assert 'abc' in out and 'x0.50' in out and 'x2.00' in out
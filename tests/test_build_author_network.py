@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import build_author_network as builder
+
+pytest.importorskip('scipy')
+
+MODES = [(None, 'skip'), (2, 'skip'), (2, 'downweight'), (4, 'downweight')]
+
+
+def paper_authors():
+    """随机的论文-作者关系，外加几篇 33 人的论文（downweight 时每对权重 1/32）
+    和一篇同一作者出现两次的论文"""
+    rng = np.random.RandomState(7)
+    rows = []
+    for paper in range(200):
+        size = rng.randint(1, 6)
+        rows += [(paper, int(a)) for a in rng.choice(60, size=size, replace=False)]
+    for paper in range(200, 204):
+        rows += [(paper, int(a)) for a in rng.choice(60, size=33, replace=False)]
+    rows += [(204, 3), (204, 5), (204, 3)]
+    df = pd.DataFrame(rows, columns=['PaperIdx', 'AuthorId'])
+    # 打乱行的顺序，结果不应依赖输入顺序
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('max_authors, mode', MODES)
+def test_sparse_engine_matches_loop_exactly(max_authors, mode):
+    df = paper_authors()
+    loop = builder.build_edges_loop(df, max_authors, mode)
+    fast = builder.build_edges_sparse(df, max_authors, mode)
+    pd.testing.assert_frame_equal(fast, loop, check_dtype=False, check_exact=True)
+
+
+def test_repeated_author_gives_self_loop_and_double_weight():
+    df = pd.DataFrame({'PaperIdx': [1, 1, 1], 'AuthorId': [3, 5, 3]})
+    edges = builder.build_edges_sparse(df)
+    assert edges.values.tolist() == [[3, 3, 1], [3, 5, 2]]
+
+
+@pytest.mark.parametrize('max_authors, mode', MODES)
+def test_network_links_match_between_engines(max_authors, mode):
+    df = paper_authors()
+    papers = pd.DataFrame({'PaperIdx': df['PaperIdx'].unique(), 'Year': 2020})
+    authors = pd.DataFrame({'AuthorId': range(60), 'DisplayName': [f'A{i}' for i in range(60)]})
+    networks = [builder.build_network(papers, authors, df, engine=engine, max_authors=max_authors,
+                                      hyper_author_mode=mode)
+                for engine in ('loop', 'sparse')]
+    assert networks[0] == networks[1]
+    if mode == 'downweight' and max_authors == 2:
+        assert 0.0312 in {link['weight'] for link in networks[1]['links']}
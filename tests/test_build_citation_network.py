@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import build_citation_network as builder
+from table_io import write_table
+
+PAPERS = pd.DataFrame({
+    'PaperId': ['W1', 'W2', 'W3', 'W4'],
+    'Title': ['One', 'Two', None, 'Four'],
+    'Year': [2020, 2021, 2022, 2023],
+    'CitationCount': [4, None, 1, 0],
+    'PaperIdx': [0, 1, 2, 3],
+})
+# W9 / W8 不在论文表中，这些引用不是内部引用
+REFERENCES = pd.DataFrame({
+    'PaperId': ['W2', 'W3', 'W3', 'W4', 'W4', 'W9', 'W1'],
+    'PaperReferenceId': ['W1', 'W1', 'W2', 'W9', 'W3', 'W1', 'W8'],
+    'PaperIdx': [1, 2, 2, 3, 3, 9, 0],
+    'PaperReferenceIdx': [0, 0, 1, 9, 2, 0, 8],
+})
+EXPECTED_LINKS = [('W2', 'W1'), ('W3', 'W1'), ('W3', 'W2'), ('W4', 'W3')]
+
+
+def link_pairs(network):
+    return [(link['source'], link['target']) for link in network['links']]
+
+
+def test_nodes_and_internal_links():
+    network = builder.build_network(PAPERS, REFERENCES[['PaperIdx', 'PaperReferenceIdx']])
+    assert link_pairs(network) == EXPECTED_LINKS
+    assert network['nodes'][1] == {'id': 'W2', 'title': 'Two', 'year': 2021, 'citationCount': 0}
+    assert network['metadata'] == {'total_papers': 4, 'total_citations': 4, 'year_range': '2020-2023'}
+
+
+@pytest.mark.parametrize('legacy', [False, True])
+def test_chunked_scan_matches_the_in_memory_filter(tmp_path, legacy):
+    references = REFERENCES[['PaperId', 'PaperReferenceId']] if legacy else REFERENCES
+    write_table(references, 'paper_references', str(tmp_path))
+    internal = builder.stream_internal_citations(PAPERS, str(tmp_path), chunk_size=2)
+    streamed = builder.network_from_citations(PAPERS, internal)
+    assert link_pairs(streamed) == EXPECTED_LINKS
+    assert streamed == builder.build_network(PAPERS, REFERENCES)
+
+
+def test_chunked_scan_without_internal_citations(tmp_path):
+    write_table(REFERENCES.iloc[[3, 5, 6]], 'paper_references', str(tmp_path))
+    internal = builder.stream_internal_citations(PAPERS, str(tmp_path), chunk_size=2)
+    assert internal.empty
+    assert builder.network_from_citations(PAPERS, internal)['links'] == []
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from data_store import DatasetStore
+from scripts import table_io
+from scripts.network_io import BinaryNetwork
+
+
+def touch(path, seconds=5):
+    """只改 mtime，不改内容和大小"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10 ** 9))
+
+
+def test_datasets_are_loaded_once_and_shared(data_dir):
+    store = DatasetStore(data_dir)
+    papers = store.papers()
+    assert store.papers() is papers
+    assert 'PaperIdx' not in papers.columns
+    assert store.path('papers').endswith('.arrow')
+    assert isinstance(store.author_network(), BinaryNetwork)
+    assert set(store.preload()) == {'papers', 'authors', 'paper_authors', 'paper_references',
+                                    'author_network', 'citation_network'}
+    with pytest.raises(KeyError):
+        store.get('nope')
+
+
+def test_reload_after_mtime_or_size_change(data_dir):
+    store = DatasetStore(data_dir)
+    authors = store.authors()
+
+    touch(store.path('authors'))
+    reloaded = store.authors()
+    assert reloaded is not authors
+    assert reloaded.equals(authors)
+
+    table_io.write_table(pd.DataFrame({'AuthorId': [1], 'DisplayName': ['Solo'], 'OpenAlexId': ['A1']}),
+                         'authors', data_dir)
+    assert store.authors()['DisplayName'].tolist() == ['Solo']
+
+
+def test_derived_results_follow_their_datasets(data_dir):
+    store = DatasetStore(data_dir)
+    builds = []
+
+    def count(papers, authors):
+        builds.append(1)
+        return len(papers), len(authors)
+
+    assert store.derived('sizes', ['papers', 'authors'], count) == (2500, 300)
+    assert store.derived('sizes', ['papers', 'authors'], count) == (2500, 300)
+    assert len(builds) == 1
+    touch(store.path('authors'))
+    store.derived('sizes', ['papers', 'authors'], count)
+    assert len(builds) == 2
+
+
+def test_observer_sees_hits_and_loads(data_dir):
+    store = DatasetStore(data_dir)
+    events = []
+    store.observer = lambda kind, name, hit, seconds: events.append((kind, name, hit))
+    store.authors()
+    store.authors()
+    assert events == [('dataset', 'authors', False), ('dataset', 'authors', True)]
+
+
+def test_routes_see_rebuilt_files(client, data_dir):
+    assert client.get('/api/stats').get_json()['author_network']['nodes'] == 20
+    assert client.get('/api/authors').get_json()['total'] == 300
+
+    # 只重写 JSON：.bin 比 JSON 旧，之后读 JSON
+    path = os.path.join(data_dir, 'author_network.json')
+    with open(path, 'w') as f:
+        json.dump({'nodes': [{'id': '1'}], 'links': [], 'metadata': {}}, f)
+    touch(path)
+    stats = client.get('/api/stats').get_json()
+    assert stats['author_network'] == {'nodes': 1, 'links': 0, 'metadata': {}}
+    assert client.get('/api/author-network').get_json()['nodes'] == [{'id': '1'}]
+
+    os.remove(os.path.join(data_dir, 'authors.arrow'))
+    pd.DataFrame({'AuthorId': [7], 'DisplayName': ['Late'], 'OpenAlexId': ['A7']}).to_csv(
+        os.path.join(data_dir, 'authors.csv'), index=False)
+    assert client.get('/api/authors').get_json() == {
+        'total': 1, 'authors': [{'AuthorId': 7, 'DisplayName': 'Late', 'OpenAlexId': 'A7'}]}
@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from detail_index import MAX_DETAIL_LIMIT, DetailIndex, DetailQuery
+
+
+@pytest.fixture(scope='module')
+def index():
+    papers = pd.DataFrame({
+        'PaperId': ['W1', 'W2', 'W3', 'W4'],
+        'Title': ['One', 'Two', 'Three', 'Four'],
+        'Year': [2019, 2022, None, 2021],
+        'CitationCount': [9, 3, 0, 1],
+    })
+    authors = pd.DataFrame({
+        'AuthorId': [10, 20, 30],
+        'DisplayName': ['Ada', 'Bo', 'Cy'],
+        'OpenAlexId': ['A10', 'A20', 'A30'],
+    })
+    # 一位作者在一篇论文有两个机构时有两行；AuthorId 99 不在作者表中
+    paper_authors = pd.DataFrame({
+        'PaperId': ['W1', 'W1', 'W1', 'W2', 'W2', 'W3', 'W4', 'W4', 'W4'],
+        'AuthorId': [10, 10, 20, 20, 10, 10, 30, 10, 99],
+        'AuthorSequenceNumber': ['first', 'first', 'last', 'first', 'last', 'first', 'first', 'last', 'middle'],
+    })
+    references = pd.DataFrame({
+        'PaperId': ['W2', 'W2', 'W4', 'W3', 'W9'],
+        'PaperReferenceId': ['W1', 'X7', 'W1', 'W1', 'W1'],
+    })
+    return DetailIndex(papers, authors, paper_authors, references)
+
+
+def test_author_detail(index):
+    detail = index.author(10, DetailQuery())
+    assert detail['author'] == {'AuthorId': 10, 'DisplayName': 'Ada', 'OpenAlexId': 'A10'}
+    # 按年份倒序，没有年份的排在最后；重复的机构行只算一次
+    assert detail['paperCount'] == 4
+    assert [(p['PaperId'], p['AuthorSequenceNumber']) for p in detail['papers']] == [
+        ('W2', 'last'), ('W4', 'last'), ('W1', 'first'), ('W3', 'first')]
+    # 合作者按合作论文数倒序
+    assert detail['coauthorCount'] == 2
+    assert [(c['AuthorId'], c['sharedPapers']) for c in detail['coauthors']] == [(20, 2), (30, 1)]
+
+
+def test_paper_detail(index):
+    detail = index.paper('W2', DetailQuery())
+    assert detail['paper'] == {'PaperId': 'W2', 'Title': 'Two', 'Year': 2022, 'CitationCount': 3}
+    assert [(a['AuthorId'], a['AuthorSequenceNumber']) for a in detail['authors']] == [(20, 'first'), (10, 'last')]
+    # 不在论文表中的参考文献只有 PaperId
+    assert detail['referenceCount'] == 2
+    assert detail['references'] == [
+        {'PaperId': 'W1', 'Title': 'One', 'Year': 2019, 'CitationCount': 9}, {'PaperId': 'X7'}]
+    assert detail['citedByCount'] == 0
+
+    cited = index.paper('W1', DetailQuery())
+    # 来自不在论文表中的 W9 的引用不计入
+    assert cited['citedByCount'] == 3
+    assert [p['PaperId'] for p in cited['citedBy']] == ['W2', 'W4', 'W3']
+
+
+def test_limit_truncates_lists_but_not_counts(index):
+    detail = index.author(10, DetailQuery(limit=1))
+    assert (detail['paperCount'], len(detail['papers'])) == (4, 1)
+    assert (detail['coauthorCount'], len(detail['coauthors'])) == (2, 1)
+    cited = index.paper('W1', DetailQuery(limit=2))
+    assert (cited['citedByCount'], len(cited['citedBy'])) == (3, 2)
+
+
+def test_unknown_ids_raise_key_error(index):
+    with pytest.raises(KeyError):
+        index.paper('W404', DetailQuery())
+    with pytest.raises(KeyError):
+        index.author(99, DetailQuery())
+
+
+def test_query_args():
+    assert DetailQuery.from_args({}).limit is None
+    assert DetailQuery.from_args({'limit': str(MAX_DETAIL_LIMIT + 1)}).limit == MAX_DETAIL_LIMIT
+    for args in ({'limit': '0'}, {'limit': 'all'}):
+        with pytest.raises(ValueError):
+            DetailQuery.from_args(args)
@@ -0,0 +1,158 @@
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from download_data import (load_job, process_papers_data, process_raw_files, raw_shards,
+                           resolve_institution, works_filter)
+
+# 两个机构的原始下载：W2 两个机构都有；第二个文件里有一条缺 id 的坏记录、
+# 一个没有 author 的作者关系和一个空的参考文献
+FIRST = [
+    {"id": "https://openalex.org/W1", "title": "Graphs", "publication_year": 2021, "cited_by_count": 4,
+     "authorships": [{"author": {"id": "https://openalex.org/A1", "display_name": "Ana"}, "author_position": "first"},
+                     {"author": {"id": "https://openalex.org/A9", "display_name": "Ira"}, "author_position": "last"}],
+     "referenced_works": ["https://openalex.org/W2", "https://openalex.org/W50"],
+     "topics": [{"display_name": "Computer vision"}]},
+    {"id": "https://openalex.org/W2", "title": "Tables", "publication_year": 2020, "cited_by_count": 9,
+     "authorships": [{"author": {"id": "https://openalex.org/A2", "display_name": "Ben"}, "author_position": "first"}],
+     "referenced_works": [], "topics": []},
+]
+SECOND = [
+    {"id": "https://openalex.org/W2", "title": "Tables (again)", "publication_year": 2020, "cited_by_count": 9,
+     "authorships": [{"author": {"id": "https://openalex.org/A3", "display_name": "Cy"}, "author_position": "first"}],
+     "referenced_works": ["https://openalex.org/W1"], "topics": []},
+    {"title": "No id", "publication_year": 2022},
+    {"id": "https://openalex.org/W3", "title": "Trees", "publication_year": 2022, "cited_by_count": 0,
+     "authorships": [{"author": {}, "author_position": "first"},
+                     {"author": {"id": "https://openalex.org/A1", "display_name": "Ana B."}, "author_position": "middle"}],
+     "referenced_works": ["", "https://openalex.org/W100", "https://openalex.org/W1"],
+     "topics": [{"display_name": "Theory"}]},
+]
+
+
+@pytest.fixture
+def raw_files(tmp_path):
+    paths = []
+    for name, works in (('I1.ndjson', FIRST), ('I2.ndjson', SECOND)):
+        path = tmp_path / name
+        path.write_text(''.join(json.dumps(work) + '\n' for work in works))
+        paths.append(str(path))
+    return paths
+
+
+def existing_maps():
+    """续传时已有的映射：A9 和 W100 已经分配过 id"""
+    return {'A9': 5}, {'W100': 0, 'W2': 7}
+
+
+def assert_same_tables(left, right):
+    for a, b in zip(left, right):
+        pd.testing.assert_frame_equal(a, b)
+
+
+@pytest.mark.parametrize('workers, shard_bytes', [(1, 1 << 20), (1, 64), (2, 64)])
+def test_sharded_and_parallel_parsing_match_serial_processing(raw_files, workers, shard_bytes):
+    authors_ref, papers_ref = existing_maps()
+    expected = process_papers_data(FIRST + SECOND, authors_ref, papers_ref)
+
+    author_map, paper_map = existing_maps()
+    result = process_raw_files(raw_files, author_map, paper_map, workers=workers, shard_bytes=shard_bytes)
+    assert_same_tables(result, expected)
+    assert (author_map, paper_map) == (authors_ref, papers_ref)
+
+
+def test_duplicates_and_malformed_works(raw_files):
+    author_map, paper_map = existing_maps()
+    papers, authors, paper_authors, citations = process_raw_files(raw_files, author_map, paper_map, workers=1)
+    # 重复的 W2 只保留第一次出现的，坏记录整篇跳过
+    assert papers['PaperId'].tolist() == ['W1', 'W2', 'W3']
+    assert papers['Title'].tolist() == ['Graphs', 'Tables', 'Trees']
+    assert papers['FieldsOfStudy'].tolist() == ['Computer Science', 'General', 'General']
+    assert papers['PaperIdx'].tolist() == [8, 7, 10]
+    # 已知作者沿用原来的 id，新作者从最大 id 之后分配，姓名取第一次出现的
+    assert dict(zip(authors['OpenAlexId'], authors['AuthorId'])) == {'A1': 6, 'A9': 5, 'A2': 7}
+    assert authors.set_index('OpenAlexId').loc['A1', 'DisplayName'] == 'Ana'
+    assert paper_authors['PaperId'].tolist() == ['W1', 'W1', 'W2', 'W3']
+    assert citations[['PaperId', 'PaperReferenceId']].values.tolist() == [
+        ['W1', 'W2'], ['W1', 'W50'], ['W3', 'W100'], ['W3', 'W1']]
+    assert citations['PaperReferenceIdx'].tolist() == [7, 9, 0, 8]
+
+
+def test_shards_end_on_line_boundaries(raw_files):
+    shards = raw_shards(raw_files, shard_bytes=100)
+    assert len(shards) > len(raw_files)
+    for path in raw_files:
+        data = open(path, 'rb').read()
+        ranges = [(start, end) for p, start, end in shards if p == path]
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        assert all(data[end - 1:end] == b'\n' for _, end in ranges)
+
+
+def write_job(tmp_path, job):
+    path = tmp_path / 'job.json'
+    path.write_text(json.dumps(job))
+    return str(path)
+
+
+def test_load_job_normalises_a_valid_job(tmp_path):
+    job = load_job(write_job(tmp_path, {
+        'institutions': [' I1 ', 'UC San Diego'], 'start_year': 2020, 'end_year': 2021,
+        'field': 'https://openalex.org/fields/17',
+    }))
+    assert job == {'institutions': ['I1', 'UC San Diego'], 'start_year': 2020, 'end_year': 2021,
+                   'field': '17', 'max_papers': None}
+
+
+@pytest.mark.parametrize('job, message', [
+    ([], 'JSON object'),
+    ({'institutions': ['I1'], 'start_year': 2020, 'end_year': 2021, 'years': 1}, 'unknown job field'),
+    ({'institutions': [], 'start_year': 2020, 'end_year': 2021}, 'institutions'),
+    ({'institutions': ['I1', '  '], 'start_year': 2020, 'end_year': 2021}, 'institutions'),
+    ({'institutions': ['I1'], 'start_year': '2020', 'end_year': 2021}, 'start_year'),
+    ({'institutions': ['I1'], 'start_year': 2022, 'end_year': 2021}, 'after'),
+    ({'institutions': ['I1'], 'start_year': 2020, 'end_year': 2021, 'max_papers': 0}, 'max_papers'),
+    ({'institutions': ['I1'], 'start_year': 2020, 'end_year': 2021, 'field': [17]}, 'field'),
+])
+def test_load_job_rejects_invalid_jobs(tmp_path, job, message):
+    with pytest.raises(ValueError, match=message):
+        load_job(write_job(tmp_path, job))
+
+
+class FakeClient:
+    """只回答 /institutions 搜索的 OpenAlex 客户端"""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def get(self, path, params):
+        self.calls.append((path, params))
+        return {'results': self.results}
+
+
+def test_resolve_institution_by_id_or_name():
+    client = FakeClient([{'id': 'https://openalex.org/I42', 'display_name': 'Example University'}])
+    assert resolve_institution(client, 'https://openalex.org/i7/') == 'I7'
+    assert resolve_institution(client, 'I138006243') == 'I138006243'
+    assert client.calls == []
+    assert resolve_institution(client, 'Example University') == 'I42'
+    assert client.calls == [('institutions', {'search': 'Example University', 'per_page': 1})]
+    with pytest.raises(ValueError, match='not found'):
+        resolve_institution(FakeClient([]), 'Nowhere College')
+
+
+def test_works_filter():
+    assert works_filter(['I1']) == 'institutions.id:I1'
+    assert works_filter(['I1', 'I2'], field='17') == 'institutions.id:I1|I2,primary_topic.field.id:17'
+
+
+def test_importing_the_module_creates_no_directories(tmp_path):
+    scripts = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+    subprocess.run([sys.executable, '-c', 'import download_data, incremental_refresh'],
+                   cwd=tmp_path, env=dict(os.environ, PYTHONPATH=scripts), check=True)
+    assert list(tmp_path.iterdir()) == []
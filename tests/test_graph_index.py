@@ -0,0 +1,74 @@
+import pytest
+
+from graph_index import MAX_HOPS, GraphIndex, GraphQuery
+
+#   1 -5- 2 -1- 3 -1- 4
+#   |           |
+#   2           3
+#   |           |
+#   5           6 -1- 7      8（孤立）
+NETWORK = {
+    'nodes': [{'id': str(i), 'name': f'A{i}', 'paperCount': i} for i in range(1, 9)],
+    'links': [
+        {'source': '1', 'target': '2', 'weight': 5},
+        {'source': '2', 'target': '3', 'weight': 1},
+        {'source': '3', 'target': '4', 'weight': 1},
+        {'source': '1', 'target': '5', 'weight': 2},
+        {'source': '3', 'target': '6', 'weight': 3},
+        {'source': '6', 'target': '7', 'weight': 1},
+        {'source': '6', 'target': '99', 'weight': 1},  # 端点不存在的边被忽略
+    ],
+    'metadata': {'total_authors': 8},
+}
+
+
+@pytest.fixture(scope='module')
+def index():
+    return GraphIndex(NETWORK)
+
+
+def node_ids(result):
+    return sorted(int(node['id']) for node in result['nodes'])
+
+
+def test_from_args_defaults_and_validation():
+    q = GraphQuery.from_args({'author': '3', 'min_weight': '1.5'})
+    assert (q.author, q.hops, q.min_weight) == ('3', 1, 1.5)
+    assert GraphQuery.from_args({}).is_empty()
+    for args in ({'hops': str(MAX_HOPS + 1)}, {'hops': '0'}, {'top': '0'}, {'min_weight': 'heavy'}):
+        with pytest.raises(ValueError):
+            GraphQuery.from_args(args)
+
+
+def test_ego_network_grows_with_hops(index):
+    assert node_ids(index.query(GraphQuery(author='1'))) == [1, 2, 5]
+    assert node_ids(index.query(GraphQuery(author='1', hops=2))) == [1, 2, 3, 5]
+    result = index.query(GraphQuery(author='1', hops=3))
+    assert node_ids(result) == [1, 2, 3, 4, 5, 6]
+    # 子图中的边是选中节点之间的全部边
+    assert len(result['links']) == 5
+    assert result['metadata']['subgraph_links'] == 5
+    assert result['metadata']['total_authors'] == 8
+
+
+def test_min_weight_cuts_edges_before_traversal(index):
+    result = index.query(GraphQuery(author='3', hops=2, min_weight=2))
+    assert node_ids(result) == [3, 6]
+    assert [link['weight'] for link in result['links']] == [3]
+
+
+def test_min_papers_keeps_the_center(index):
+    assert node_ids(index.query(GraphQuery(author='2', hops=3, min_papers=3))) == [2, 3, 4, 6, 7]
+    assert node_ids(index.query(GraphQuery(min_papers=7))) == [7, 8]
+
+
+def test_top_ranks_by_degree_in_the_filtered_subgraph(index):
+    # 全图度数：3 -> 3；2、6 -> 2（相同度数按原始顺序）
+    assert node_ids(index.query(GraphQuery(top=3))) == [1, 2, 3]
+    # ego 子图 {1, 2, 3, 5} 中 3 的度数只有 1；中心作者替换最后一名始终保留
+    assert node_ids(index.query(GraphQuery(author='5', hops=3, top=2))) == [1, 5]
+
+
+def test_unknown_author_raises_key_error(index):
+    with pytest.raises(KeyError):
+        index.query(GraphQuery(author='404'))
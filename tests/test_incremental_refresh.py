@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+import build_author_network as author_builder
+import build_citation_network as citation_builder
+import download_data
+import incremental_refresh as refresh
+
+# (论文, 年份, 作者, 参考文献)
+BASE = [
+    ('W1', 2020, ['A1', 'A2'], []),
+    ('W2', 2021, ['A1', 'A3'], ['W1']),
+    ('W3', 2021, ['A2', 'A3', 'A4'], ['W1', 'W2', 'W9']),
+    ('W4', 2022, ['A4', 'A5'], ['W3', 'X1']),
+    ('W5', 2019, ['A5', 'A6'], ['W4']),
+]
+UPDATES = [
+    ('W2', 2021, ['A1', 'A5'], ['W1', 'W4']),   # 作者和引用都变了
+    ('W4', 2018, ['A4', 'A5'], ['W3']),         # 移出 2020-2025
+    ('W9', 2023, ['A6', 'A7'], ['W1']),         # 新论文，W3 早就引用了它
+]
+
+
+def works(rows):
+    return [{
+        'id': f'https://openalex.org/{paper}',
+        'title': f'Paper {paper}',
+        'publication_year': year,
+        'cited_by_count': 1,
+        'authorships': [
+            {'author_position': 'first' if i == 0 else 'middle',
+             'author': {'id': f'https://openalex.org/{a}', 'display_name': f'Author {a}'}}
+            for i, a in enumerate(authors)
+        ],
+        'referenced_works': [f'https://openalex.org/{r}' for r in references],
+        'topics': ['Computer science'],
+    } for paper, year, authors, references in rows]
+
+
+def tables(frames):
+    names = ['papers', 'authors', 'paper_authors', 'references']
+    return {name: refresh.with_columns(df, name) for name, df in zip(names, frames)}
+
+
+def author_network(t):
+    return author_builder.build_network(author_builder.filter_papers(t['papers']), t['authors'], t['paper_authors'])
+
+
+def citation_network(t):
+    return citation_builder.build_network(author_builder.filter_papers(t['papers']), t['references'])
+
+
+@pytest.fixture
+def refreshed():
+    author_map, paper_map = {}, {}
+    old = tables(download_data.process_papers_data(works(BASE), author_map, paper_map))
+    delta = tables(download_data.process_papers_data(works(UPDATES), author_map, paper_map))
+    new, changed = refresh.merge_tables(old, delta)
+    return old, new, changed
+
+
+def test_merge_replaces_updated_papers_whole(refreshed):
+    old, new, changed = refreshed
+    assert len(changed) == 3
+    assert sorted(new['papers']['PaperId']) == ['W1', 'W2', 'W3', 'W4', 'W5', 'W9']
+    w2 = new['paper_authors'][new['paper_authors']['PaperId'] == 'W2']
+    assert set(w2['AuthorId']) == set(old['authors'].loc[old['authors']['OpenAlexId'].isin(['A1', 'A5']), 'AuthorId'])
+    w4 = new['references'][new['references']['PaperId'] == 'W4']
+    assert w4['PaperReferenceId'].tolist() == ['W3']
+    assert new['authors']['AuthorId'].is_unique
+
+
+def test_author_patch_matches_full_rebuild(refreshed):
+    old, new, changed = refreshed
+    patched = refresh.patch_author_network(author_network(old), old, new, changed,
+                                           author_builder.DEFAULT_ENGINE, None, 'skip')
+    rebuilt = author_network(new)
+    key = lambda link: (link['source'], link['target'])
+    assert sorted(patched['links'], key=key) == sorted(rebuilt['links'], key=key)
+    assert sorted(patched['nodes'], key=lambda n: n['id']) == sorted(rebuilt['nodes'], key=lambda n: n['id'])
+    assert patched['metadata'] == rebuilt['metadata']
+
+
+def test_author_patch_keeps_extra_attributes_of_untouched_nodes(refreshed):
+    old, new, changed = refreshed
+    network = author_network(old)
+    for node in network['nodes']:
+        node['x'] = 1.5
+    patched = refresh.patch_author_network(network, old, new, changed, author_builder.DEFAULT_ENGINE, None, 'skip')
+    a2 = old['authors'].loc[old['authors']['OpenAlexId'] == 'A2', 'AuthorId'].iloc[0]
+    assert next(n for n in patched['nodes'] if n['id'] == str(a2))['x'] == 1.5
+
+
+def test_citation_patch_matches_full_rebuild(refreshed):
+    old, new, changed = refreshed
+    patched = refresh.patch_citation_network(citation_network(old), old, new, changed)
+    rebuilt = citation_network(new)
+    key = lambda link: (link['source'], link['target'])
+    assert sorted(patched['links'], key=key) == sorted(rebuilt['links'], key=key)
+    # W3 -> W9 只有在 W9 加入网络后才是内部引用
+    assert {'source': 'W3', 'target': 'W9'} in patched['links']
+    assert sorted(patched['nodes'], key=lambda n: n['id']) == sorted(rebuilt['nodes'], key=lambda n: n['id'])
+    assert patched['metadata'] == rebuilt['metadata']
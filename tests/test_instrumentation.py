@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from flask import Flask, Response, jsonify
+
+import instrumentation
+from data_store import DatasetStore
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / 'author_network.json').write_text(json.dumps({'nodes': [{'id': '1'}], 'links': []}))
+    store = DatasetStore(str(tmp_path))
+    app = Flask(__name__)
+    registry = instrumentation.install(app, store, server_timing=True)
+
+    @app.route('/nodes/<int:n>')
+    def nodes(n):
+        count = store.derived('node_count', ['author_network'], lambda network: len(network['nodes']))
+        return jsonify({'n': n, 'count': count})
+
+    @app.route('/stream')
+    def stream():
+        return Response((chunk for chunk in ['[', '1,2', ']']), mimetype='application/json')
+
+    client = app.test_client()
+    client.registry = registry
+    return client
+
+
+def metric(text, series, **labels):
+    """Prometheus 文本中某个序列的值"""
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{series}{{{wanted}}} "):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"{series}{{{wanted}}} not found")
+
+
+def test_histogram_buckets():
+    h = instrumentation.Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(value)
+    assert h.counts == [2, 1, 1]
+    assert (h.count, h.sum) == (4, pytest.approx(3.65))
+
+
+def test_requests_are_counted_per_route_template_and_status(client):
+    for n in (1, 2, 3):
+        assert client.get(f'/nodes/{n}').json == {'n': n, 'count': 1}
+    # 错误页的响应体也按流式响应处理，WSGI 服务器调用 close() 时才记录
+    client.get('/missing').close()
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert metric(text, 'sciscinet_requests_total', route='/nodes/<int:n>', status=200) == 3
+    assert metric(text, 'sciscinet_requests_total', route='unmatched', status=404) == 1
+    assert metric(text, 'sciscinet_request_duration_seconds_count', route='/nodes/<int:n>') == 3
+    assert metric(text, 'sciscinet_request_duration_seconds_bucket', route='/nodes/<int:n>', le='+Inf') == 3
+    for phase in ('load', 'compute', 'serialize'):
+        assert metric(text, 'sciscinet_request_phase_seconds_count', route='/nodes/<int:n>', phase=phase) == 3
+    assert metric(text, 'sciscinet_response_bytes_total', route='/nodes/<int:n>') > 0
+
+
+def test_cache_hits_and_misses(client):
+    for _ in range(4):
+        client.get('/nodes/1')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric(text, 'sciscinet_cache_requests_total', cache='derived', name='node_count', result='miss') == 1
+    assert metric(text, 'sciscinet_cache_requests_total', cache='derived', name='node_count', result='hit') == 3
+    assert metric(text, 'sciscinet_cache_hit_ratio', cache='derived', name='node_count') == 0.75
+    assert metric(text, 'sciscinet_cache_requests_total', cache='dataset', name='author_network', result='miss') == 1
+
+
+def test_streamed_responses_are_recorded_when_the_body_is_sent(client):
+    response = client.get('/stream')
+    assert response.get_data() == b'[1,2]'
+    response.close()
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric(text, 'sciscinet_requests_total', route='/stream', status=200) == 1
+    assert metric(text, 'sciscinet_response_bytes_total', route='/stream') == 5
+
+
+def test_server_timing_header(client):
+    header = client.get('/nodes/1').headers['Server-Timing']
+    assert [part.split(';')[0] for part in header.split(', ')] == ['load', 'compute', 'serialize', 'total']
+
+
+def test_label_values_are_escaped():
+    registry = instrumentation.MetricsRegistry()
+    registry.observe_request('/a"b\\c', 200, 0.01, {}, 10)
+    assert 'route="/a\\"b\\\\c"' in registry.render()
@@ -0,0 +1,157 @@
+import json
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from level_index import LevelIndex, LevelQuery
+from network_levels import build_levels
+
+
+def planted_network(groups=8, size=12, seed=5):
+    """groups 个稠密小组，组之间只有少量边；权重为 1-3 的整数，外加一个自环"""
+    rng = np.random.RandomState(seed)
+    n = groups * size
+    links = {}
+    for g in range(groups):
+        members = range(g * size, (g + 1) * size)
+        for i in members:
+            for j in members:
+                if i < j and rng.rand() < 0.5:
+                    links[(i, j)] = int(rng.randint(1, 4))
+    for _ in range(groups * 2):
+        i, j = sorted(rng.choice(n, size=2, replace=False))
+        links[(int(i), int(j))] = links.get((int(i), int(j)), 0) + 1
+    links[(0, 0)] = 2
+    return {
+        'nodes': [{'id': str(i), 'name': f'A{i}', 'paperCount': int(rng.randint(1, 9))} for i in range(n)],
+        'links': [{'source': str(i), 'target': str(j), 'weight': w} for (i, j), w in links.items()],
+        'metadata': {},
+    }
+
+
+@pytest.fixture(scope='module')
+def network():
+    return planted_network()
+
+
+@pytest.fixture(scope='module')
+def levels(network):
+    return build_levels(network, min_nodes=3)
+
+
+def pair_weights(links, group_of):
+    """按 group_of 合并端点后的边权重 {(a, b): w}，a == b 为组内权重"""
+    totals = defaultdict(float)
+    for link in links:
+        a, b = sorted((group_of[str(link['source'])], group_of[str(link['target'])]))
+        totals[(a, b)] += link['weight']
+    return totals
+
+
+def test_each_level_partitions_the_level_below(network, levels):
+    assert levels['metadata']['levels'] == len(levels['levels']) >= 2
+    below = network['nodes']
+    for level in levels['levels']:
+        children = [child for ids in level['children'] for child in ids]
+        assert sorted(children) == sorted(node['id'] for node in below)
+        by_id = {node['id']: node for node in below}
+        for node, ids in zip(level['nodes'], level['children']):
+            assert node['childCount'] == len(ids)
+            assert node['paperCount'] == sum(by_id[i]['paperCount'] for i in ids)
+        assert sum(node['size'] for node in level['nodes']) == len(network['nodes'])
+        below = level['nodes']
+
+
+def test_supernode_weights_sum_the_fine_links(network, levels):
+    # 原始作者 -> 当前层的超级节点
+    group_of = {node['id']: node['id'] for node in network['nodes']}
+    for level in levels['levels']:
+        parent = {child: node['id'] for node, ids in zip(level['nodes'], level['children']) for child in ids}
+        group_of = {author: parent[group] for author, group in group_of.items()}
+        expected = pair_weights(network['links'], group_of)
+
+        links = {tuple(sorted((link['source'], link['target']))): link['weight'] for link in level['links']}
+        assert links == {pair: w for pair, w in expected.items() if pair[0] != pair[1]}
+        internal = {node['id']: node['internalWeight'] for node in level['nodes']}
+        assert internal == {node['id']: expected.get((node['id'], node['id']), 0) for node in level['nodes']}
+
+
+def normalized(links):
+    return sorted((min(l['source'], l['target']), max(l['source'], l['target']), l['weight']) for l in links)
+
+
+@pytest.mark.parametrize('level', [1, 2])
+def test_expand_returns_exactly_the_members(network, levels, level):
+    index = LevelIndex(network, levels)
+    coarse = levels['levels'][level - 1]
+    below = network if level == 1 else levels['levels'][level - 2]
+    below_by_id = {node['id']: node for node in below['nodes']}
+
+    for supernode, members in zip(coarse['nodes'], coarse['children']):
+        result = index.expand(level, supernode['id'])
+        assert result['expanded'] == supernode['id']
+        expanded = [node for node in result['nodes'] if node.get('parent') == supernode['id']]
+        assert sorted(node['id'] for node in expanded) == sorted(members)
+        assert all(node == dict(below_by_id[node['id']], parent=supernode['id']) for node in expanded)
+        others = [node for node in result['nodes'] if 'parent' not in node]
+        assert others == [node for node in coarse['nodes'] if node['id'] != supernode['id']]
+
+        # 子节点之间的边与下一层相同，指向其他超级节点的边权重为下一层对应边之和
+        member_set = set(members)
+        inside = [l for l in below['links'] if l['source'] in member_set and l['target'] in member_set]
+        new_links = [l for l in result['links'] if l['source'] in member_set or l['target'] in member_set]
+        assert normalized([l for l in new_links if l['target'] in member_set]) == normalized(inside)
+        parent = {child: node['id'] for node, ids in zip(coarse['nodes'], coarse['children']) for child in ids}
+        crossing = defaultdict(float)
+        for l in below['links']:
+            s, t = l['source'], l['target']
+            if (s in member_set) != (t in member_set):
+                member, other = (s, t) if s in member_set else (t, s)
+                crossing[(member, parent[other])] += l['weight']
+        assert {(l['source'], l['target']): l['weight'] for l in new_links if l['target'] not in member_set} == crossing
+
+
+def test_expanding_keeps_the_total_weight(network, levels):
+    index = LevelIndex(network, levels)
+    total = sum(link['weight'] for link in network['links'])
+    first = levels['levels'][0]
+    for supernode in first['nodes']:
+        result = index.expand(1, supernode['id'])
+        internal = sum(node.get('internalWeight', 0) for node in result['nodes'])
+        assert sum(link['weight'] for link in result['links']) + internal == total
+
+
+def test_levels_queries_and_errors(network, levels):
+    index = LevelIndex(network, levels)
+    assert index.depth == len(levels['levels'])
+    assert index.resolve_level(None) == index.depth
+    assert index.level(1)['nodes'] == levels['levels'][0]['nodes']
+    assert index.metadata['stale'] is False
+    with pytest.raises(ValueError):
+        index.resolve_level(index.depth + 1)
+    with pytest.raises(KeyError):
+        index.expand(1, 'L9-9')
+    assert LevelQuery.from_args({'level': '2', 'expand': 'L2-0'}).__dict__ == {'level': 2, 'expand': 'L2-0'}
+    with pytest.raises(ValueError):
+        LevelQuery.from_args({'level': 'top'})
+
+    grown = dict(network, nodes=network['nodes'] + [{'id': 'new'}])
+    assert LevelIndex(grown, levels).metadata['stale'] is True
+    with pytest.raises(ValueError):
+        LevelIndex(network, {'levels': [], 'metadata': {}}).resolve_level(None)
+
+
+def test_levels_route(client, api, data_dir):
+    levels = build_levels(api.store.author_network().to_json(), min_nodes=3)
+    with open(f'{data_dir}/author_network_levels.json', 'w') as f:
+        json.dump(levels, f)
+
+    top = client.get('/api/author-network/levels').get_json()
+    assert top['level'] == top['levels'] == len(levels['levels'])
+    assert top['nodes'] == levels['levels'][-1]['nodes']
+    supernode = top['nodes'][0]['id']
+    expanded = client.get(f'/api/author-network/levels?expand={supernode}').get_json()
+    assert expanded == api.author_levels().expand(top['level'], supernode)
+    assert client.get('/api/author-network/levels?expand=nope').status_code == 404
+    assert client.get('/api/author-network/levels?level=99').status_code == 400
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from data_store import DatasetStore
+from metrics_index import MAX_TOP, MetricsIndex, MetricsQuery
+from scripts import network_io
+
+# 两个三角形（1-2-3、4-5-6）由 3-4 连接，7 只连着 6
+NETWORK = {
+    'nodes': [{'id': str(i), 'name': f'A{i}', 'paperCount': 1} for i in range(1, 8)],
+    'links': [
+        {'source': s, 'target': t, 'weight': 1}
+        for s, t in [('1', '2'), ('2', '3'), ('1', '3'), ('3', '4'), ('4', '5'), ('5', '6'), ('4', '6'), ('6', '7')]
+    ],
+    'metadata': {'total_authors': 7},
+}
+
+
+@pytest.fixture(params=['json', 'bin'])
+def store(tmp_path, request):
+    path = tmp_path / 'author_network.json'
+    if request.param == 'bin':
+        network_io.save_network(NETWORK, str(path))
+    else:
+        path.write_text(json.dumps(NETWORK))
+    return DatasetStore(str(tmp_path))
+
+
+def build(store):
+    return store.derived('author_network:metrics', ['author_network'], MetricsIndex)
+
+
+def test_building_the_index_leaves_the_shared_network_untouched(store):
+    index = build(store)
+    assert index.summary['communities'] == 2
+    network = store.get('author_network')
+    assert 'metrics' not in network['metadata']
+    assert network['metadata'] == NETWORK['metadata']
+    assert 'pagerank' not in network['nodes'][0]
+
+
+def test_top_k_by_metric_and_community(store):
+    index = build(store)
+    result = index.query(MetricsQuery(sort='degree', top=2))
+    assert result['total'] == 7
+    assert [node['id'] for node in result['nodes']] == ['3', '4']
+    assert result['metrics'] == index.summary
+
+    community = result['nodes'][0]['community']
+    members = index.query(MetricsQuery(sort='pagerank', top=MAX_TOP, community=community))
+    assert {node['community'] for node in members['nodes']} == {community}
+    ranks = [node['pagerank'] for node in members['nodes']]
+    assert ranks == sorted(ranks, reverse=True)
+    with pytest.raises(KeyError):
+        index.query(MetricsQuery(community=10 ** 6))
+
+
+def test_precomputed_metrics_are_used_as_is():
+    nodes = [dict(node, pagerank=float(i), betweenness=0.0, degree=1, strength=1.0, community=0)
+             for i, node in enumerate(NETWORK['nodes'])]
+    network = dict(NETWORK, nodes=nodes, metadata={'metrics': {'communities': 1}})
+    index = MetricsIndex(network)
+    assert index.nodes is nodes
+    assert index.summary == {'communities': 1}
+    assert index.query(MetricsQuery(top=1))['nodes'][0]['id'] == '7'
+
+
+def test_query_args_validation():
+    assert MetricsQuery.from_args({'top': str(MAX_TOP + 1)}).top == MAX_TOP
+    for args in ({'sort': 'closeness'}, {'top': '0'}, {'community': 'x'}):
+        with pytest.raises(ValueError):
+            MetricsQuery.from_args(args)
@@ -0,0 +1,108 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from data_store import DatasetStore
+from graph_index import GraphIndex, GraphQuery
+from scripts.network_io import (BinaryNetwork, binary_path, encode_binary, network_path,
+                                save_network, write_binary)
+
+# 覆盖各种列类型：int32/int64/float/bool/字符串/嵌套 JSON/超出 int64 的整数，以及部分行缺失的字段
+NETWORK = {
+    'nodes': [
+        {'id': 'a', 'name': 'Ada', 'paperCount': 3, 'x': 0.5, 'core': True, 'tags': ['ml']},
+        {'id': 'b', 'name': 'Bo', 'paperCount': 2, 'x': -1.25, 'core': False, 'big': 1 << 40},
+        {'id': 'c', 'name': '陈', 'paperCount': 1, 'x': 2, 'core': True, 'huge': 1 << 70},
+        {'id': 'd', 'name': 'Dee', 'paperCount': 5, 'x': 0.0, 'core': False, 'tags': {'k': [1, None]}},
+    ],
+    'links': [
+        {'source': 'a', 'target': 'b', 'weight': 3},
+        {'source': 'b', 'target': 'c', 'weight': 1, 'label': 'x'},
+        {'source': 'a', 'target': 'c', 'weight': 2},
+        {'source': 'c', 'target': 'd', 'weight': 4},
+    ],
+    'metadata': {'total_authors': 4, 'note': 'ünïcode'},
+}
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = str(tmp_path / 'author_network.json')
+    save_network(NETWORK, path)
+    return path
+
+
+def test_round_trip_is_identical_to_the_json(json_path):
+    network = BinaryNetwork(binary_path(json_path))
+    assert network.to_json() == NETWORK
+    assert json.dumps(network.to_json()) == json.dumps(NETWORK)
+    assert network.to_bytes() == encode_binary(NETWORK)
+    assert encode_binary(network) == encode_binary(NETWORK)
+
+
+def test_records_arrays_and_numbers(json_path):
+    network = BinaryNetwork(binary_path(json_path))
+    assert len(network['nodes']) == 4 and len(network['links']) == 4
+    assert network['nodes'][-1] == NETWORK['nodes'][-1]
+    assert network['links'][1:3] == NETWORK['links'][1:3]
+    assert network['links'].take([3, 0]) == [NETWORK['links'][3], NETWORK['links'][0]]
+    with pytest.raises(IndexError):
+        network['nodes'][4]
+
+    assert network.source.tolist() == [0, 1, 0, 2]
+    assert network.target.tolist() == [1, 2, 2, 3]
+    assert network.node_ids == ['a', 'b', 'c', 'd']
+    assert network.numbers('nodes', 'x').tolist() == [0.5, -1.25, 2.0, 0.0]
+    assert network.numbers('nodes', 'big', default=-1).tolist() == [-1, 1 << 40, -1, -1]
+    assert network.numbers('nodes', 'missing').tolist() == [0, 0, 0, 0]
+    assert network.get('metadata') == NETWORK['metadata']
+
+
+def test_empty_network_round_trips(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    write_binary({'nodes': [], 'links': [], 'metadata': {}}, path)
+    assert BinaryNetwork(path).to_json() == {'nodes': [], 'links': [], 'metadata': {}}
+
+
+def test_network_path_prefers_a_fresh_binary(json_path):
+    bin_path = binary_path(json_path)
+    assert network_path(json_path) == bin_path
+    # JSON 比 .bin 新（例如只改了 JSON）时读 JSON
+    stat = os.stat(bin_path)
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert network_path(json_path) == json_path
+    os.remove(json_path)
+    assert network_path(json_path) == bin_path
+
+
+def test_graph_queries_match_on_both_representations(json_path):
+    from_json = GraphIndex(NETWORK)
+    from_binary = GraphIndex(BinaryNetwork(binary_path(json_path)))
+    for q in (GraphQuery(), GraphQuery(author='c', hops=1), GraphQuery(min_weight=2),
+              GraphQuery(author='a', hops=2, top=2)):
+        assert from_binary.query(q) == from_json.query(q)
+
+
+def test_dangling_links_keep_the_json(tmp_path, capsys):
+    path = str(tmp_path / 'author_network.json')
+    save_network(NETWORK, path)
+    assert os.path.exists(binary_path(path))
+
+    dangling = dict(NETWORK, links=NETWORK['links'] + [{'source': 'a', 'target': 'zz', 'weight': 1}])
+    with pytest.raises(ValueError):
+        encode_binary(dangling)
+    save_network(dangling, path)
+    # 旧的 .bin 被删掉，API 读取新的 JSON，内容与写入的一致
+    assert not os.path.exists(binary_path(path))
+    assert 'not written' in capsys.readouterr().out
+    store = DatasetStore(str(tmp_path))
+    assert store.path('author_network') == path
+    assert store.get('author_network') == dangling
+
+
+def test_binary_arrays_are_read_only(json_path):
+    network = BinaryNetwork(binary_path(json_path))
+    with pytest.raises(ValueError):
+        network.source[0] = np.int32(1)
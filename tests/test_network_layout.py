@@ -0,0 +1,82 @@
+import copy
+
+import numpy as np
+import pytest
+
+from network_layout import LINK_DISTANCE, attach_layout, layout, previous_positions
+
+
+def clusters(groups=6, size=15, seed=0):
+    """groups 个小组连成一个环，组内约 40% 的点对有边"""
+    rng = np.random.RandomState(seed)
+    links = []
+    for g in range(groups):
+        for i in range(g * size, (g + 1) * size):
+            for j in range(i + 1, (g + 1) * size):
+                if rng.rand() < 0.4:
+                    links.append({'source': str(i), 'target': str(j), 'weight': int(rng.randint(1, 4))})
+        links.append({'source': str(g * size), 'target': str((g + 1) % groups * size + 1), 'weight': 1})
+    return {'nodes': [{'id': str(i)} for i in range(groups * size)], 'links': links, 'metadata': {}}
+
+
+def positions(network):
+    return np.asarray([[node['x'], node['y']] for node in network['nodes']])
+
+
+@pytest.fixture(scope='module')
+def laid_out():
+    return attach_layout(clusters())
+
+
+def test_full_layout_is_deterministic_for_a_seed(laid_out):
+    again = attach_layout(clusters())
+    assert again == laid_out
+    assert attach_layout(clusters(), seed=1) != laid_out
+    info = laid_out['metadata']['layout']
+    assert info['repulsion'] == 'exact' and not info['multilevel'] and info['seeded_nodes'] == 0
+    pos = positions(laid_out)
+    assert np.allclose(pos.mean(axis=0), 0, atol=0.1)
+    # 没有两个节点重合
+    assert len({(x, y) for x, y in pos.tolist()}) == len(pos)
+
+
+def test_incremental_layout_keeps_existing_nodes_in_place(laid_out):
+    before = positions(laid_out)
+    grown = copy.deepcopy(laid_out)
+    for k, neighbor in enumerate([3, 33, 63]):
+        grown['nodes'].append({'id': f'new{k}'})
+        grown['links'].append({'source': str(neighbor), 'target': f'new{k}', 'weight': 1})
+    attach_layout(grown, incremental=True)
+
+    after = positions(grown)
+    moved = np.sqrt(((after[:len(before)] - before) ** 2).sum(axis=1))
+    assert np.median(moved) < LINK_DISTANCE / 2
+    assert moved.max() < 2 * LINK_DISTANCE
+    # 新节点放在已定位的邻居附近
+    for k, neighbor in enumerate([3, 33, 63]):
+        assert np.linalg.norm(after[len(before) + k] - after[neighbor]) < 3 * LINK_DISTANCE
+    info = grown['metadata']['layout']
+    assert info['seeded_nodes'] == len(before) and info['iterations'] < laid_out['metadata']['layout']['iterations']
+
+    # 从头重新布局（换一个种子）时节点的位移远大于增量布局
+    fresh = positions(attach_layout(clusters(), seed=1))
+    assert np.median(np.sqrt(((fresh - before) ** 2).sum(axis=1))) > 4 * np.median(moved)
+
+
+def test_too_few_known_positions_fall_back_to_a_full_layout():
+    network = clusters()
+    for node in network['nodes'][:10]:
+        node['x'], node['y'] = 1.0, 2.0
+    previous = previous_positions(network)
+    assert np.isnan(previous[10:]).all() and (previous[:10] == [1.0, 2.0]).all()
+    attach_layout(network, incremental=True)
+    assert network['metadata']['layout']['seeded_nodes'] == 0
+
+
+def test_tiny_graphs():
+    from scipy import sparse
+
+    pos, info = layout(sparse.csr_matrix((0, 0)))
+    assert pos.shape == (0, 2)
+    pos, _ = layout(sparse.csr_matrix((1, 1)))
+    assert pos.tolist() == [[0.0, 0.0]]
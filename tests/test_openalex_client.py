@@ -0,0 +1,89 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import openalex_client
+from download_data import parse_shard, raw_shards
+from openalex_client import OpenAlexClient, fetch_works, iter_ndjson, truncate_partial_line
+from openalex_replay_server import ReplayHandler
+
+# 两个年份分片，每页 10 条，各需要若干页
+WORKS = [{'id': f'https://openalex.org/W{i}', 'title': f'Work {i}', 'publication_year': 2020 + i % 2}
+         for i in range(95)]
+SHARDS = {'2020': 'publication_year:2020', '2021': 'publication_year:2021'}
+
+
+@pytest.fixture
+def base_url(monkeypatch):
+    monkeypatch.setattr(ReplayHandler, 'works', WORKS)
+    monkeypatch.setattr(openalex_client, 'PER_PAGE', 10)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ReplayHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingClient(OpenAlexClient):
+    """取到 pages 页之后的请求都抛出异常，模拟进程被杀"""
+
+    def __init__(self, base_url, pages):
+        super().__init__(base_url, rate=1000, max_retries=0)
+        self.pages = pages
+        self.lock = threading.Lock()
+
+    def get(self, path, params=None):
+        with self.lock:
+            if self.pages == 0:
+                raise Crash()
+            self.pages -= 1
+        return super().get(path, params)
+
+
+def fetch(client, tmp_path, name, resume=True):
+    output, state = tmp_path / f'{name}.ndjson', tmp_path / f'{name}.state.json'
+    fetch_works(client, '', SHARDS, str(output), str(state), workers=2, resume=resume)
+    return output
+
+
+def ids(path):
+    return [work['id'] for work in iter_ndjson(str(path))]
+
+
+def test_resume_after_a_torn_write_matches_an_uninterrupted_run(base_url, tmp_path):
+    full = fetch(OpenAlexClient(base_url, rate=1000), tmp_path, 'full')
+
+    with pytest.raises(Crash):
+        fetch(CrashingClient(base_url, pages=3), tmp_path, 'crash')
+    output = tmp_path / 'crash.ndjson'
+    # 崩溃时下一页的第一条只写了一半
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(WORKS[-1])[:20])
+
+    fetch(OpenAlexClient(base_url, rate=1000), tmp_path, 'crash')
+    assert output.read_text().endswith('\n')
+    assert len(ids(output)) == len(ids(full)) == len(WORKS)
+    assert set(ids(output)) == set(ids(full))
+
+
+def test_readers_skip_only_a_torn_last_line(tmp_path):
+    path = tmp_path / 'raw.ndjson'
+    path.write_text(''.join(json.dumps(work) + '\n' for work in WORKS[:5]) + '{"id": "https://ope')
+    assert len(ids(path)) == 5
+    parts = [parse_shard(shard) for shard in raw_shards([str(path)], shard_bytes=64)]
+    assert sum(len(part['papers']['PaperId']) for part in parts) == 5
+
+    assert truncate_partial_line(str(path)) == len('{"id": "https://ope')
+    assert truncate_partial_line(str(path)) == 0
+    assert len(ids(path)) == 5
+
+    path.write_text('{"id": 1}\n{"id": \n{"id": 2}\n')
+    with pytest.raises(json.JSONDecodeError):
+        ids(path)
@@ -0,0 +1,43 @@
+import pandas as pd
+
+import paper_ids
+from table_io import write_table
+
+
+def test_intern_assigns_dense_ids_in_first_occurrence_order():
+    id_map = {'W7': 0}
+    codes = paper_ids.intern_paper_ids(['W9', 'W7', 'W8', 'W9'], id_map)
+    assert codes.dtype == 'int32'
+    assert codes.tolist() == [1, 0, 2, 1]
+    assert id_map == {'W7': 0, 'W9': 1, 'W8': 2}
+
+
+def test_map_survives_a_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'paper_id_map.csv')
+    assert paper_ids.load_paper_id_map(path) == {}
+    id_map = {}
+    paper_ids.intern_paper_ids(['W3', 'W1', 'W2'], id_map)
+    paper_ids.save_paper_id_map(id_map, path)
+    loaded = paper_ids.load_paper_id_map(path)
+    assert loaded == id_map
+    # 重新加载后继续分配，已有 id 不变
+    assert paper_ids.intern_paper_ids(['W1', 'W4'], loaded).tolist() == [1, 3]
+
+
+def test_legacy_tables_get_integer_columns():
+    legacy = pd.DataFrame({'PaperId': ['W1', 'W2'], 'PaperReferenceId': ['W2', 'W3']})
+    id_map = {'W2': 0}
+    indexed = paper_ids.add_paper_index(legacy, id_map)
+    assert indexed['PaperIdx'].tolist() == [1, 0]
+    assert indexed['PaperReferenceIdx'].tolist() == [0, 2]
+    assert 'PaperIdx' not in legacy.columns
+    assert paper_ids.add_paper_index(indexed, id_map) is indexed
+
+
+def test_read_indexed_table_reads_string_ids_when_integer_columns_are_missing(tmp_path):
+    write_table(pd.DataFrame({'PaperId': ['W1', 'W2'], 'PaperReferenceId': ['W2', 'W5']}),
+                'paper_references', str(tmp_path))
+    df = paper_ids.read_indexed_table('paper_references', str(tmp_path),
+                                      ['PaperIdx', 'PaperReferenceIdx'], {})
+    assert list(df.columns) == ['PaperIdx', 'PaperReferenceIdx']
+    assert df.values.tolist() == [[0, 1], [1, 2]]
@@ -0,0 +1,145 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import response_cache
+from response_cache import EncodedPayload
+
+
+def body_of(response):
+    """按 Content-Encoding 解压响应体"""
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return gzip.decompress(response.data)
+    if encoding == 'br':
+        return response_cache.brotli.decompress(response.data)
+    return response.data
+
+
+def test_payload_encodes_once_with_stable_strong_etags():
+    data = {'nodes': [{'id': '1', 'name': 'Zoë'}], 'links': []}
+    payload = EncodedPayload.from_json(data)
+    assert payload.bodies['identity'] == '{"nodes":[{"id":"1","name":"Zoë"}],"links":[]}'.encode('utf-8')
+    assert gzip.decompress(payload.bodies['gzip']) == payload.bodies['identity']
+    assert EncodedPayload.from_json(data).bodies == payload.bodies
+    assert len(set(payload.etags.values())) == len(payload.bodies)
+    assert all(etag.startswith('"') for etag in payload.etags.values())
+    assert EncodedPayload.from_json({'nodes': []}).etags['identity'] != payload.etags['identity']
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    (None, None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('identity', None),
+])
+def test_encoding_follows_accept_encoding(client, accept_encoding, expected):
+    if expected == 'br' and response_cache.brotli is None:
+        expected = 'gzip'
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    response = client.get('/api/author-network', headers=headers)
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == expected
+    assert 'Accept-Encoding' in response.headers['Vary']
+    network = json.loads(body_of(response))
+    assert len(network['nodes']) == 20 and len(network['links']) == 19
+
+
+def test_strong_etag_and_not_modified(client):
+    first = client.get('/api/citation-network', headers={'Accept-Encoding': 'gzip'})
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/') and etag.endswith('-gzip"')
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get('/api/citation-network', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert again.headers['ETag'] == etag
+
+    # 任意一种编码的 ETag 都表示同一份数据
+    plain = client.get('/api/citation-network', headers={'If-None-Match': etag})
+    assert plain.status_code == 304
+    stale = client.get('/api/citation-network', headers={'If-None-Match': '"0000"'})
+    assert stale.status_code == 200 and json.loads(stale.data)['metadata'] == {'total_papers': 10}
+
+
+def test_rebuilt_network_gets_a_new_etag(client, data_dir):
+    from scripts import network_io
+
+    etag = client.get('/api/author-network').headers['ETag']
+    network_io.save_network({'nodes': [{'id': '1'}], 'links': [], 'metadata': {}},
+                            f'{data_dir}/author_network.json')
+    response = client.get('/api/author-network', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['nodes'] == [{'id': '1'}]
+
+
+BINARY = {'Accept': 'application/octet-stream'}
+
+
+def read_binary(body, tmp_path):
+    """二进制响应体 -> 网络 dict（写到临时文件再用 BinaryNetwork 打开）"""
+    from scripts.network_io import BinaryNetwork
+
+    path = tmp_path / 'response.bin'
+    path.write_bytes(body)
+    return BinaryNetwork(str(path)).to_json()
+
+
+@pytest.mark.parametrize('accept', [response_cache.NETWORK_BINARY_MIMETYPE, 'application/octet-stream',
+                                    'application/json;q=0.5, application/octet-stream'])
+def test_binary_accept_serves_the_bin_file(client, data_dir, accept):
+    response = client.get('/api/author-network', headers={'Accept': accept})
+    assert response.status_code == 200
+    assert response.mimetype == response_cache.NETWORK_BINARY_MIMETYPE
+    assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+    with open(f'{data_dir}/author_network.bin', 'rb') as f:
+        assert response.data == f.read()
+
+
+@pytest.mark.parametrize('accept', [None, '*/*', 'application/json', 'application/json, application/octet-stream;q=0.9'])
+def test_json_stays_the_default(client, accept):
+    response = client.get('/api/author-network', headers={'Accept': accept} if accept else {})
+    assert response.mimetype == 'application/json'
+
+
+def test_binary_body_is_compressed_and_has_its_own_etag(client, tmp_path):
+    plain = client.get('/api/author-network')
+    binary = client.get('/api/author-network', headers=dict(BINARY, **{'Accept-Encoding': 'gzip'}))
+    assert binary.headers['Content-Encoding'] == 'gzip'
+    assert binary.headers['ETag'] != plain.headers['ETag']
+    assert read_binary(gzip.decompress(binary.data), tmp_path) == plain.get_json()
+    again = client.get('/api/author-network', headers=dict(BINARY, **{'If-None-Match': binary.headers['ETag']}))
+    assert again.status_code == 304
+
+
+def test_binary_is_encoded_from_the_json_without_a_bin_file(client, data_dir, tmp_path):
+    os.remove(f'{data_dir}/citation_network.bin')
+    response = client.get('/api/citation-network', headers=BINARY)
+    assert response.mimetype == response_cache.NETWORK_BINARY_MIMETYPE
+    assert read_binary(response.data, tmp_path) == client.get('/api/citation-network').get_json()
+
+
+def test_binary_subgraph_matches_the_json_subgraph(client, tmp_path):
+    url = '/api/author-network?author=5&hops=2'
+    response = client.get(url, headers=BINARY)
+    assert response.mimetype == response_cache.NETWORK_BINARY_MIMETYPE
+    assert read_binary(response.data, tmp_path) == client.get(url).get_json()
+
+
+def test_network_without_a_binary_encoding_falls_back_to_json(client, api, data_dir):
+    os.remove(f'{data_dir}/author_network.bin')
+    network = {'nodes': [{'id': '1'}, {'id': '2'}],
+               'links': [{'source': '1', 'target': '2'}, {'source': '1', 'target': '99'}],
+               'metadata': {}}
+    with open(f'{data_dir}/author_network.json', 'w') as f:
+        json.dump(network, f)
+    assert api.network_binary_payload('author_network') is None
+
+    response = client.get('/api/author-network', headers=BINARY)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == network
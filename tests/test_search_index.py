@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from search_index import MAX_LIMIT, SearchIndex, SearchQuery, SuggestQuery, normalize, tokenize
+
+
+@pytest.fixture(scope='module')
+def index():
+    papers = pd.DataFrame({
+        'PaperId': ['W1', 'W2', 'W3', 'W4', 'W5'],
+        'Title': ['Graph neural networks', 'Graphene transistors', 'Random graph models',
+                  'Neural graph embeddings for graph search', None],
+        'Year': [2020, 2021, 2019, 2022, 2023],
+        'CitationCount': [10, 50, 5, 1, 0],
+    })
+    authors = pd.DataFrame({
+        'AuthorId': [1, 2, 3, 4],
+        'DisplayName': ['Noël C. Barengo', 'Joaquim Fernández-Solà', 'Fernando Vargas', 'Łukasz Nowak'],
+    })
+    paper_authors = pd.DataFrame({
+        'PaperId': ['W1', 'W2', 'W3', 'W3', 'W4', 'W4', 'W5'],
+        'AuthorId': [1, 2, 3, 3, 3, 4, 3],
+    })
+    return SearchIndex(papers, authors, paper_authors)
+
+
+def paper_ids(result):
+    return [r['PaperId'] for r in result['papers']['results']]
+
+
+def test_normalization():
+    assert normalize('Noël') == 'noel'
+    assert tokenize('Fernández-Solà, Ł.') == ['fernandez', 'sola', 'l']
+
+
+def test_terms_are_anded_and_ranked_by_bm25(index):
+    result = index.search(SearchQuery('neural graph'))
+    assert result['papers']['total'] == 2
+    assert set(paper_ids(result)) == {'W1', 'W4'}
+    scores = [r['score'] for r in result['papers']['results']]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_last_word_is_a_prefix_unless_followed_by_a_space(index):
+    assert set(paper_ids(index.search(SearchQuery('graph')))) == {'W1', 'W2', 'W3', 'W4'}
+    query = SearchQuery.from_args({'q': '  graph '})
+    assert query.q == 'graph '
+    assert set(paper_ids(index.search(query))) == {'W1', 'W3', 'W4'}
+
+
+def test_authors_are_searchable_without_accents(index):
+    result = index.search(SearchQuery('fernandez sola', type='authors'))
+    assert 'papers' not in result
+    assert [r['DisplayName'] for r in result['authors']['results']] == ['Joaquim Fernández-Solà']
+    assert index.search(SearchQuery('lukasz', type='authors'))['authors']['total'] == 1
+
+
+def test_suggest_matches_any_word_start_by_paper_count(index):
+    result = index.suggest(SuggestQuery('fern'))
+    assert [s['DisplayName'] for s in result['suggestions']] == ['Fernando Vargas', 'Joaquim Fernández-Solà']
+    assert result['suggestions'][0]['paperCount'] == 4
+    assert index.suggest(SuggestQuery('barengo'))['total'] == 1
+    # 结尾的空白：前面的词已经输完，只匹配后面还有词的姓名
+    assert index.suggest(SuggestQuery.from_args({'prefix': 'noel c '}))['total'] == 1
+    assert index.suggest(SuggestQuery.from_args({'prefix': 'barengo '}))['total'] == 0
+
+
+def test_limit_and_validation(index):
+    assert len(paper_ids(index.search(SearchQuery('graph', limit=2)))) == 2
+    assert SearchQuery.from_args({'q': 'x', 'limit': str(MAX_LIMIT * 2)}).limit == MAX_LIMIT
+    for args in ({}, {'q': '   '}, {'q': 'x', 'type': 'venues'}, {'q': 'x', 'limit': '0'}):
+        with pytest.raises(ValueError):
+            SearchQuery.from_args(args)
+    with pytest.raises(ValueError):
+        SuggestQuery.from_args({'prefix': ' '})
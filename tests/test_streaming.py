@@ -0,0 +1,66 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from streaming import NDJSON_MIMETYPE, frame_chunks, header_name, json_body, ndjson_body
+
+NDJSON = {'Accept': NDJSON_MIMETYPE}
+
+
+def baseline(data_dir, name):
+    """原接口的做法：每次请求读 CSV 再 to_dict"""
+    return pd.read_csv(os.path.join(data_dir, f'{name}.csv')).to_dict('records')
+
+
+@pytest.mark.parametrize('path, key, table', [
+    ('/api/papers', 'papers', 'papers'),
+    ('/api/authors', 'authors', 'authors'),
+])
+def test_streamed_list_matches_the_materialized_body(client, data_dir, path, key, table):
+    response = client.get(path)
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    assert response.headers['Vary'] == 'Accept'
+    expected = baseline(data_dir, table)
+    assert json.loads(response.get_data()) == {'total': len(expected), key: expected}
+
+
+def test_streamed_year_matches_the_materialized_body(client, data_dir):
+    papers = pd.read_csv(os.path.join(data_dir, 'papers.csv'))
+    year = int(papers['Year'].mode()[0])
+    rows = papers[papers['Year'] == year]
+    body = json.loads(client.get(f'/api/timeline/{year}').get_data())
+    assert body == {'year': year, 'count': len(rows), 'papers': rows.to_dict('records')}
+    assert json.loads(client.get('/api/timeline/1900').get_data()) == {'year': 1900, 'count': 0, 'papers': []}
+
+
+def test_ndjson_has_one_record_per_line_and_meta_in_headers(client, data_dir):
+    response = client.get('/api/papers', headers=NDJSON)
+    assert response.mimetype == NDJSON_MIMETYPE
+    assert response.headers['X-Total'] == '2500'
+    text = response.get_data(as_text=True)
+    assert text.endswith('\n')
+    assert [json.loads(line) for line in text.splitlines()] == baseline(data_dir, 'papers')
+
+
+def test_ndjson_page_carries_the_cursor_header(client):
+    page = client.get('/api/papers?limit=5&sort=Year', headers=NDJSON)
+    assert page.mimetype == NDJSON_MIMETYPE
+    assert len(page.get_data(as_text=True).splitlines()) == 5
+    cursor = page.headers['X-Next-Cursor']
+    as_json = client.get('/api/papers?limit=5&sort=Year').get_json()
+    assert as_json['next_cursor'] == cursor
+    assert [json.loads(line) for line in page.get_data(as_text=True).splitlines()] == as_json['papers']
+
+
+def test_body_generators_handle_empty_chunks_and_meta():
+    df = pd.DataFrame({'a': range(5)})
+    chunks = list(frame_chunks(df, rows=[4, 0, 2], chunk_rows=2))
+    assert chunks == [[{'a': 4}, {'a': 0}], [{'a': 2}]]
+    assert ''.join(json_body({'total': 2}, 'rows', [[], [{'a': 1}], [], [{'a': 2}]])) == \
+        '{"total":2,"rows":[{"a":1},{"a":2}]}'
+    assert ''.join(json_body({}, 'rows', [])) == '{"rows":[]}'
+    assert ''.join(ndjson_body([[{'a': 1}], []])) == '{"a":1}\n'
+    assert header_name('next_cursor') == 'X-Next-Cursor'
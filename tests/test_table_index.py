@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from table_index import MAX_PAGE_SIZE, TableIndex, TableQuery
+
+
+@pytest.fixture
+def papers():
+    return pd.DataFrame({
+        'PaperId': ['W1', 'W2', 'W3', 'W4', 'W5', 'W6'],
+        'Title': ['Graph neural nets', 'Alpha', 'graph cuts', 'Beta', None, 'Gamma'],
+        'Year': [2020, 2018, 2020, None, 2022, 2019],
+        'CitationCount': [5, 50, 5, 1, 7, None],
+        'FieldsOfStudy': ['Computer Science', 'General', 'computer science', 'General',
+                          'Computer Science', 'General'],
+    })
+
+
+@pytest.fixture
+def index(papers):
+    return TableIndex(papers, ['Year', 'CitationCount', 'Title'], year_column='Year',
+                      field_column='FieldsOfStudy', name_column='Title')
+
+
+def ids(records):
+    return [r['PaperId'] for r in records]
+
+
+def test_from_args_validates_and_clamps():
+    q = TableQuery.from_args({'limit': str(MAX_PAGE_SIZE * 10), 'order': 'DESC', 'fields': 'PaperId, Year,'})
+    assert q.limit == MAX_PAGE_SIZE
+    assert q.order == 'desc'
+    assert q.fields == ['PaperId', 'Year']
+    assert TableQuery.from_args({}).is_empty()
+    for args in ({'limit': '0'}, {'offset': '-1'}, {'order': 'up'}, {'year_from': 'x'}):
+        with pytest.raises(ValueError):
+            TableQuery.from_args(args)
+
+
+def test_sort_puts_missing_values_last_in_both_orders(index):
+    _, asc, _ = index.query(TableQuery(sort='CitationCount'))
+    _, desc, _ = index.query(TableQuery(sort='CitationCount', order='desc'))
+    # 相同值保持原顺序，缺失值始终在最后
+    assert ids(asc) == ['W4', 'W1', 'W3', 'W5', 'W2', 'W6']
+    assert ids(desc) == ['W2', 'W5', 'W1', 'W3', 'W4', 'W6']
+
+
+def test_filters_intersect_and_match_a_scan(index, papers):
+    total, records, _ = index.query(TableQuery(year_from=2019, year_to=2020, field='COMPUTER SCIENCE'))
+    years = papers['Year']
+    expected = papers[(years >= 2019) & (years <= 2020)
+                      & (papers['FieldsOfStudy'].str.lower() == 'computer science')]
+    assert total == len(expected)
+    assert ids(records) == expected['PaperId'].tolist()
+
+    total, records, _ = index.query(TableQuery(prefix='GRAPH', sort='Year', order='desc'))
+    assert total == 2
+    assert ids(records) == ['W1', 'W3']
+
+
+def test_unsupported_filters_and_fields_raise(papers):
+    index = TableIndex(papers, ['Year'])
+    for query in (TableQuery(year_from=2020), TableQuery(field='General'),
+                  TableQuery(prefix='a'), TableQuery(sort='Title'), TableQuery(fields=['Nope'])):
+        with pytest.raises(ValueError):
+            index.query(query)
+
+
+def test_cursor_pages_cover_the_result_once(index):
+    seen, cursor = [], None
+    while True:
+        total, records, cursor = index.query(TableQuery(limit=2, cursor=cursor, sort='Year', field='general'))
+        seen += ids(records)
+        if cursor is None:
+            break
+    assert total == 3
+    assert seen == ['W2', 'W6', 'W4']
+
+
+def test_projection_returns_only_requested_fields(index):
+    _, records, _ = index.query(TableQuery(limit=1, fields=['Title']))
+    assert records == [{'Title': 'Graph neural nets'}]
+
+
+def test_cursor_expires_when_data_changes(index, papers):
+    _, _, cursor = index.query(TableQuery(limit=2))
+    changed = TableIndex(papers.assign(CitationCount=papers['CitationCount'].fillna(0) + 1), ['Year'])
+    with pytest.raises(ValueError, match='expired'):
+        changed.query(TableQuery(limit=2, cursor=cursor))
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        index.query(TableQuery(cursor='not-a-cursor'))
+
+
+def test_empty_table_returns_no_rows(papers):
+    index = TableIndex(papers.iloc[:0], ['Year', 'CitationCount', 'Title'], year_column='Year',
+                       field_column='FieldsOfStudy', name_column='Title')
+    assert index.query(TableQuery(sort='Year', order='desc', year_from=2020, field='general')) == (0, [], None)
+    assert index.query(TableQuery(prefix='graph', limit=5)) == (0, [], None)
+
+
+def test_empty_table_route_returns_an_empty_page(client, data_dir, papers):
+    from scripts import table_io
+
+    table_io.write_table(papers.iloc[:0], 'papers', data_dir)
+    response = client.get('/api/papers?limit=5&sort=CitationCount&year_from=2020')
+    assert response.status_code == 200
+    assert response.get_json() == {'total': 0, 'papers': [], 'next_cursor': None, 'limit': 5, 'offset': 0}
+    assert client.get('/api/papers').get_json() == {'total': 0, 'papers': []}
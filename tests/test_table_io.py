@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from scripts import table_io
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    papers = pd.DataFrame({
+        'PaperId': ['W1', 'W2', 'W3'],
+        'Title': ['A', None, 'C'],
+        'Year': [2020, 2021, None],
+        'CitationCount': [3, None, 7],
+        'FieldsOfStudy': ['Computer Science', 'General', 'Computer Science'],
+        'PaperIdx': [0, 1, 2],
+    })
+    table_io.write_table(papers, 'papers', str(tmp_path))
+    return str(tmp_path)
+
+
+def test_arrow_round_trip_applies_dtypes(data_dir):
+    assert table_io.table_path('papers', data_dir).endswith('.arrow')
+    df = table_io.read_table('papers', data_dir)
+    assert df['PaperId'].tolist() == ['W1', 'W2', 'W3']
+    assert str(df['Year'].dtype) == 'int16'
+    assert df['Year'].tolist() == [2020, 2021, 0]
+    assert df['CitationCount'].tolist() == [3, 0, 7]
+    assert df['FieldsOfStudy'].dtype == 'category'
+    assert df['Title'].tolist()[1] is None
+
+
+def test_projection_and_columns(data_dir):
+    assert table_io.table_columns('papers', data_dir)[:2] == ['PaperId', 'Title']
+    df = table_io.read_table('papers', data_dir, columns=['PaperIdx', 'Year'])
+    assert list(df.columns) == ['PaperIdx', 'Year']
+    chunks = list(table_io.iter_table('papers', data_dir, columns=['PaperId'], chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert pd.concat(chunks)['PaperId'].tolist() == ['W1', 'W2', 'W3']
+
+
+def test_stale_arrow_file_falls_back_to_csv(data_dir):
+    csv_file = table_io.csv_path('papers', data_dir)
+    pd.read_csv(csv_file).assign(Title='edited').to_csv(csv_file, index=False)
+    arrow_time = os.path.getmtime(table_io.arrow_path('papers', data_dir))
+    os.utime(csv_file, (arrow_time + 10, arrow_time + 10))
+    assert table_io.table_path('papers', data_dir) == csv_file
+    assert table_io.read_table('papers', data_dir)['Title'].tolist() == ['edited'] * 3
+
+
+@pytest.mark.parametrize('opener', ['memory_map', 'OSFile'])
+def test_read_table_closes_the_file(data_dir, monkeypatch, opener):
+    opened = []
+    original = getattr(table_io.pa, opener)
+
+    def tracking(*args, **kwargs):
+        opened.append(original(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(table_io.pa, opener, tracking)
+    table_io.read_table('papers', data_dir, memory_map=opener == 'memory_map')
+    assert len(opened) == 1
+    assert opened[0].closed
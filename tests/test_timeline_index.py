@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timeline_index import MAX_YEAR_SPAN, TimelineCube, TimelineIndex, TimelineQuery
+
+
+@pytest.fixture(scope='module')
+def papers():
+    rng = np.random.RandomState(7)
+    n = 400
+    df = pd.DataFrame({
+        'Year': rng.randint(2010, 2025, n).astype(float),
+        'FieldsOfStudy': rng.choice(['Computer Science', 'General', 'Biology'], n).astype(object),
+        'CitationCount': rng.randint(0, 100, n).astype(float),
+    })
+    df.loc[::37, 'Year'] = np.nan
+    df.loc[::23, 'FieldsOfStudy'] = None
+    df.loc[::19, 'CitationCount'] = np.nan
+    return df
+
+
+def scan(df, year_from, year_to, field=None):
+    """逐行筛选的参考实现"""
+    rows = df[(df['Year'] >= year_from) & (df['Year'] <= year_to)]
+    if field is not None:
+        rows = rows[rows['FieldsOfStudy'].fillna('Unknown').str.lower() == field.lower()]
+    count, citations = len(rows), int(rows['CitationCount'].fillna(0).sum())
+    return {'count': count, 'citations': citations, 'mean_citations': citations / count if count else None}
+
+
+@pytest.mark.parametrize('year_from,year_to', [(2010, 2024), (2015, 2015), (2003, 2012), (2020, 2030), (2030, 2040)])
+@pytest.mark.parametrize('field', [None, 'computer science', 'Unknown', 'Physics'])
+def test_cube_totals_match_a_scan(papers, year_from, year_to, field):
+    cube = TimelineCube(papers)
+    assert cube.total(year_from, year_to, field) == scan(papers, year_from, year_to, field)
+
+
+def test_groups(papers):
+    cube = TimelineCube(papers)
+    by_year = cube.query(TimelineQuery(year_from=2012, year_to=2014, field='General'))
+    assert [g['year'] for g in by_year['groups']] == [2012, 2013, 2014]
+    assert by_year['groups'][1] == dict(year=2013, **scan(papers, 2013, 2013, 'General'))
+
+    by_field = cube.query(TimelineQuery(group_by='field'))
+    assert (by_field['from'], by_field['to']) == (2010, 2024)
+    assert [g['field'] for g in by_field['groups']] == ['Biology', 'Computer Science', 'General', 'Unknown']
+    assert sum(g['count'] for g in by_field['groups']) == by_field['total']['count'] == papers['Year'].notna().sum()
+
+    with pytest.raises(ValueError):
+        cube.query(TimelineQuery(year_from=0, year_to=MAX_YEAR_SPAN))
+
+
+def test_categorical_fields_from_arrow_tables(papers):
+    categorical = papers.assign(FieldsOfStudy=papers['FieldsOfStudy'].astype('category'))
+    assert TimelineCube(categorical).total(2010, 2024, 'unknown') == scan(papers, 2010, 2024, 'Unknown')
+
+
+@pytest.mark.parametrize('df', [
+    pd.DataFrame({'Year': [], 'FieldsOfStudy': [], 'CitationCount': []}),
+    pd.DataFrame({'Year': [None, None], 'FieldsOfStudy': ['General', None], 'CitationCount': [1, 2]}),
+])
+@pytest.mark.parametrize('args', [{}, {'from': '2020'}, {'to': '2020'}, {'group_by': 'field'}])
+def test_data_without_years_returns_an_empty_result(df, args):
+    result = TimelineCube(df).query(TimelineQuery.from_args(args))
+    assert result['total'] == {'count': 0, 'citations': 0, 'mean_citations': None}
+    assert result['groups'] == []
+
+
+def test_query_args_validation():
+    assert TimelineQuery.from_args({}).is_empty()
+    for args in ({'from': '2021', 'to': '2020'}, {'from': 'soon'}, {'group_by': 'month'}):
+        with pytest.raises(ValueError):
+            TimelineQuery.from_args(args)
+
+
+def test_timeline_index_years_and_patent_histograms(papers):
+    index = TimelineIndex(papers.assign(Patent_Count=np.arange(len(papers)) % 3))
+    assert index.count(2015) == (papers['Year'] == 2015).sum()
+    assert [r['Year'] for r in index.papers(2015)] == [2015] * index.count(2015)
+    assert index.count(1999) == 0 and index.papers(1999) == []
+    assert sum(h['frequency'] for h in index.patent_histogram()) == len(papers)
+    assert sum(h['frequency'] for h in index.patent_histogram(2015)) == index.count(2015)
+    # 没有专利列时模拟的分布是确定的
+    assert TimelineIndex(papers).patent_histogram() == TimelineIndex(papers).patent_histogram()
+
+
+def baseline_histogram(df, seed):
+    """原接口的做法：设置全局随机种子后用 np.random.choice 模拟 Patent_Count"""
+    if len(df) == 0:
+        return []
+    df = df.copy()
+    if 'Patent_Count' not in df.columns:
+        state = np.random.get_state()
+        try:
+            np.random.seed(seed)
+            df['Patent_Count'] = np.random.choice(
+                [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20],
+                size=len(df),
+                p=[0.3, 0.25, 0.15, 0.1, 0.08, 0.05, 0.03, 0.02, 0.01, 0.005, 0.003, 0.001, 0.001],
+            )
+        finally:
+            np.random.set_state(state)
+    counts = df['Patent_Count'].value_counts().sort_index()
+    return [{'patent_count': int(pc), 'frequency': int(freq)} for pc, freq in counts.items()]
+
+
+def assert_routes_match_baseline(client, data_dir):
+    papers = pd.read_csv(f'{data_dir}/papers.csv')
+    recent = papers[(papers['Year'] >= 2015) & (papers['Year'] <= 2024)].groupby('Year').size()
+    assert client.get('/api/timeline').get_json() == [
+        {'year': year, 'count': int(recent.get(year, 0))} for year in range(2015, 2025)]
+    assert client.get('/api/patent-distribution').get_json() == baseline_histogram(papers, 42)
+    for year in range(2010, 2027):
+        rows = papers[papers['Year'] == year]
+        assert client.get(f'/api/patent-distribution/{year}').get_json() == baseline_histogram(rows, year)
+
+
+def test_routes_match_the_per_request_computation(client, data_dir):
+    assert_routes_match_baseline(client, data_dir)
+
+
+def test_routes_use_a_real_patent_column(client, data_dir):
+    from scripts import table_io
+
+    papers = pd.read_csv(f'{data_dir}/papers.csv')
+    papers['Patent_Count'] = np.arange(len(papers)) % 4
+    table_io.write_table(papers, 'papers', data_dir)
+    assert client.get('/api/patent-distribution').get_json()[0] == {
+        'patent_count': 0, 'frequency': int((papers['Patent_Count'] == 0).sum())}
+    assert_routes_match_baseline(client, data_dir)
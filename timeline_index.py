@@ -0,0 +1,241 @@
+# timeline_index.py
+import numpy as np
+import pandas as pd
+
+# 没有 Patent_Count 列时用来模拟专利引用数：大多数论文 0-5 个，少数更多
+SIMULATED_PATENT_VALUES = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 15, 20]
+SIMULATED_PATENT_PROBS = [0.3, 0.25, 0.15, 0.1, 0.08, 0.05, 0.03, 0.02, 0.01, 0.005, 0.003, 0.001, 0.001]
+
+# 全部论文的模拟数据使用的随机种子；按年份的分布用年份作为种子
+ALL_PAPERS_SEED = 42
+
+# 时间线区间查询支持的分组方式
+GROUP_BY = ('year', 'field', 'none')
+
+# group_by=year 时最多返回的年数
+MAX_YEAR_SPAN = 500
+
+
+def simulate_patent_counts(size, seed):
+    """与 np.random.seed(seed) + np.random.choice 相同的结果，但不改动全局随机状态"""
+    return np.random.RandomState(seed).choice(
+        SIMULATED_PATENT_VALUES, size=size, p=SIMULATED_PATENT_PROBS
+    )
+
+
+def histogram(values):
+    """专利引用数 -> 频数，按专利引用数排序"""
+    counts = pd.Series(values).value_counts().sort_index()
+    return [
+        {'patent_count': int(pc), 'frequency': int(freq)}
+        for pc, freq in counts.items()
+    ]
+
+
+class TimelineIndex:
+    """按年份预先计算的论文聚合
+
+    构建时把论文按年份稳定排序，记录每年对应的行区间，
+    并计算每年的论文数和专利引用直方图（包括全部论文的直方图）。
+    查询时只做字典查找或列表切片。
+    """
+
+    def __init__(self, df, year_column='Year', patent_column='Patent_Count'):
+        years = pd.to_numeric(df[year_column], errors='coerce').to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(years))
+        by_year = valid[np.argsort(years[valid], kind='stable')]
+        sorted_years = years[by_year].astype(np.int64)
+
+        # 年份 -> [start, end)，对应按年份排序后的行
+        values, starts = np.unique(sorted_years, return_index=True)
+        ends = np.append(starts[1:], len(sorted_years))
+        self.ranges = {int(y): (int(s), int(e)) for y, s, e in zip(values, starts, ends)}
+        self.counts = {year: end - start for year, (start, end) in self.ranges.items()}
+        self.records = df.iloc[by_year].to_dict('records')
+
+        if patent_column in df.columns:
+            self.patent_distribution = histogram(df[patent_column])
+            patents = df[patent_column].to_numpy()[by_year]
+            self.patent_distribution_by_year = {
+                year: histogram(patents[start:end]) for year, (start, end) in self.ranges.items()
+            }
+        else:
+            self.patent_distribution = histogram(simulate_patent_counts(len(df), ALL_PAPERS_SEED))
+            self.patent_distribution_by_year = {
+                year: histogram(simulate_patent_counts(end - start, year))
+                for year, (start, end) in self.ranges.items()
+            }
+
+    def count(self, year):
+        return self.counts.get(year, 0)
+
+    def papers(self, year):
+        """某一年的论文记录（原表中的顺序）"""
+        start, end = self.ranges.get(year, (0, 0))
+        return self.records[start:end]
+
+    def patent_histogram(self, year=None):
+        """专利引用分布，year 为 None 时是全部论文"""
+        if year is None:
+            return self.patent_distribution
+        return self.patent_distribution_by_year.get(year, [])
+
+
+class TimelineQuery:
+    """时间线区间查询参数
+
+    from/to: 闭区间年份，缺省为数据中的最早/最晚年份
+    field: FieldsOfStudy 取值（不区分大小写），缺省为全部领域
+    group_by: year（每年一行）、field（每个领域一行）或 none（只返回合计）
+    """
+
+    def __init__(self, year_from=None, year_to=None, field=None, group_by='year'):
+        self.year_from = year_from
+        self.year_to = year_to
+        self.field = field
+        self.group_by = group_by
+
+    @classmethod
+    def from_args(cls, args):
+        """从 request.args 解析参数，非法参数抛出 ValueError"""
+
+        def parse_int(key):
+            value = args.get(key)
+            if value is None or value == '':
+                return None
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be an integer")
+
+        year_from, year_to = parse_int('from'), parse_int('to')
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise ValueError("'from' must not be greater than 'to'")
+
+        group_by = (args.get('group_by') or 'year').lower()
+        if group_by not in GROUP_BY:
+            raise ValueError(f"'group_by' must be one of: {', '.join(GROUP_BY)}")
+
+        return cls(
+            year_from=year_from,
+            year_to=year_to,
+            field=args.get('field') or None,
+            group_by=group_by,
+        )
+
+    def is_empty(self):
+        """没有任何参数时接口保持原来的行为（最近 10 年每年的论文数）"""
+        return (self.year_from is None and self.year_to is None
+                and self.field is None and self.group_by == 'year')
+
+
+def summary(count, citations):
+    return {
+        'count': int(count),
+        'citations': int(citations),
+        'mean_citations': float(citations) / count if count else None,
+    }
+
+
+class TimelineCube:
+    """(年份 × 领域) 聚合立方体
+
+    构建时统计每个 (年份, 领域) 的论文数和引用数之和，
+    并沿年份方向做前缀和（第 0 行为 0）。任意年份区间、
+    任意领域的合计只需两次查表相减，不需要扫描论文表。
+    """
+
+    def __init__(self, df, year_column='Year', field_column='FieldsOfStudy',
+                 citation_column='CitationCount'):
+        years = pd.to_numeric(df[year_column], errors='coerce')
+        valid = years.notna().to_numpy()
+        years = years.to_numpy()[valid].astype(np.int64)
+        if field_column in df.columns:
+            # Arrow 表中领域是 categorical 列，先转成 object 再填充缺失值
+            fields = df[field_column].astype(object).fillna('Unknown').astype(str).to_numpy()[valid]
+        else:
+            fields = np.full(len(years), 'Unknown', dtype=object)
+        if citation_column in df.columns:
+            citations = pd.to_numeric(df[citation_column], errors='coerce').fillna(0).to_numpy()[valid]
+        else:
+            citations = np.zeros(len(years))
+
+        self.min_year = int(years.min()) if len(years) else None
+        self.max_year = int(years.max()) if len(years) else None
+
+        # 领域：小写领域名 -> 列号，列号 -> 原始领域名
+        field_codes, self.fields = pd.factorize(pd.Series(fields), sort=True)
+        self.fields = list(self.fields)
+        self.field_position = {name.lower(): i for i, name in enumerate(self.fields)}
+
+        n_years = 0 if self.min_year is None else self.max_year - self.min_year + 1
+        shape = (n_years, len(self.fields))
+        year_codes = years - (self.min_year or 0)
+        counts = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape, dtype=np.int64)
+        np.add.at(counts, (year_codes, field_codes), 1)
+        np.add.at(sums, (year_codes, field_codes), citations.astype(np.int64))
+
+        # 前缀和：prefix[k] 为年份下标 < k 的合计；最后一列为所有领域的合计
+        self.count_prefix = np.zeros((n_years + 1, len(self.fields) + 1), dtype=np.int64)
+        self.citation_prefix = np.zeros_like(self.count_prefix)
+        np.cumsum(counts, axis=0, out=self.count_prefix[1:, :-1])
+        np.cumsum(sums, axis=0, out=self.citation_prefix[1:, :-1])
+        self.count_prefix[:, -1] = self.count_prefix[:, :-1].sum(axis=1)
+        self.citation_prefix[:, -1] = self.citation_prefix[:, :-1].sum(axis=1)
+
+    def _rows(self, year_from, year_to):
+        """年份闭区间 -> 前缀和的行区间 [lo, hi)，超出数据范围的部分截掉"""
+        if self.min_year is None:
+            return 0, 0
+        lo = min(max(year_from - self.min_year, 0), self.max_year - self.min_year + 1)
+        hi = min(max(year_to - self.min_year + 1, 0), self.max_year - self.min_year + 1)
+        return lo, max(lo, hi)
+
+    def _column(self, field):
+        """领域 -> 列号，None 为所有领域的合计列，未知领域为 -1"""
+        if field is None:
+            return len(self.fields)
+        return self.field_position.get(field.lower(), -1)
+
+    def total(self, year_from, year_to, field=None):
+        """年份闭区间、某个领域的 {count, citations, mean_citations}"""
+        column = self._column(field)
+        if column < 0:
+            return summary(0, 0)
+        lo, hi = self._rows(year_from, year_to)
+        return summary(
+            self.count_prefix[hi, column] - self.count_prefix[lo, column],
+            self.citation_prefix[hi, column] - self.citation_prefix[lo, column],
+        )
+
+    def query(self, q):
+        """执行区间查询，返回合计以及按 group_by 分组的结果"""
+        year_from = self.min_year if q.year_from is None else q.year_from
+        year_to = self.max_year if q.year_to is None else q.year_to
+        result = {
+            'from': year_from,
+            'to': year_to,
+            'field': q.field,
+            'group_by': q.group_by,
+        }
+        if self.min_year is None:
+            # 没有任何带年份的论文（只给了 from 或 to 时另一端仍是 None）
+            result.update({'total': summary(0, 0), 'groups': []})
+            return result
+
+        result['total'] = self.total(year_from, year_to, q.field)
+        if q.group_by == 'year':
+            if year_to - year_from + 1 > MAX_YEAR_SPAN:
+                raise ValueError(f"Year range is limited to {MAX_YEAR_SPAN} years when grouping by year")
+            groups = [dict(year=year, **self.total(year, year, q.field))
+                      for year in range(year_from, year_to + 1)]
+        elif q.group_by == 'field':
+            names = self.fields if q.field is None else [
+                name for name in self.fields if name.lower() == q.field.lower()
+            ]
+            groups = [dict(field=name, **self.total(year_from, year_to, name)) for name in names]
+        else:
+            groups = []
+        result['groups'] = groups
+        return result